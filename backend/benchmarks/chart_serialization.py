@@ -0,0 +1,96 @@
+"""
+Benchmark — Chart serialization: legacy double-encoded path vs the fast path.
+
+Legacy: pio.to_json(fig, validate=True) wrapped by JSONResponse, i.e. a JSON
+string literal that the client has to parse twice. Fast: fig.to_plotly_json()
+encoded once with orjson. Reports payload size and median encode time per chart.
+
+Run from backend/:  python -m benchmarks.chart_serialization [--repeat 20] [--points 1260]
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import plotly.io as pio
+
+from engines.viz_engine import (
+    create_candlestick_chart,
+    create_correlation_heatmap,
+    create_drawdown_chart,
+    create_equity_curve_chart,
+    create_returns_distribution_chart,
+    create_volatility_chart,
+    encode_json,
+    figure_to_json,
+)
+
+
+def _legacy(fig) -> bytes:
+    return json.dumps(pio.to_json(fig, validate=True), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _fast(fig) -> bytes:
+    return encode_json(figure_to_json(fig))
+
+
+def _figures(points: int) -> dict:
+    rng = np.random.default_rng(7)
+    returns = rng.normal(0.0004, 0.012, points)
+    equity = (100_000 * np.cumprod(1 + returns)).tolist()
+    dates = np.datetime_as_string(np.datetime64("2020-01-01") + np.arange(points)).tolist()
+    close = 100 * np.cumprod(1 + returns)
+    ohlcv = [
+        {"date": d, "open": c * 0.998, "high": c * 1.01, "low": c * 0.99, "close": c, "volume": 1_000_000}
+        for d, c in zip(dates, close.tolist())
+    ]
+    returns_dict = {f"T{i:02d}": (returns * (1 + i / 10) + rng.normal(0, 0.004, points)).tolist() for i in range(20)}
+    return {
+        "candlestick": create_candlestick_chart(ohlcv),
+        "equity_curve": create_equity_curve_chart(
+            [{"date": d, "portfolio": e, "benchmark": e * 0.97} for d, e in zip(dates, equity)]
+        ),
+        "drawdown": create_drawdown_chart(equity),
+        "returns_distribution": create_returns_distribution_chart(returns.tolist()),
+        "volatility": create_volatility_chart(returns.tolist()),
+        "correlation": create_correlation_heatmap(returns_dict),
+    }
+
+
+def _time(func, fig, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(fig)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--points", type=int, default=1260, help="Bars per series (1260 ≈ 5y daily)")
+    args = parser.parse_args()
+
+    header = f"{'chart':<22}{'legacy KB':>11}{'fast KB':>10}{'legacy ms':>11}{'fast ms':>10}{'speedup':>9}"
+    print(header)
+    print("-" * len(header))
+    totals = np.zeros(4)
+    for name, fig in _figures(args.points).items():
+        legacy_bytes, fast_bytes = _legacy(fig), _fast(fig)
+        # Same figure either way once the legacy string is unwrapped
+        assert set(json.loads(json.loads(legacy_bytes))) == set(json.loads(fast_bytes))
+        row = np.array([
+            len(legacy_bytes) / 1024, len(fast_bytes) / 1024,
+            _time(_legacy, fig, args.repeat), _time(_fast, fig, args.repeat),
+        ])
+        totals += row
+        print(f"{name:<22}{row[0]:>11.1f}{row[1]:>10.1f}{row[2]:>11.2f}{row[3]:>10.2f}{row[2] / row[3]:>8.1f}x")
+    print("-" * len(header))
+    print(f"{'total':<22}{totals[0]:>11.1f}{totals[1]:>10.1f}{totals[2]:>11.2f}{totals[3]:>10.2f}"
+          f"{totals[2] / totals[3]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark — Efficient frontier solve time and feasibility for large universes.
+
+Builds factor-model returns for N assets spread over 11 sectors, solves the
+frontier under the default risk limits (10% per name, 30% per sector) and
+reports the wall time. Every frontier column is checked to be fully
+invested, long-only and within the position and sector caps; a violation or
+an unmet target exits non-zero.
+
+Run from backend/:  python -m benchmarks.optimizer_frontier [--assets 200 500 800] [--points 25] [--seeds 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engines.optimizer_engine import DEFAULT_RISK_LIMITS, PERIODS_PER_YEAR, efficient_frontier
+
+N_SECTORS = 11
+TOLERANCE = 1e-9
+
+
+def _universe(n_assets: int, seed: int) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (600, 5))
+    loadings = rng.normal(0, 1, (5, n_assets))
+    returns = factors @ loadings * 0.5 + rng.normal(0.0004, 0.015, (600, n_assets))
+    mean = returns.mean(axis=0) * PERIODS_PER_YEAR
+    cov = np.cov(returns, rowvar=False) * PERIODS_PER_YEAR
+    return mean, cov, [f"S{i % N_SECTORS}" for i in range(n_assets)]
+
+
+def _violations(weights: np.ndarray, sectors: list[str], cap: float, sector_cap: float) -> list[str]:
+    problems = []
+    if np.abs(weights.sum(axis=0) - 1).max() > TOLERANCE:
+        problems.append("not fully invested")
+    if weights.min() < -TOLERANCE:
+        problems.append("negative weight")
+    if weights.max() > cap + TOLERANCE:
+        problems.append(f"position above {cap:.0%}")
+    sector_arr = np.array(sectors)
+    if max(weights[sector_arr == s].sum(axis=0).max() for s in set(sectors)) > sector_cap + TOLERANCE:
+        problems.append(f"sector above {sector_cap:.0%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, nargs="+", default=[200, 500, 800])
+    parser.add_argument("--points", type=int, default=25)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+    cap = DEFAULT_RISK_LIMITS["max_position_size"]
+    sector_cap = DEFAULT_RISK_LIMITS["max_sector_exposure"]
+
+    header = f"{'assets':>8}{'seed':>6}{'seconds':>10}  result"
+    print(header)
+    print("-" * len(header))
+    failed = False
+    for n_assets in args.assets:
+        for seed in range(args.seeds):
+            mean, cov, sectors = _universe(n_assets, seed)
+            start = time.perf_counter()
+            try:
+                frontier = efficient_frontier(mean, cov, sectors, args.points, cap, sector_cap)
+                problems = _violations(frontier["weights"], sectors, cap, sector_cap)
+            except ValueError as e:
+                problems = [str(e)]
+            elapsed = time.perf_counter() - start
+            failed |= bool(problems)
+            print(f"{n_assets:>8}{seed:>6}{elapsed:>10.2f}  {'; '.join(problems) or 'ok'}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark — Cold-start import cost of the API modules.
+
+Imports each target in a fresh interpreter with `python -X importtime` and
+reports the median wall time, the cumulative import time of every project
+module (main, routers, engines, db) and of the heavy third-party libraries,
+and which of those libraries were actually loaded at startup.
+
+Run from backend/:  python -m benchmarks.startup_imports [--module main] [--repeat 5] [--top 20]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+PROJECT_PREFIXES = ("main", "routers", "engines", "db", "models")
+HEAVY_LIBRARIES = ("numpy", "pandas", "plotly", "yfinance", "zhipuai", "fastapi", "pydantic", "sqlalchemy")
+
+
+def _import_once(modules: list[str]) -> tuple[float, dict[str, int]]:
+    """Wall time (ms) and cumulative import time (µs) per module for one cold import."""
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        # __import__, not importlib.import_module: only the former is traced by -X importtime
+        f"for name in {modules!r}: __import__(name)\n"
+        "print(f'{(time.perf_counter() - start) * 1000:.3f}')\n"
+    )
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"Importing {', '.join(modules)} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    return float(proc.stdout.strip().splitlines()[-1]), cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", action="append", help="Module to import (repeatable, default: main)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20, help="Project modules to list")
+    args = parser.parse_args()
+    modules = args.module or ["main"]
+
+    walls, samples = [], defaultdict(list)
+    for _ in range(args.repeat):
+        wall, cumulative = _import_once(modules)
+        walls.append(wall)
+        for name, us in cumulative.items():
+            samples[name].append(us)
+    median = {name: statistics.median(values) / 1000 for name, values in samples.items()}
+
+    print(f"import {', '.join(modules)}: {statistics.median(walls):.1f} ms median wall time ({args.repeat} runs)")
+    print()
+    project = sorted(
+        (name for name in median if name.split(".")[0] in PROJECT_PREFIXES),
+        key=median.get, reverse=True,
+    )
+    header = f"{'module':<36}{'cumulative ms':>15}"
+    print(header)
+    print("-" * len(header))
+    for name in project[:args.top]:
+        print(f"{name:<36}{median[name]:>15.1f}")
+    print()
+    print(f"{'library':<36}{'cumulative ms':>15}")
+    print("-" * len(header))
+    for name in HEAVY_LIBRARIES:
+        loaded = f"{median[name]:>15.1f}" if name in median else f"{'not loaded':>15}"
+        print(f"{name:<36}{loaded}")
+
+
+if __name__ == "__main__":
+    main()
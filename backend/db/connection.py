@@ -126,6 +126,56 @@ async def get_active_positions(portfolio_id: int):
     return await db_manager.fetch_all(query)
 
 
+async def get_watchlist_symbols(watchlist_id: int):
+    """Get the symbols on a watchlist."""
+    from db.schema import watchlist_items
+    query = watchlist_items.select().where(watchlist_items.watchlist_id == watchlist_id)
+    return await db_manager.fetch_all(query)
+
+
+async def get_portfolio_transactions(portfolio_id: int):
+    """Get a portfolio's full transaction ledger in execution order."""
+    from db.schema import transactions
+    query = transactions.select().where(
+        transactions.portfolio_id == portfolio_id
+    ).order_by(transactions.executed_at, transactions.id)
+    return await db_manager.fetch_all(query)
+
+
+async def get_portfolio_dividends(portfolio_id: int):
+    """Get all dividends received by a portfolio."""
+    from db.schema import dividends
+    query = dividends.select().where(dividends.portfolio_id == portfolio_id)
+    return await db_manager.fetch_all(query)
+
+
+async def get_market_closes(symbols: list[str], start_date=None):
+    """Get daily closes for symbols, optionally from a start date."""
+    from db.schema import market_data
+    query = market_data.select().where(market_data.symbol.in_(symbols))
+    if start_date:
+        query = query.where(market_data.date >= start_date)
+    return await db_manager.fetch_all(query.order_by(market_data.date))
+
+
+async def get_portfolio_snapshots(portfolio_id: int, start_date=None, end_date=None):
+    """Get materialized daily snapshots for a portfolio in date order."""
+    from db.schema import portfolio_snapshots
+    query = portfolio_snapshots.select().where(portfolio_snapshots.portfolio_id == portfolio_id)
+    if start_date:
+        query = query.where(portfolio_snapshots.date >= start_date)
+    if end_date:
+        query = query.where(portfolio_snapshots.date <= end_date)
+    return await db_manager.fetch_all(query.order_by(portfolio_snapshots.date))
+
+
+async def get_system_setting(key: str):
+    """Get one system setting row by key."""
+    from db.schema import system_settings
+    query = system_settings.select().where(system_settings.key == key)
+    return await db_manager.fetch_one(query)
+
+
 async def create_transaction(transaction_data: dict):
     """Create a new transaction record."""
     from db.schema import transactions
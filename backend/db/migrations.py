@@ -324,6 +324,12 @@ CREATE TABLE IF NOT EXISTS system_settings (
 );
 """
 
+# Snapshots are upserted per (portfolio, day) by db/snapshots.py
+CREATE_UNIQUE_PORTFOLIO_SNAPSHOTS = """
+CREATE UNIQUE INDEX IF NOT EXISTS uq_portfolio_snapshots_portfolio_id_date
+    ON portfolio_snapshots(portfolio_id, date);
+"""
+
 
 # ===== Migration Functions =====
 
@@ -357,6 +363,7 @@ async def migrate(db):
         ("013_create_alerts", CREATE_TABLE_ALERTS),
         ("014_create_api_keys", CREATE_TABLE_API_KEYS),
         ("015_create_system_settings", CREATE_TABLE_SYSTEM_SETTINGS),
+        ("016_unique_portfolio_snapshots", CREATE_UNIQUE_PORTFOLIO_SNAPSHOTS),
     ]
     
     print("\n🚀 Starting database migrations...\n")
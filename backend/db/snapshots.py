@@ -0,0 +1,184 @@
+"""
+Materialize Portfolio Snapshots
+Nightly job that replays every active portfolio and upserts its daily
+`portfolio_snapshots` rows in bulk.
+
+Only dates missing from the table are written (unless overwrite=True), and
+each batch of portfolios commits on its own, so an interrupted run resumes
+where it stopped and a rerun backfills any gaps.
+"""
+import asyncio
+import argparse
+from functools import partial
+from datetime import date, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db.connection import db_manager
+from engines.ledger_engine import replay_ledger, closes_from_rows
+from engines.fx_engine import get_ticker_currencies
+from engines.snapshot_engine import build_snapshots, build_upsert, DEFAULT_WINDOW
+
+PORTFOLIO_BATCH_SIZE = 200
+
+
+def _group(rows: list[dict], key: str) -> dict:
+    grouped: dict = {}
+    for row in rows:
+        grouped.setdefault(row[key], []).append(row)
+    return grouped
+
+
+async def _fetch(query: str, values: Optional[dict] = None) -> list[dict]:
+    return [dict(r._mapping) for r in await db_manager.fetch_all(query, values or {})]
+
+
+def _build_rows(
+    portfolios: list[dict],
+    transactions: dict,
+    dividends: dict,
+    existing: dict,
+    market_rows: list[dict],
+    start: Optional[date],
+    end: date,
+    window: int,
+) -> list[dict]:
+    """Replay each portfolio of a batch and build its missing snapshot rows (CPU-bound, no DB access)."""
+    dates, names, closes = closes_from_rows(market_rows)
+    row_of = {s: i for i, s in enumerate(names)}
+    quoted = {s: c for s, c in get_ticker_currencies(names, default=None).items() if c}
+
+    rows = []
+    for portfolio in portfolios:
+        ledger_rows = transactions.get(portfolio["id"])
+        if not ledger_rows:
+            continue
+        try:
+            ledger = replay_ledger(
+                ledger_rows, dates, names, closes,
+                dividends=dividends.get(portfolio["id"]),
+                initial_capital=float(portfolio["initial_capital"] or 0),
+                base_currency=portfolio.get("currency") or "USD",
+                price_currencies=quoted,
+            )
+        except ValueError as e:
+            print(f"  ⚠️  Portfolio {portfolio['id']} skipped: {e}")
+            continue
+
+        wanted = {d for d in ledger["dates"] if (start is None or d >= start.isoformat()) and d <= end.isoformat()}
+        wanted -= {r["date"].isoformat() for r in existing.get(portfolio["id"], [])}
+        if not wanted:
+            continue
+
+        benchmark = None
+        if portfolio.get("benchmark_symbol") in row_of:
+            benchmark = (dates, closes[row_of[portfolio["benchmark_symbol"]]])
+        rows.extend(build_snapshots(portfolio["id"], ledger, benchmark=benchmark, window=window, dates=wanted))
+
+    return rows
+
+
+async def _materialize_batch(
+    portfolios: list[dict],
+    start: Optional[date],
+    end: date,
+    overwrite: bool,
+    window: int,
+) -> int:
+    """Replay one batch of portfolios and upsert their missing snapshot rows."""
+    ids = [p["id"] for p in portfolios]
+    transactions = _group(await _fetch(
+        "SELECT * FROM transactions WHERE portfolio_id = ANY(:ids) AND executed_at < :until "
+        "ORDER BY executed_at, id",
+        {"ids": ids, "until": end + timedelta(days=1)},
+    ), "portfolio_id")
+    dividends = _group(await _fetch(
+        "SELECT * FROM dividends WHERE portfolio_id = ANY(:ids) AND payment_date <= :end",
+        {"ids": ids, "end": end},
+    ), "portfolio_id")
+    existing: dict = {}
+    if not overwrite:
+        existing = _group(await _fetch(
+            "SELECT portfolio_id, date FROM portfolio_snapshots "
+            "WHERE portfolio_id = ANY(:ids) AND date >= :start AND date <= :end",
+            {"ids": ids, "start": start or date.min, "end": end},
+        ), "portfolio_id")
+
+    if not transactions:
+        return 0
+    symbols = {t["symbol"] for rows in transactions.values() for t in rows if t.get("symbol")}
+    symbols |= {p["benchmark_symbol"] for p in portfolios if p.get("benchmark_symbol")}
+    first_trade = min(t["executed_at"] for rows in transactions.values() for t in rows).date()
+    market_rows = await _fetch(
+        "SELECT symbol, date, close FROM market_data "
+        "WHERE symbol = ANY(:symbols) AND date >= :start AND date <= :end",
+        {"symbols": sorted(symbols), "start": first_trade, "end": end},
+    )
+    # Replaying is CPU-bound; run it off the event loop and keep only the DB awaits here
+    rows = await asyncio.get_running_loop().run_in_executor(None, partial(
+        _build_rows, portfolios, transactions, dividends, existing, market_rows, start, end, window,
+    ))
+
+    if rows:
+        async with db_manager.transaction():
+            for sql, values in build_upsert(rows):
+                await db_manager.execute(sql, values)
+    return len(rows)
+
+
+async def materialize_snapshots(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    portfolio_ids: Optional[list[int]] = None,
+    overwrite: bool = False,
+    window: int = DEFAULT_WINDOW,
+    batch_size: int = PORTFOLIO_BATCH_SIZE,
+) -> dict:
+    """
+    Value every active portfolio through `end` (default today) and upsert snapshots.
+
+    With no `start`, every day since each portfolio's first transaction is
+    considered; days that already have a snapshot are skipped.
+    """
+    end = end or date.today()
+    query = "SELECT id, initial_capital, currency, benchmark_symbol FROM portfolios WHERE is_active = TRUE"
+    values: dict = {}
+    if portfolio_ids:
+        query += " AND id = ANY(:ids)"
+        values["ids"] = portfolio_ids
+    portfolios = await _fetch(query + " ORDER BY id", values)
+
+    written = 0
+    for i in range(0, len(portfolios), batch_size):
+        batch = portfolios[i:i + batch_size]
+        count = await _materialize_batch(batch, start, end, overwrite, window)
+        written += count
+        print(f"  ✅ Portfolios {batch[0]['id']}–{batch[-1]['id']}: {count} snapshots")
+
+    return {"portfolios": len(portfolios), "snapshots_written": written, "end": end.isoformat()}
+
+
+async def _main(args: argparse.Namespace):
+    await db_manager.connect()
+    try:
+        result = await materialize_snapshots(
+            start=date.fromisoformat(args.start) if args.start else None,
+            end=date.fromisoformat(args.end) if args.end else None,
+            overwrite=args.overwrite,
+            window=args.window,
+        )
+        print(f"\n✅ {result['snapshots_written']} snapshots written for {result['portfolios']} portfolios\n")
+    finally:
+        await db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize daily portfolio snapshots")
+    parser.add_argument("--start", help="First date to write (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date to write (YYYY-MM-DD, default today)")
+    parser.add_argument("--overwrite", action="store_true", help="Rewrite existing snapshots")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Rolling metrics window")
+    asyncio.run(_main(parser.parse_args()))
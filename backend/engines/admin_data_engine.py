@@ -2,12 +2,12 @@
 Admin Data Engine — Bulk Yahoo Finance data sync with JSON file database.
 Fetches market data and stores it locally for user-facing APIs.
 """
-import yfinance as yf
+import numpy as np
 import json
 import os
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -16,16 +16,15 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path(__file__).parent.parent / "data" / "stocks"
 LOGS_FILE = Path(__file__).parent.parent / "data" / "sync_logs.json"
 
-# Ensure directories exist
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-# In-memory sync logs
+# In-memory sync logs, loaded from LOGS_FILE by init_data_store
 _sync_logs: list[dict] = []
+_store_ready = False
 MAX_LOGS = 200
 
 
 def _log(level: str, message: str, ticker: str = ""):
     """Add a sync log entry."""
+    init_data_store()
     entry = {
         "timestamp": datetime.now().isoformat(),
         "level": level,
@@ -55,8 +54,36 @@ def _load_logs():
         _sync_logs = []
 
 
-# Load logs on import
-_load_logs()
+def init_data_store():
+    """
+    Create the data directory and load persisted logs, once.
+
+    Called from the app lifespan rather than at import; functions that touch
+    the store also call it, so scripts work without the app.
+    """
+    global _store_ready
+    if _store_ready:
+        return
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    _load_logs()
+    _store_ready = True
+
+# Callbacks run after a ticker is written or deleted: fn(ticker, record or None)
+_sync_listeners: list[Callable[[str, Optional[dict]], None]] = []
+
+
+def add_sync_listener(callback: Callable[[str, Optional[dict]], None]):
+    """Register a callback for ticker writes (record) and deletions (None)."""
+    if callback not in _sync_listeners:
+        _sync_listeners.append(callback)
+
+
+def _notify(ticker: str, record: Optional[dict]):
+    for callback in _sync_listeners:
+        try:
+            callback(ticker, record)
+        except Exception as e:
+            logger.error(f"Sync listener failed for {ticker}: {e}")
 
 
 def sync_ticker(ticker: str) -> dict:
@@ -68,6 +95,8 @@ def sync_ticker(ticker: str) -> dict:
     _log("info", f"Starting sync for {ticker}", ticker)
 
     try:
+        import yfinance as yf
+
         stock = yf.Ticker(ticker)
 
         # 1. OHLCV History (1 year, daily)
@@ -159,6 +188,7 @@ def sync_ticker(ticker: str) -> dict:
         filepath = DATA_DIR / f"{ticker}.json"
         with open(filepath, "w") as f:
             json.dump(record, f, indent=2)
+        _notify(ticker, record)
 
         _log("info", f"Successfully synced {ticker}: {len(ohlcv_data)} data points, price=${current_price}", ticker)
 
@@ -272,6 +302,36 @@ def get_synced_data(ticker: str) -> Optional[dict]:
         return None
 
 
+def get_price_matrix(
+    tickers: list[str],
+    field: str = "close",
+) -> tuple[list[str], list[str], np.ndarray]:
+    """
+    Load one OHLCV field for many synced tickers aligned on a shared date axis.
+
+    Returns (dates, tickers, values) where `values` is a (tickers × dates)
+    float array with NaN where a ticker has no bar. Tickers with no synced
+    data are dropped from the result.
+    """
+    series: dict[str, dict[str, float]] = {}
+    for ticker in tickers:
+        data = get_synced_data(ticker)
+        if not data or not data.get("ohlcv"):
+            continue
+        series[data.get("ticker", ticker.upper().strip())] = {
+            bar["date"]: bar[field] for bar in data["ohlcv"] if bar.get(field) is not None
+        }
+
+    dates = sorted({d for bars in series.values() for d in bars})
+    date_index = {d: i for i, d in enumerate(dates)}
+    values = np.full((len(series), len(dates)), np.nan)
+    for row, bars in enumerate(series.values()):
+        cols = [date_index[d] for d in bars]
+        values[row, cols] = list(bars.values())
+
+    return dates, list(series.keys()), values
+
+
 def get_all_synced_tickers() -> list[str]:
     """Get list of all synced ticker symbols."""
     if not DATA_DIR.exists():
@@ -286,6 +346,7 @@ def delete_ticker(ticker: str) -> bool:
 
     if filepath.exists():
         filepath.unlink()
+        _notify(ticker, None)
         _log("info", f"Deleted data for {ticker}", ticker)
         return True
 
@@ -301,6 +362,7 @@ def get_market_overview() -> dict:
     total_market_cap = sum(s.get("market_cap", 0) for s in statuses if s.get("market_cap"))
     total_db_size = sum(s.get("file_size", 0) for s in statuses)
 
+    init_data_store()
     # Last sync time
     last_sync = ""
     if statuses:
@@ -375,6 +437,7 @@ def search_yahoo_finance(query: str) -> list[dict]:
 
 def get_logs(limit: int = 50, level: Optional[str] = None) -> list[dict]:
     """Get sync logs, optionally filtered by level."""
+    init_data_store()
     logs = _sync_logs
     if level:
         logs = [l for l in logs if l.get("level") == level]
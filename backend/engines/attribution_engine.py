@@ -0,0 +1,367 @@
+"""
+Attribution Engine — Sector (Brinson) and factor attribution of portfolio returns.
+
+Brinson-Fachler decomposes each period's active return (portfolio minus
+benchmark) by sector into:
+- allocation: (wp - wb) · (rb - Rb), from over/under-weighting sectors
+- selection: wb · (rp - rb), from picking better names within a sector
+- interaction: (wp - wb) · (rp - rb)
+Every period is computed at once from (periods × tickers) weight and return
+matrices and a one-hot (tickers × sectors) map, and multi-period totals are
+linked with Carino smoothing so they add up to the compounded active return.
+
+Factor exposures come from OLS regressions of daily returns on market, size,
+value and momentum factor returns built from the synced universe. All
+holdings and the portfolio are fitted in one least-squares solve, and
+trailing-window exposures at every period end come from cumulative
+cross-products and one batched pseudo-inverse.
+"""
+from typing import Optional
+
+import numpy as np
+
+from engines.admin_data_engine import get_all_synced_tickers, get_price_matrix
+from engines.fx_engine import convert, get_ticker_currencies
+from engines.screener_engine import lookup
+
+PERIODS = ("weekly", "monthly", "quarterly", "yearly")
+PERIODS_PER_YEAR = 252
+DEFAULT_FACTOR_WINDOW = 63
+MOMENTUM_LOOKBACK = 126
+MOMENTUM_SKIP = 21
+MIN_FACTOR_LEG = 2
+
+
+def period_ends(dates: list[str], period: str = "monthly") -> np.ndarray:
+    """Index of the last date of each calendar period."""
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}'. Available: {list(PERIODS)}")
+    days = np.array(dates, dtype="datetime64[D]")
+    if period == "weekly":
+        keys = (days.astype(np.int64) + 3) // 7  # ISO weeks start on Monday
+    elif period == "monthly":
+        keys = days.astype("datetime64[M]").astype(np.int64)
+    elif period == "quarterly":
+        keys = days.astype("datetime64[M]").astype(np.int64) // 3
+    else:
+        keys = days.astype("datetime64[Y]").astype(np.int64)
+    return np.flatnonzero(np.append(keys[1:] != keys[:-1], True))
+
+
+def brinson_attribution(
+    portfolio_weights: np.ndarray,
+    benchmark_weights: np.ndarray,
+    returns: np.ndarray,
+    sectors: list[str],
+) -> dict:
+    """
+    Brinson-Fachler allocation, selection and interaction effects.
+
+    All inputs are (periods × tickers) with beginning-of-period weights.
+    Returns per-period (periods × sectors) arrays plus the portfolio and
+    benchmark return of each period.
+    """
+    wp_t = np.atleast_2d(np.asarray(portfolio_weights, dtype=float))
+    wb_t = np.atleast_2d(np.asarray(benchmark_weights, dtype=float))
+    r_t = np.atleast_2d(np.asarray(returns, dtype=float))
+    names, codes = np.unique(np.asarray(sectors, dtype=object), return_inverse=True)
+    onehot = np.zeros((len(sectors), len(names)))
+    onehot[np.arange(len(sectors)), codes] = 1.0
+
+    port_return = (wp_t * r_t).sum(axis=1)
+    bench_return = (wb_t * r_t).sum(axis=1)
+    wp = wp_t @ onehot
+    wb = wb_t @ onehot
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # A sector the benchmark does not hold earns the benchmark return
+        rb = np.where(wb > 0, ((wb_t * r_t) @ onehot) / wb, bench_return[:, None])
+        rp = np.where(wp > 0, ((wp_t * r_t) @ onehot) / wp, rb)
+
+    return {
+        "sectors": [str(s) for s in names],
+        "portfolio_return": port_return,
+        "benchmark_return": bench_return,
+        "portfolio_weight": wp,
+        "benchmark_weight": wb,
+        "portfolio_sector_return": rp,
+        "benchmark_sector_return": rb,
+        "allocation": (wp - wb) * (rb - bench_return[:, None]),
+        "selection": wb * (rp - rb),
+        "interaction": (wp - wb) * (rp - rb),
+    }
+
+
+def _carino(r: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Carino log-linking coefficients for returns r and benchmark b."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (np.log1p(r) - np.log1p(b)) / (r - b)
+    return np.where(np.isclose(r, b), 1 / (1 + r), k)
+
+
+def link_effects(effects: np.ndarray, port_return: np.ndarray, bench_return: np.ndarray) -> np.ndarray:
+    """Link (periods × sectors) effects so they sum to the compounded active return."""
+    total_p = np.prod(1 + port_return) - 1
+    total_b = np.prod(1 + bench_return) - 1
+    scale = _carino(port_return, bench_return) / _carino(np.array(total_p), np.array(total_b))
+    return (effects * scale[:, None]).sum(axis=0)
+
+
+def factor_exposures(returns: np.ndarray, factors: np.ndarray) -> dict:
+    """
+    OLS exposures of many return series to the same factors in one solve.
+
+    `returns` is (days × series) and `factors` (days × factors). Returns the
+    intercepts (daily alpha), betas (factors × series), t-statistics and R².
+    """
+    y = np.asarray(returns, dtype=float)
+    x = np.column_stack((np.ones(len(y)), np.asarray(factors, dtype=float)))
+    coef, _, rank, _ = np.linalg.lstsq(x, y, rcond=None)
+    resid = y - x @ coef
+    dof = max(len(y) - rank, 1)
+    sigma2 = (resid ** 2).sum(axis=0) / dof
+    xtx_inv = np.linalg.pinv(x.T @ x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_stats = coef / np.sqrt(np.outer(np.diag(xtx_inv), sigma2))
+        ss_tot = ((y - y.mean(axis=0)) ** 2).sum(axis=0)
+        r2 = np.where(ss_tot > 0, 1 - (resid ** 2).sum(axis=0) / ss_tot, np.nan)
+    return {"alpha": coef[0], "betas": coef[1:], "t_stats": t_stats[1:], "r_squared": r2}
+
+
+def rolling_factor_exposures(
+    returns: np.ndarray,
+    factors: np.ndarray,
+    ends: np.ndarray,
+    window: int = DEFAULT_FACTOR_WINDOW,
+) -> np.ndarray:
+    """
+    Trailing-window betas at each index in `ends`, shaped (ends × factors × series).
+
+    Window sums of X'X and X'y come from cumulative sums, so every window is
+    solved at once with a batched pseudo-inverse.
+    """
+    y = np.asarray(returns, dtype=float)
+    x = np.column_stack((np.ones(len(y)), np.asarray(factors, dtype=float)))
+    xtx = np.concatenate((np.zeros((1, x.shape[1], x.shape[1])), np.cumsum(x[:, :, None] * x[:, None, :], axis=0)))
+    xty = np.concatenate((np.zeros((1, x.shape[1], y.shape[1])), np.cumsum(x[:, :, None] * y[:, None, :], axis=0)))
+    stop = np.asarray(ends) + 1
+    start = np.maximum(stop - window, 0)
+    coef = np.linalg.pinv(xtx[stop] - xtx[start]) @ (xty[stop] - xty[start])
+    coef[stop - start <= x.shape[1]] = np.nan
+    return coef[:, 1:]
+
+
+def _long_short(returns: np.ndarray, signal: np.ndarray, fraction: float = 1 / 3) -> np.ndarray:
+    """Daily return of equal-weighted low-signal minus high-signal names."""
+    signal = np.broadcast_to(signal, returns.shape)
+    ordered = np.sort(signal, axis=-1)  # NaN sorts last
+    count = np.isfinite(signal).sum(axis=-1, keepdims=True)
+    k = np.floor((count - 1) * fraction).astype(int).clip(0)
+    lo = np.take_along_axis(ordered, k, axis=-1)
+    hi = np.take_along_axis(ordered, np.maximum(count - 1 - k, 0), axis=-1)
+    longs = np.broadcast_to(signal <= lo, returns.shape)
+    shorts = np.broadcast_to(signal >= hi, returns.shape)
+    with np.errstate(invalid="ignore"):
+        long_ret = np.where(longs, returns, 0).sum(axis=1) / longs.sum(axis=1)
+        short_ret = np.where(shorts, returns, 0).sum(axis=1) / shorts.sum(axis=1)
+    valid = (longs.sum(axis=1) >= MIN_FACTOR_LEG) & (shorts.sum(axis=1) >= MIN_FACTOR_LEG)
+    return np.where(valid, long_ret - short_ret, np.nan)
+
+
+def build_factor_returns(
+    closes: np.ndarray,
+    market_caps: np.ndarray,
+    pe_ratios: np.ndarray,
+    market_returns: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """
+    Daily factor returns from a forward-filled (tickers × dates) close matrix.
+
+    Size and value sort on the current market cap and P/E (small minus big,
+    cheap minus expensive); momentum sorts daily on the return over the
+    prior `MOMENTUM_LOOKBACK` days skipping the last `MOMENTUM_SKIP`, and is
+    long winners. Factors without enough names on both legs are dropped.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = (closes[:, 1:] / closes[:, :-1] - 1).T
+        lagged = np.full(closes.shape, np.nan)
+        span = MOMENTUM_LOOKBACK + MOMENTUM_SKIP
+        if closes.shape[1] > span:
+            lagged[:, span:] = closes[:, span - MOMENTUM_SKIP:-MOMENTUM_SKIP] / closes[:, :-span] - 1
+    daily = np.where(np.isfinite(daily), daily, np.nan)
+    finite = np.isfinite(daily)
+
+    candidates = {
+        "market": market_returns,
+        "size": _long_short(np.where(finite, daily, 0), np.where(finite, market_caps, np.nan)),
+        "value": _long_short(np.where(finite, daily, 0), np.where(finite & (pe_ratios > 0), pe_ratios, np.nan)),
+        # Signal known at the previous close; long the winners
+        "momentum": _long_short(np.where(finite, daily, 0), np.where(finite, -lagged[:, :-1].T, np.nan)),
+    }
+    return {k: v for k, v in candidates.items() if np.isfinite(v).sum() > DEFAULT_FACTOR_WINDOW}
+
+
+def attribute_performance(
+    holdings: dict[str, float],
+    benchmark: Optional[list[str]] = None,
+    benchmark_symbol: Optional[str] = None,
+    period: str = "monthly",
+    start: Optional[str] = None,
+    factor_window: int = DEFAULT_FACTOR_WINDOW,
+) -> dict:
+    """
+    Sector and factor attribution of a buy-and-hold portfolio of synced tickers.
+
+    `holdings` maps ticker to shares held. The benchmark is the
+    market-cap-weighted `benchmark` universe (default: every synced ticker),
+    with caps converted to USD. Weights drift with prices inside the
+    history; `benchmark_symbol` (e.g. the portfolio's VOO), when synced,
+    serves as the market factor.
+    """
+    holdings = {t.upper().strip(): float(s) for t, s in holdings.items() if s}
+    universe = sorted(set(benchmark or get_all_synced_tickers()) - {(benchmark_symbol or "").upper()})
+    names_needed = sorted(set(holdings) | set(universe) | ({benchmark_symbol.upper()} if benchmark_symbol else set()))
+    dates, names, closes = get_price_matrix(names_needed)
+    missing = sorted(set(holdings) - set(names))
+    if missing:
+        raise ValueError(f"No synced data for holdings: {missing}")
+
+    if start:
+        keep = np.array([d >= start for d in dates], dtype=bool)
+        dates, closes = [d for d, k in zip(dates, keep) if k], closes[:, keep]
+    if len(dates) < 3:
+        raise ValueError("Not enough price history for attribution")
+
+    # Forward-fill each ticker across dates it did not trade
+    finite = np.isfinite(closes)
+    idx = np.where(finite, np.arange(len(dates)), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    closes = np.where(np.maximum.accumulate(finite, axis=1), np.take_along_axis(closes, idx, axis=1), np.nan)
+
+    row = {t: i for i, t in enumerate(names)}
+    bench_symbol_row = row.get(benchmark_symbol.upper()) if benchmark_symbol else None
+    stocks = [t for t in names if t in holdings or t in universe]
+    stock_rows = np.array([row[t] for t in stocks])
+    prices = closes[stock_rows]
+    # Sector and stats from the screener's in-memory table rather than re-reading every record
+    info = lookup(stocks, ["sector", "market_cap", "pe_ratio"])
+    sectors = [sector or "Unknown" for sector in info["sector"]]
+
+    shares = np.array([holdings.get(t, 0.0) for t in stocks])
+    currencies = get_ticker_currencies(stocks)
+    caps = info["market_cap"].copy()
+    for i, t in enumerate(stocks):
+        try:
+            caps[i] = convert(caps[i], currencies[t], "USD")
+        except ValueError:
+            caps[i] = np.nan
+    in_bench = np.array([t in universe for t in stocks]) & np.isfinite(caps) & (caps > 0)
+    if not in_bench.any():
+        raise ValueError("Benchmark universe has no tickers with a known market cap")
+    # Constant implied share counts: today's cap scaled back by price
+    bench_shares = np.where(in_bench, caps / prices[:, -1], 0.0)
+    bench_shares = np.where(np.isfinite(bench_shares), bench_shares, 0.0)
+
+    ends = period_ends(dates, period)
+    starts = np.concatenate(([0], ends[:-1]))
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    p0, p1 = prices[:, starts].T, prices[:, ends].T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        period_returns = np.where(np.isfinite(p0) & np.isfinite(p1), p1 / p0 - 1, 0.0)
+
+    def weights(units: np.ndarray, px: np.ndarray) -> np.ndarray:
+        value = np.where(np.isfinite(px), units * px, 0.0)
+        total = value.sum(axis=-1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(total > 0, value / total, 0.0)
+
+    result = brinson_attribution(weights(shares, p0), weights(bench_shares, p0), period_returns, sectors)
+    port_r, bench_r = result["portfolio_return"], result["benchmark_return"]
+    linked = {k: link_effects(result[k], port_r, bench_r) for k in ("allocation", "selection", "interaction")}
+
+    # Factor regressions on daily returns
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = np.where(np.isfinite(prices[:, 1:] / prices[:, :-1]), prices[:, 1:] / prices[:, :-1] - 1, 0.0).T
+    bench_w = weights(bench_shares, prices[:, :-1].T)
+    if bench_symbol_row is not None:
+        market = closes[bench_symbol_row]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            market = market[1:] / market[:-1] - 1
+    else:
+        market = (bench_w * daily).sum(axis=1)
+    factor_series = build_factor_returns(
+        prices[in_bench], caps[in_bench], info["pe_ratio"][in_bench], market,
+    )
+
+    held = np.flatnonzero(shares)
+    port_daily = (weights(shares, prices[:, :-1].T) * daily).sum(axis=1)
+    factor_names = list(factor_series)
+    exposures, rolling = {}, []
+    if factor_names:
+        f = np.column_stack([factor_series[k] for k in factor_names])
+        y = np.column_stack((port_daily, daily[:, held]))
+        ok = np.all(np.isfinite(f), axis=1)
+        if ok.sum() > len(factor_names) + 1:
+            fit = factor_exposures(y[ok], f[ok])
+            labels = ["portfolio"] + [stocks[i] for i in held]
+            exposures = {
+                label: {
+                    "alpha_annual": round(float(fit["alpha"][j]) * PERIODS_PER_YEAR * 100, 4),
+                    "betas": {k: round(float(fit["betas"][i, j]), 4) for i, k in enumerate(factor_names)},
+                    "t_stats": {k: round(float(fit["t_stats"][i, j]), 2) for i, k in enumerate(factor_names)},
+                    "r_squared": round(float(fit["r_squared"][j]), 4),
+                }
+                for j, label in enumerate(labels)
+            }
+            # Daily returns are indexed from the second date: period end e -> row e - 1
+            valid_days = np.flatnonzero(ok)
+            at = np.searchsorted(valid_days, ends - 1, side="right") - 1
+            betas = rolling_factor_exposures(port_daily[ok][:, None], f[ok], np.maximum(at, 0), factor_window)
+            betas[at < 0] = np.nan
+            rolling = [
+                {k: (round(float(b), 4) if np.isfinite(b) else None) for k, b in zip(factor_names, betas[i, :, 0])}
+                for i in range(len(ends))
+            ]
+
+    def r(v, digits=4):
+        return round(float(v) * 100, digits)
+
+    return {
+        "period": period,
+        "benchmark_symbol": benchmark_symbol,
+        "benchmark_size": int(in_bench.sum()),
+        "sectors": result["sectors"],
+        "summary": {
+            "portfolio_return": r(np.prod(1 + port_r) - 1),
+            "benchmark_return": r(np.prod(1 + bench_r) - 1),
+            "active_return": r(np.prod(1 + port_r) - np.prod(1 + bench_r)),
+            **{k: r(v.sum()) for k, v in linked.items()},
+        },
+        "by_sector": [
+            {
+                "sector": s,
+                "allocation": r(linked["allocation"][k]),
+                "selection": r(linked["selection"][k]),
+                "interaction": r(linked["interaction"][k]),
+                "total": r(linked["allocation"][k] + linked["selection"][k] + linked["interaction"][k]),
+                "portfolio_weight": r(result["portfolio_weight"][-1, k]),
+                "benchmark_weight": r(result["benchmark_weight"][-1, k]),
+            }
+            for k, s in enumerate(result["sectors"])
+        ],
+        "periods": [
+            {
+                "start": dates[s],
+                "end": dates[e],
+                "portfolio_return": r(port_r[i]),
+                "benchmark_return": r(bench_r[i]),
+                "allocation": r(result["allocation"][i].sum()),
+                "selection": r(result["selection"][i].sum()),
+                "interaction": r(result["interaction"][i].sum()),
+                "factor_betas": rolling[i] if rolling else None,
+            }
+            for i, (s, e) in enumerate(zip(starts, ends))
+        ],
+        "factor_exposures": exposures,
+        "factors": factor_names,
+    }
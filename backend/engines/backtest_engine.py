@@ -0,0 +1,350 @@
+"""
+Backtest Engine — Vectorized strategy simulation over synced OHLCV.
+
+Prices and signals are (tickers × dates) arrays, so a strategy is simulated
+for the whole universe with array operations instead of per-bar loops.
+Signals in [-1, 1] are turned into target weights, filled `execution_lag`
+bars later at the close, and charged a proportional commission on turnover.
+Positions are held at their target weight between signal changes.
+Prices are forward-filled after each ticker's first bar, so tickers on
+different calendars (e.g. stocks with crypto) hold through each other's
+non-trading days; only the span before a ticker's first price is untradable.
+
+Outputs plug straight into the existing engines: `equity_curve` feeds
+`quant_engine.calculate_portfolio_metrics` and `equity_data` feeds
+`viz_engine.create_equity_curve_chart`.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from engines.admin_data_engine import get_price_matrix
+from engines.indicator_engine import sma
+from engines.ledger_engine import forward_fill
+from engines.quant_engine import calculate_batch_metrics, calculate_portfolio_metrics
+
+SIZING_MODES = ("equal", "fixed")
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", str(os.cpu_count() or 1)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_sweep_pool(workers: int = SWEEP_WORKERS) -> ProcessPoolExecutor:
+    """Start (or return) the parameter sweep pool."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(workers, 1))
+    return _pool
+
+
+def shutdown_sweep_pool():
+    """Stop the sweep pool; it restarts lazily on the next sweep."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ===== Signal rules =====
+
+def buy_and_hold_signals(prices: np.ndarray) -> np.ndarray:
+    """Long every ticker whenever it has a price."""
+    return np.isfinite(prices).astype(float)
+
+
+def sma_crossover_signals(prices: np.ndarray, fast: int = 20, slow: int = 50) -> np.ndarray:
+    """Long while the fast SMA is above the slow SMA, flat otherwise."""
+    if fast >= slow:
+        raise ValueError("Fast window must be shorter than slow window")
+    fast_ma = sma(prices, fast)
+    slow_ma = sma(prices, slow)
+    with np.errstate(invalid="ignore"):
+        return (fast_ma > slow_ma).astype(float)
+
+
+def momentum_signals(prices: np.ndarray, lookback: int = 60, top_n: Optional[int] = None) -> np.ndarray:
+    """Long tickers with positive trailing return, optionally only the top N each bar."""
+    signals = np.zeros(prices.shape)
+    if prices.shape[-1] <= lookback:
+        return signals
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trailing = np.full(prices.shape, np.nan)
+        trailing[:, lookback:] = prices[:, lookback:] / prices[:, :-lookback] - 1
+    ranked = np.where(np.isfinite(trailing), trailing, -np.inf)
+    signals = (ranked > 0).astype(float)
+    if top_n is not None and top_n < prices.shape[0]:
+        # Rank within each date column; keep the best `top_n`
+        order = np.argsort(-ranked, axis=0)
+        keep = np.zeros(prices.shape, dtype=bool)
+        np.put_along_axis(keep, order[:top_n], True, axis=0)
+        signals *= keep
+    return signals
+
+
+STRATEGIES: dict[str, Callable[..., np.ndarray]] = {
+    "buy_and_hold": buy_and_hold_signals,
+    "sma_crossover": sma_crossover_signals,
+    "momentum": momentum_signals,
+}
+
+
+# ===== Simulation =====
+
+def _target_weights(
+    signals: np.ndarray,
+    sizing: str,
+    position_size: Optional[float],
+    max_position_size: Optional[float],
+) -> np.ndarray:
+    """Convert (tickers × dates) signals into target portfolio weights."""
+    if sizing == "equal":
+        gross = np.abs(signals).sum(axis=0, keepdims=True)
+        weights = signals / np.maximum(gross, 1.0)
+    else:
+        weights = signals * (position_size if position_size is not None else 1.0 / signals.shape[0])
+
+    if max_position_size is not None:
+        weights = np.clip(weights, -max_position_size, max_position_size)
+    return weights
+
+
+def _extract_trades(
+    dates: list[str],
+    tickers: list[str],
+    prices: np.ndarray,
+    held: np.ndarray,
+) -> list[dict]:
+    """Build the trade list from changes in the filled weights."""
+    n_dates = held.shape[1]
+    # Trades follow the position direction; weight resizes within a leg are not trades
+    side = np.sign(held)
+    padded = np.concatenate((np.zeros((held.shape[0], 1)), side, np.zeros((held.shape[0], 1))), axis=1)
+    changed = padded[:, 1:] != padded[:, :-1]
+    # A change at column j (0-based over dates, j == n_dates means "end") opens/closes a leg
+    opens = changed & (padded[:, 1:] != 0)
+    closes = changed & (padded[:, :-1] != 0)
+
+    trades = []
+    for row in range(held.shape[0]):
+        entries = np.flatnonzero(opens[row])
+        exits = np.flatnonzero(closes[row])
+        for entry, exit_ in zip(entries, exits[np.searchsorted(exits, entries, side="right")]):
+            weight = float(held[row, entry])
+            is_open = exit_ >= n_dates
+            exit_idx = n_dates - 1 if is_open else exit_
+            entry_price = float(prices[row, entry])
+            exit_price = float(prices[row, exit_idx])
+            priced = np.isfinite(entry_price) and np.isfinite(exit_price) and entry_price != 0
+            direction = 1.0 if weight > 0 else -1.0
+            trades.append({
+                "symbol": tickers[row],
+                "side": "long" if direction > 0 else "short",
+                "weight": round(weight, 4),
+                "entry_date": dates[entry],
+                "entry_price": round(entry_price, 4) if np.isfinite(entry_price) else None,
+                "exit_date": None if is_open else dates[exit_idx],
+                "exit_price": round(exit_price, 4) if np.isfinite(exit_price) else None,
+                "return_percent": round(direction * (exit_price / entry_price - 1) * 100, 2) if priced else 0.0,
+                "bars_held": int(exit_idx - entry),
+                "is_open": bool(is_open),
+            })
+
+    trades.sort(key=lambda t: (t["entry_date"], t["symbol"]))
+    return trades
+
+
+def simulate(
+    prices: np.ndarray,
+    signals: np.ndarray,
+    initial_capital: float = 100000.0,
+    commission: float = 0.001,
+    sizing: str = "equal",
+    position_size: Optional[float] = None,
+    max_position_size: Optional[float] = None,
+    execution_lag: int = 1,
+) -> dict[str, np.ndarray]:
+    """
+    Core vectorized simulation; returns the equity curve and filled weights.
+
+    `commission` is a fraction of traded notional (0.001 = 10 bps). Gaps in
+    `prices` are forward-filled, so only bars before a ticker's first price
+    are untradable.
+    """
+    if sizing not in SIZING_MODES:
+        raise ValueError(f"Unknown sizing '{sizing}'. Available: {list(SIZING_MODES)}")
+    raw = np.asarray(prices, dtype=float)
+    signals = np.clip(np.asarray(signals, dtype=float), -1.0, 1.0)
+    if raw.shape != signals.shape:
+        raise ValueError(f"Prices {raw.shape} and signals {signals.shape} must have the same shape")
+
+    prices = forward_fill(raw)
+    tradable = np.isfinite(prices)
+    # A gap bar has no price to signal on, so it keeps the previous bar's signal
+    signals = np.nan_to_num(forward_fill(np.where(np.isfinite(raw) | ~tradable, signals, np.nan)))
+    signals = np.where(tradable, signals, 0.0)
+    target = _target_weights(signals, sizing, position_size, max_position_size)
+
+    # Fill `execution_lag` bars after the signal
+    held = np.zeros_like(target)
+    if execution_lag < target.shape[1]:
+        held[:, execution_lag:] = target[:, : target.shape[1] - execution_lag]
+    held = np.where(tradable, held, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asset_returns = np.zeros_like(prices)
+        asset_returns[:, 1:] = prices[:, 1:] / prices[:, :-1] - 1
+    asset_returns = np.nan_to_num(asset_returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    gross = np.zeros(prices.shape[1])
+    gross[1:] = (held[:, :-1] * asset_returns[:, 1:]).sum(axis=0)
+    turnover = np.abs(np.diff(held, axis=1, prepend=0.0)).sum(axis=0)
+    costs = turnover * commission
+    net = gross - costs
+    equity = initial_capital * np.cumprod(1.0 + net)
+
+    return {
+        "equity": equity,
+        "returns": net,
+        "held": held,
+        "turnover": turnover,
+        "costs": costs,
+    }
+
+
+def run_backtest(
+    dates: list[str],
+    tickers: list[str],
+    prices: np.ndarray,
+    signals: np.ndarray,
+    initial_capital: float = 100000.0,
+    commission: float = 0.001,
+    sizing: str = "equal",
+    position_size: Optional[float] = None,
+    max_position_size: Optional[float] = None,
+    execution_lag: int = 1,
+    benchmark: Optional[np.ndarray] = None,
+) -> dict:
+    """Simulate signals and return equity data, trades and portfolio metrics."""
+    sim = simulate(
+        prices, signals, initial_capital, commission, sizing,
+        position_size, max_position_size, execution_lag,
+    )
+    equity = sim["equity"]
+
+    bench_curve = None
+    if benchmark is not None and len(benchmark) == len(dates):
+        bench = forward_fill(np.asarray(benchmark, dtype=float))
+        first = bench[np.isfinite(bench)][0] if np.isfinite(bench).any() else np.nan
+        bench_curve = initial_capital * bench / first
+
+    equity_data = []
+    for i, date in enumerate(dates):
+        point = {"date": date, "portfolio": round(float(equity[i]), 2)}
+        if bench_curve is not None and np.isfinite(bench_curve[i]):
+            point["benchmark"] = round(float(bench_curve[i]), 2)
+        equity_data.append(point)
+
+    equity_curve = [round(float(v), 2) for v in equity]
+    benchmark_curve = None
+    if bench_curve is not None and np.isfinite(bench_curve).all():
+        benchmark_curve = bench_curve.tolist()
+
+    return {
+        "dates": list(dates),
+        "tickers": list(tickers),
+        "equity_curve": equity_curve,
+        "equity_data": equity_data,
+        "trades": _extract_trades(dates, tickers, forward_fill(np.asarray(prices, dtype=float)), sim["held"]),
+        "metrics": calculate_portfolio_metrics(equity, benchmark_curve),
+        "turnover": round(float(sim["turnover"].sum()), 4),
+        "commission_paid": round(float((sim["costs"] * np.concatenate(([initial_capital], equity[:-1]))).sum()), 2),
+    }
+
+
+def run_strategy(
+    tickers: list[str],
+    strategy: str = "sma_crossover",
+    params: Optional[dict] = None,
+    benchmark_symbol: Optional[str] = None,
+    **kwargs,
+) -> dict:
+    """Load synced closes for `tickers`, generate signals with a named rule and backtest it."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'. Available: {list(STRATEGIES)}")
+
+    symbols = list(tickers) + ([benchmark_symbol] if benchmark_symbol else [])
+    dates, names, closes = get_price_matrix(symbols)
+    benchmark = None
+    if benchmark_symbol and benchmark_symbol.upper() in names:
+        idx = names.index(benchmark_symbol.upper())
+        benchmark = closes[idx]
+        if benchmark_symbol.upper() not in [t.upper() for t in tickers]:
+            names = names[:idx] + names[idx + 1:]
+            closes = np.delete(closes, idx, axis=0)
+
+    if not names or len(dates) < 2:
+        raise ValueError("No synced price history for the requested tickers")
+
+    closes = forward_fill(closes)
+    signals = STRATEGIES[strategy](closes, **(params or {}))
+    result = run_backtest(dates, names, closes, signals, benchmark=benchmark, **kwargs)
+    result["strategy"] = strategy
+    result["params"] = params or {}
+    return result
+
+
+# ===== Parameter sweeps =====
+
+def _sweep_job(job: tuple) -> dict:
+    """Run one parameter combination (top-level so it pickles for the process pool)."""
+    strategy, params, prices, sim_kwargs = job
+    signals = STRATEGIES[strategy](prices, **params)
+    sim = simulate(prices, signals, **sim_kwargs)
+    return {"params": params, "equity": sim["equity"]}
+
+
+def run_parameter_sweep(
+    tickers: list[str],
+    strategy: str,
+    param_grid: dict[str, list],
+    max_workers: Optional[int] = None,
+    **sim_kwargs,
+) -> list[dict]:
+    """
+    Backtest every combination in `param_grid` across the shared sweep pool.
+
+    Metrics for all combinations are computed together with
+    `calculate_batch_metrics`; results are sorted by Sharpe ratio.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'. Available: {list(STRATEGIES)}")
+
+    _, names, closes = get_price_matrix(tickers)
+    if not names:
+        raise ValueError("No synced price history for the requested tickers")
+
+    closes = forward_fill(closes)
+    keys = list(param_grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*param_grid.values())]
+    jobs = [(strategy, params, closes, sim_kwargs) for params in combos]
+
+    workers = min(max_workers or SWEEP_WORKERS, len(jobs))
+    if workers <= 1:
+        runs = [_sweep_job(job) for job in jobs]
+    else:
+        runs = list(start_sweep_pool().map(_sweep_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    if not runs:
+        return []
+
+    batch = calculate_batch_metrics(np.vstack([run["equity"] for run in runs]))
+    results = []
+    for i, run in enumerate(runs):
+        metrics = {key: round(float(values[i]), 2) for key, values in batch.items() if key != "beta"}
+        results.append({"params": run["params"], "metrics": metrics})
+
+    results.sort(key=lambda r: r["metrics"]["sharpe_ratio"], reverse=True)
+    return results
@@ -0,0 +1,360 @@
+"""
+Covariance Engine — Covariance and correlation matrices across synced tickers.
+
+Returns are aligned on the dates every ticker in the universe traded. Three
+estimators are supported:
+- sample: unbiased sample covariance over the trailing window
+- ewma: RiskMetrics-style exponentially weighted covariance (zero mean)
+- ledoit_wolf: sample covariance shrunk toward a scaled identity (Ledoit & Wolf, 2004)
+
+Each estimate is built from running sufficient statistics, cached per
+(universe, window, decay, as-of date) and shared by all three estimators.
+The next day's matrix is derived by adding one return row and dropping the
+oldest, in O(N²) instead of O(T·N²).
+
+The aligned return matrix of each universe is cached as well (and dropped
+when one of its tickers is synced or deleted), so a cache hit or a roll
+forward does not re-read every ticker's JSON file.
+"""
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from typing import Optional
+
+import numpy as np
+
+from engines.admin_data_engine import add_sync_listener, get_price_matrix
+
+COVARIANCE_METHODS = ("sample", "ewma", "ledoit_wolf")
+DEFAULT_WINDOW = 252
+DEFAULT_DECAY = 0.94
+MAX_CACHE_ENTRIES = 32
+
+_cache: "OrderedDict[tuple, _CovarianceState]" = OrderedDict()
+# Requested tickers -> (dates, tickers, returns) over the full synced history
+_returns_cache: "OrderedDict[tuple, tuple[list[str], list[str], np.ndarray]]" = OrderedDict()
+
+
+def _load_aligned_returns(tickers: tuple[str, ...]) -> tuple[list[str], list[str], np.ndarray]:
+    """Full-history aligned returns for `tickers`, read from the data store once per sync."""
+    if tickers in _returns_cache:
+        _returns_cache.move_to_end(tickers)
+        return _returns_cache[tickers]
+
+    dates, names, closes = get_price_matrix(list(tickers))
+    common = np.all(np.isfinite(closes), axis=0)
+    dates = [d for d, keep in zip(dates, common) if keep]
+    closes = closes[:, common]
+    if len(dates) < 2:
+        entry = ([], names, np.empty((0, len(names))))
+    else:
+        returns = (closes[:, 1:] / closes[:, :-1] - 1).T
+        # Shared by every caller, so guard it against in-place edits
+        returns.setflags(write=False)
+        entry = (dates[1:], names, returns)
+
+    _returns_cache[tickers] = entry
+    while len(_returns_cache) > MAX_CACHE_ENTRIES:
+        _returns_cache.popitem(last=False)
+    return entry
+
+
+def get_aligned_returns(
+    tickers: list[str],
+    as_of: Optional[str] = None,
+) -> tuple[list[str], list[str], np.ndarray]:
+    """
+    Daily simple returns for `tickers` on their common trading dates.
+
+    Returns (dates, tickers, returns) with `returns` shaped (dates × tickers).
+    Dates after `as_of` (YYYY-MM-DD) are excluded.
+    """
+    dates, names, returns = _load_aligned_returns(tuple(t.upper().strip() for t in tickers))
+    if not names:
+        return [], [], np.empty((0, 0))
+    if as_of:
+        end = bisect_right(dates, as_of)
+        dates, returns = dates[:end], returns[:end]
+    if not dates:
+        return [], names, np.empty((0, len(names)))
+    return dates, names, returns
+
+
+class _CovarianceState:
+    """Running sufficient statistics over a trailing window of return rows."""
+
+    def __init__(self, n_assets: int, window: int, decay: float):
+        self.window = window
+        self.decay = decay
+        self.rows: deque = deque()
+        self.dates: deque = deque()
+        self.s1 = np.zeros(n_assets)
+        self.s2 = np.zeros((n_assets, n_assets))
+        # Σ_t |x_t|⁴, the only extra term Ledoit-Wolf's intensity needs
+        self.q = 0.0
+        self.ew_num = np.zeros((n_assets, n_assets))
+        self.ew_den = 0.0
+        self._results: dict[str, dict] = {}
+
+    @classmethod
+    def from_window(cls, dates: list[str], returns: np.ndarray, window: int, decay: float):
+        """Build the state for a whole window in one vectorized pass."""
+        state = cls(returns.shape[1], window, decay)
+        returns = returns[-window:]
+        dates = dates[-window:]
+        weights = decay ** np.arange(len(returns) - 1, -1, -1, dtype=float)
+        state.rows.extend(returns)
+        state.dates.extend(dates)
+        state.s1 = returns.sum(axis=0)
+        state.s2 = returns.T @ returns
+        state.q = float(np.sum(np.einsum("ij,ij->i", returns, returns) ** 2))
+        state.ew_num = (returns * weights[:, None]).T @ returns
+        state.ew_den = float(weights.sum())
+        return state
+
+    def copy(self) -> "_CovarianceState":
+        state = _CovarianceState(self.s1.size, self.window, self.decay)
+        state.rows = deque(self.rows)
+        state.dates = deque(self.dates)
+        state.s1 = self.s1.copy()
+        state.s2 = self.s2.copy()
+        state.q = self.q
+        state.ew_num = self.ew_num.copy()
+        state.ew_den = self.ew_den
+        return state
+
+    @property
+    def as_of(self) -> Optional[str]:
+        return self.dates[-1] if self.dates else None
+
+    def push(self, date: str, row: np.ndarray):
+        """Append one day of returns, dropping the oldest once the window is full."""
+        outer = np.outer(row, row)
+        self.ew_num *= self.decay
+        self.ew_num += outer
+        self.ew_den = self.ew_den * self.decay + 1.0
+
+        if len(self.rows) == self.window:
+            old = self.rows.popleft()
+            self.dates.popleft()
+            old_outer = np.outer(old, old)
+            self.s1 -= old
+            self.s2 -= old_outer
+            self.q -= float(old @ old) ** 2
+            tail_weight = self.decay ** self.window
+            self.ew_num -= tail_weight * old_outer
+            self.ew_den -= tail_weight
+
+        self.rows.append(row)
+        self.dates.append(date)
+        self.s1 += row
+        self.s2 += outer
+        self.q += float(row @ row) ** 2
+        self._results.clear()
+
+    def result(self, method: str) -> dict:
+        """Covariance/correlation for the current window (memoized until the next push)."""
+        if method in self._results:
+            return self._results[method]
+
+        n_obs = len(self.rows)
+        n_assets = self.s1.size
+        mean = self.s1 / n_obs
+        cov_ml = self.s2 / n_obs - np.outer(mean, mean)
+        shrinkage = None
+
+        if method == "sample":
+            cov = cov_ml * n_obs / max(n_obs - 1, 1)
+        elif method == "ewma":
+            cov = self.ew_num / self.ew_den
+        else:
+            mu = np.trace(cov_ml) / n_assets
+            target_gap = cov_ml - mu * np.eye(n_assets)
+            d2 = float(np.sum(target_gap ** 2))
+            # Intensity from uncentered second moments; daily means are
+            # negligible next to their dispersion
+            b_bar2 = (self.q / n_obs - float(np.sum((self.s2 / n_obs) ** 2))) / n_obs
+            shrinkage = min(max(b_bar2, 0.0), d2) / d2 if d2 > 0 else 1.0
+            cov = shrinkage * mu * np.eye(n_assets) + (1 - shrinkage) * cov_ml
+
+        cov = (cov + cov.T) / 2
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr = np.nan_to_num(corr)
+        np.fill_diagonal(corr, 1.0)
+
+        self._results[method] = {
+            "covariance": cov,
+            "correlation": corr,
+            "volatility": std,
+            "observations": n_obs,
+            "shrinkage": shrinkage,
+        }
+        return self._results[method]
+
+
+def _store(key: tuple, state: _CovarianceState):
+    _cache[key] = state
+    _cache.move_to_end(key)
+    while len(_cache) > MAX_CACHE_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def get_covariance(
+    tickers: list[str],
+    window: int = DEFAULT_WINDOW,
+    as_of: Optional[str] = None,
+    method: str = "ledoit_wolf",
+    decay: float = DEFAULT_DECAY,
+) -> dict:
+    """
+    Covariance and correlation matrices for a universe of synced tickers.
+
+    Cached per (universe, window, decay, as-of date). When a matrix for
+    an earlier date of the same universe is cached, it is rolled forward one
+    return row at a time rather than recomputed over the full window.
+    """
+    if method not in COVARIANCE_METHODS:
+        raise ValueError(f"Unknown covariance method '{method}'. Available: {list(COVARIANCE_METHODS)}")
+    if window < 2:
+        raise ValueError("Covariance window must be at least 2 observations")
+
+    universe = tuple(sorted({t.upper().strip() for t in tickers}))
+    base_key = (universe, window, decay)
+
+    if as_of and base_key + (as_of,) in _cache:
+        state = _cache[base_key + (as_of,)]
+        _cache.move_to_end(base_key + (as_of,))
+    else:
+        dates, names, returns = get_aligned_returns(list(universe), as_of)
+        if len(dates) < 2:
+            return {"tickers": names, "as_of": None, "window": window, "method": method,
+                    "covariance": np.empty((0, 0)), "correlation": np.empty((0, 0)),
+                    "volatility": np.empty(0), "observations": 0, "shrinkage": None}
+
+        universe = tuple(names)
+        base_key = (universe, window, decay)
+        key = base_key + (dates[-1],)
+        state = _cache.get(key)
+        if state is None:
+            state = _roll_forward(base_key, dates, returns)
+        _store(key, state)
+
+    return {
+        "tickers": list(universe),
+        "as_of": state.as_of,
+        "window": window,
+        "method": method,
+        **state.result(method),
+    }
+
+
+def _roll_forward(base_key: tuple, dates: list[str], returns: np.ndarray) -> _CovarianceState:
+    """Extend the most recent cached earlier state, or build one from scratch."""
+    _, window, decay = base_key
+    position = {d: i for i, d in enumerate(dates)}
+    best = None
+    for key, cached in _cache.items():
+        if key[:3] != base_key or cached.as_of not in position:
+            continue
+        if best is None or position[cached.as_of] > position[best.as_of]:
+            best = cached
+
+    if best is not None:
+        start = position[best.as_of] + 1
+        if 0 < len(dates) - start < window:
+            state = best.copy()
+            for i in range(start, len(dates)):
+                state.push(dates[i], returns[i])
+            return state
+
+    return _CovarianceState.from_window(dates, returns, window, decay)
+
+
+def clear_covariance_cache():
+    """Drop all cached covariance states (e.g. after a bulk re-sync)."""
+    _cache.clear()
+    _returns_cache.clear()
+
+
+def _on_sync(ticker: str, record: Optional[dict]):
+    """Forget the aligned returns of every universe containing a re-synced or deleted ticker."""
+    ticker = ticker.upper().strip()
+    for key in [k for k in _returns_cache if ticker in k]:
+        del _returns_cache[key]
+
+
+add_sync_listener(_on_sync)
+
+
+def cluster_order(correlation: np.ndarray) -> np.ndarray:
+    """
+    Asset order from average-linkage hierarchical clustering of a correlation matrix.
+
+    Distances are sqrt((1 - ρ) / 2), and merging concatenates the clusters'
+    leaf orders, so correlated assets end up next to each other (the
+    dendrogram's leaf order). O(N³) in vectorized steps, fine for a few
+    hundred assets.
+    """
+    n = correlation.shape[0]
+    if n < 3:
+        return np.arange(n)
+
+    dist = np.sqrt(np.clip((1 - np.nan_to_num(correlation)) / 2, 0.0, 1.0))
+    np.fill_diagonal(dist, np.inf)
+    sizes = np.ones(n)
+    leaves = [[i] for i in range(n)]
+    for _ in range(n - 1):
+        i, j = sorted(np.unravel_index(np.argmin(dist), dist.shape))
+        # Lance-Williams update for average linkage
+        merged = (sizes[i] * dist[i] + sizes[j] * dist[j]) / (sizes[i] + sizes[j])
+        dist[i], dist[:, i] = merged, merged
+        dist[i, i] = np.inf
+        dist[j], dist[:, j] = np.inf, np.inf
+        sizes[i] += sizes[j]
+        leaves[i] += leaves[j]
+    return np.array(leaves[i])
+
+
+def top_correlated_pairs(
+    correlation: np.ndarray,
+    tickers: list[str],
+    k: int = 20,
+    absolute: bool = True,
+) -> list[dict]:
+    """The `k` most correlated distinct pairs (by |ρ| when `absolute`), strongest first."""
+    rows, cols = np.triu_indices(correlation.shape[0], k=1)
+    values = correlation[rows, cols]
+    scores = np.abs(values) if absolute else values
+    k = min(k, scores.size)
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [
+        {"a": tickers[rows[p]], "b": tickers[cols[p]], "correlation": round(float(values[p]), 4)}
+        for p in top
+    ]
+
+
+def get_correlation_view(
+    tickers: list[str],
+    window: int = DEFAULT_WINDOW,
+    method: str = "sample",
+    cluster: bool = True,
+) -> dict:
+    """Correlation matrix of a universe, reordered by `cluster_order` when `cluster` is set."""
+    result = get_covariance(tickers, window=window, method=method)
+    names, corr = result["tickers"], result["correlation"]
+    if cluster and corr.size:
+        order = cluster_order(corr)
+        names = [names[i] for i in order]
+        corr = corr[np.ix_(order, order)]
+    return {
+        "tickers": names,
+        "correlation": corr,
+        "as_of": result["as_of"],
+        "window": window,
+        "method": method,
+        "observations": result["observations"],
+    }
@@ -1,7 +1,7 @@
 """
 Data Engine — Fetches market data via yfinance with in-memory caching.
+yfinance is imported on first fetch, keeping it off the startup path.
 """
-import yfinance as yf
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
@@ -40,6 +40,8 @@ def get_ohlcv(ticker: str, period: str = "1y", interval: str = "1d", provider: s
             return cached["data"]
 
     try:
+        import yfinance as yf
+
         stock = yf.Ticker(ticker)
         df = stock.history(period=period, interval=interval)
 
@@ -74,6 +76,8 @@ def get_current_price(ticker: str, provider: str = "yfinance") -> Optional[float
         provider = "yfinance"
 
     try:
+        import yfinance as yf
+
         stock = yf.Ticker(ticker)
         info = stock.fast_info
         return round(float(info.get("lastPrice", 0)), 2)
@@ -90,6 +94,8 @@ def get_company_info(ticker: str, provider: str = "yfinance") -> dict:
         provider = "yfinance"
 
     try:
+        import yfinance as yf
+
         stock = yf.Ticker(ticker)
         info = stock.info
         return {
@@ -0,0 +1,129 @@
+"""
+Downsample Engine — Shape-preserving point reduction for long chart series.
+
+- Lines: Largest-Triangle-Three-Buckets (Steinarsson, 2013). The first and
+  last points are kept, and from each of the remaining buckets the point
+  forming the largest triangle with its neighbours is kept.
+- Candles: OHLC bucket aggregation (first open, max high, min low, last
+  close, summed volume), so every wick survives.
+
+Both are O(n). Buckets are laid out as one padded (buckets × bucket size)
+matrix and scored at once. Classic LTTB anchors each triangle on the point
+picked in the previous bucket, which is inherently sequential. Here every
+bucket is first scored against the previous bucket's mean, then only the
+buckets whose anchor changed are re-scored until no pick moves. The fixed
+point is exactly sequential LTTB, and on real series it is reached in a
+handful of passes over a shrinking set of buckets.
+"""
+from typing import Optional
+
+import numpy as np
+
+# Plotly needs roughly one line vertex, or a few pixels per candle, per screen pixel
+CANDLE_PIXELS = 4
+
+
+def points_for_width(width: Optional[int], max_points: Optional[int] = None, candles: bool = False) -> Optional[int]:
+    """Point budget from an explicit `max_points` or a target pixel width."""
+    if max_points:
+        return max_points
+    if width:
+        return max(width // CANDLE_PIXELS, 2) if candles else width
+    return None
+
+
+def _buckets(n: int, n_out: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Start, size and padded index matrix of the n_out - 2 inner buckets."""
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, sizes = edges[:-1], np.diff(edges)
+    offsets = np.arange(sizes.max())
+    index = np.minimum(starts[:, None] + offsets, n - 2)
+    return starts, sizes, index
+
+
+def lttb_indices(y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the points LTTB keeps, first and last included, in order."""
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    starts, sizes, index = _buckets(n, n_out)
+    valid = np.arange(index.shape[1]) < sizes[:, None]
+    bx, by = x[index], y[index]
+    finite = valid & np.isfinite(by)
+
+    # Mean point of each bucket (NaNs ignored); empty means fall back to the bucket start
+    count = finite.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.where(count > 0, np.where(finite, bx, 0).sum(axis=1) / count, x[starts])
+        mean_y = np.where(count > 0, np.where(finite, by, 0).sum(axis=1) / count, np.nan)
+    # Triangle's third vertex: the next bucket's mean, or the last point
+    cx = np.append(mean_x[1:], x[-1])
+    cy = np.append(mean_y[1:], y[-1])
+
+    def pick(rows: np.ndarray, ax: np.ndarray, ay: np.ndarray) -> np.ndarray:
+        bx_r, by_r = bx[rows], by[rows]
+        area = np.abs(
+            (ax - cx[rows])[:, None] * (by_r - ay[:, None]) - (ax[:, None] - bx_r) * (cy[rows] - ay)[:, None]
+        )
+        area = np.where(finite[rows], np.nan_to_num(area, nan=0.0), -1.0)
+        return index[rows, area.argmax(axis=1)]
+
+    rows = np.arange(len(starts))
+    chosen = pick(rows, np.append(x[0], mean_x[:-1]), np.append(y[0], mean_y[:-1]))
+    # Re-score buckets whose anchor (the previous pick) changed until nothing moves
+    anchors = np.concatenate(([0], chosen[:-1]))
+    stale = rows
+    while stale.size:
+        new = pick(stale, x[anchors[stale]], y[anchors[stale]])
+        moved = stale[new != chosen[stale]]
+        chosen[stale] = new
+        stale = moved[moved + 1 < len(rows)] + 1
+        anchors[stale] = chosen[stale - 1]
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def lttb_union(series: list, max_points: Optional[int]) -> Optional[np.ndarray]:
+    """
+    Indices to keep for several series sharing one x axis, or None to keep all.
+
+    Each series keeps its own LTTB points and the union is returned, so every
+    line keeps its shape with at most max_points × len(series) points.
+    """
+    n = len(series[0]) if series else 0
+    if not max_points or n <= max_points:
+        return None
+    return np.unique(np.concatenate([lttb_indices(s, max_points) for s in series]))
+
+
+def downsample_ohlc(ohlcv: list[dict], max_points: Optional[int]) -> list[dict]:
+    """Aggregate bars into at most `max_points` OHLC buckets, dated by each bucket's first bar."""
+    n = len(ohlcv)
+    if not max_points or n <= max_points:
+        return ohlcv
+
+    def column(key: str) -> np.ndarray:
+        return np.array([bar.get(key) if bar.get(key) is not None else np.nan for bar in ohlcv], dtype=float)
+
+    starts = np.unique(np.linspace(0, n, max_points, endpoint=False).astype(np.int64))
+    ends = np.append(starts[1:], n) - 1
+    high = np.fmax.reduceat(column("high"), starts)
+    low = np.fmin.reduceat(column("low"), starts)
+    volume = np.add.reduceat(np.nan_to_num(column("volume")), starts)
+    opens, closes = column("open")[starts], column("close")[ends]
+
+    return [
+        {
+            "date": ohlcv[s]["date"],
+            "open": float(o),
+            "high": float(h),
+            "low": float(lo),
+            "close": float(c),
+            "volume": float(v),
+        }
+        for s, o, h, lo, c, v in zip(starts.tolist(), opens, high, low, closes, volume)
+    ]
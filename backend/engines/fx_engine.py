@@ -0,0 +1,237 @@
+"""
+FX Engine — Dated FX rate matrix for multi-currency valuation.
+
+Daily USD crosses (e.g. `USDIDR=X`) are synced from Yahoo Finance into
+`data/fx/` and held in memory as one (currencies × dates) matrix of "units
+of currency per 1 USD", forward-filled across non-trading days. Any cross
+rate is then rate[to] / rate[from], so converting a whole price or position
+array is a single gather and multiply rather than a lookup per value.
+
+Quote sub-units reported by Yahoo (GBp, ZAc, ILA) are normalized to their
+ISO currency.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Optional, Union
+
+import numpy as np
+
+from engines.admin_data_engine import DATA_DIR, add_sync_listener, get_synced_data
+
+logger = logging.getLogger(__name__)
+
+FX_DIR = DATA_DIR.parent / "fx"
+
+BASE_CURRENCY = "USD"
+DEFAULT_CURRENCIES = ("IDR", "EUR", "GBP", "JPY", "SGD", "HKD", "AUD", "CNY")
+# Yahoo quotes some exchanges in minor units: code -> (ISO currency, units per major)
+SUBUNITS = {"GBp": ("GBP", 100.0), "GBX": ("GBP", 100.0), "ZAc": ("ZAR", 100.0), "ILA": ("ILS", 100.0)}
+
+ArrayLike = Union[list[float], np.ndarray]
+
+_matrix: Optional[dict] = None
+_ticker_currencies: dict[str, str] = {}
+
+
+def normalize_currency(code: Optional[str]) -> tuple[str, float]:
+    """(ISO currency, divisor) for a quote currency; unknown or empty means USD."""
+    if not code:
+        return BASE_CURRENCY, 1.0
+    if code in SUBUNITS:
+        return SUBUNITS[code]
+    return code.upper(), 1.0
+
+
+def _pair_file(currency: str):
+    return FX_DIR / f"{BASE_CURRENCY}{currency}=X.json"
+
+
+def sync_fx_rates(currencies: Optional[list[str]] = None, period: str = "5y") -> dict:
+    """Download daily USD crosses for `currencies` and rebuild the rate matrix."""
+    global _matrix
+    import yfinance as yf
+
+    FX_DIR.mkdir(parents=True, exist_ok=True)
+    currencies = [normalize_currency(c)[0] for c in (currencies or DEFAULT_CURRENCIES)]
+    results = {}
+    for currency in sorted(set(currencies) - {BASE_CURRENCY}):
+        pair = f"{BASE_CURRENCY}{currency}=X"
+        try:
+            hist = yf.Ticker(pair).history(period=period, interval="1d")
+            rates = {
+                idx.strftime("%Y-%m-%d"): float(row["Close"])
+                for idx, row in hist.iterrows()
+                if row["Close"] and row["Close"] > 0
+            }
+            if not rates:
+                results[currency] = {"status": "error", "error": "No data"}
+                continue
+            with open(_pair_file(currency), "w") as f:
+                json.dump({
+                    "pair": pair,
+                    "base": BASE_CURRENCY,
+                    "quote": currency,
+                    "rates": rates,
+                    "synced_at": datetime.now().isoformat(),
+                }, f)
+            results[currency] = {"status": "success", "data_points": len(rates)}
+        except Exception as e:
+            logger.error(f"Failed to sync FX pair {pair}: {e}")
+            results[currency] = {"status": "error", "error": str(e)}
+
+    _matrix = None
+    return {"base": BASE_CURRENCY, "results": results}
+
+
+def _load_matrix() -> dict:
+    """Build the forward-filled (currencies × dates) matrix from the synced pairs."""
+    series: dict[str, dict[str, float]] = {}
+    for path in sorted(FX_DIR.glob(f"{BASE_CURRENCY}*=X.json")):
+        try:
+            with open(path) as f:
+                record = json.load(f)
+            series[record["quote"]] = record["rates"]
+        except Exception as e:
+            logger.error(f"Error reading FX file {path.name}: {e}")
+
+    dates = sorted({d for rates in series.values() for d in rates})
+    currencies = [BASE_CURRENCY] + sorted(series)
+    rates = np.full((len(currencies), len(dates)), np.nan)
+    rates[0] = 1.0
+    date_index = {d: i for i, d in enumerate(dates)}
+    for row, currency in enumerate(currencies[1:], start=1):
+        cols = [date_index[d] for d in series[currency]]
+        rates[row, cols] = list(series[currency].values())
+
+    # Forward-fill gaps, then back-fill the span before a pair's first quote
+    if dates:
+        finite = np.isfinite(rates)
+        idx = np.where(finite, np.arange(len(dates)), 0)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        rates = np.take_along_axis(rates, idx, axis=1)
+        first = rates[np.arange(len(currencies)), finite.argmax(axis=1)]
+        rates = np.where(np.maximum.accumulate(finite, axis=1), rates, first[:, None])
+
+    return {
+        "dates": dates,
+        "days": np.array(dates, dtype="datetime64[D]"),
+        "currencies": {c: i for i, c in enumerate(currencies)},
+        "rates": rates,
+    }
+
+
+def get_fx_matrix() -> dict:
+    """The cached rate matrix: dates, currency index and rates (units per USD)."""
+    global _matrix
+    if _matrix is None:
+        _matrix = _load_matrix()
+    return _matrix
+
+
+def _columns(matrix: dict, dates) -> np.ndarray:
+    """Matrix column for each date: the last quote on or before it (latest when None)."""
+    n = len(matrix["dates"])
+    if dates is None:
+        return np.array(n - 1)
+    days = np.asarray(dates, dtype="datetime64[D]")
+    return np.clip(np.searchsorted(matrix["days"], days, side="right") - 1, 0, n - 1)
+
+
+def _rows(matrix: dict, currencies) -> tuple[np.ndarray, np.ndarray]:
+    """Matrix rows and sub-unit divisors for one currency or an array of them."""
+    codes = np.atleast_1d(np.asarray(currencies, dtype=object))
+    rows = np.empty(codes.shape, dtype=int)
+    divisors = np.empty(codes.shape)
+    for i, code in enumerate(codes.flat):
+        iso, divisor = normalize_currency(code)
+        if iso not in matrix["currencies"]:
+            raise ValueError(f"No FX rates for {iso}. Sync it with sync_fx_rates(['{iso}'])")
+        rows.flat[i] = matrix["currencies"][iso]
+        divisors.flat[i] = divisor
+    if np.ndim(currencies) == 0:
+        return rows[0], divisors[0]
+    return rows, divisors
+
+
+def conversion_factors(from_currency, to_currency: str, dates=None) -> np.ndarray:
+    """
+    Multipliers converting amounts in `from_currency` into `to_currency`.
+
+    `from_currency` is one code or an array of codes (one per row); `dates`
+    is None (latest rate), one date, or an array of dates (one per column).
+    The result broadcasts as (rows × dates).
+    """
+    matrix = get_fx_matrix()
+    if not matrix["dates"]:
+        # Nothing synced yet: only same-currency (sub-unit) conversions are possible
+        matrix = {
+            "dates": [""],
+            "days": np.array(["1970-01-01"], dtype="datetime64[D]"),
+            "currencies": {normalize_currency(to_currency)[0]: 0},
+            "rates": np.ones((1, 1)),
+        }
+
+    from_rows, divisors = _rows(matrix, from_currency)
+    to_row, to_divisor = _rows(matrix, to_currency)
+    cols = _columns(matrix, dates)
+    rates = matrix["rates"]
+    from_rows = np.asarray(from_rows)
+    if from_rows.ndim == 1 and cols.ndim == 1:
+        from_rates = rates[from_rows[:, None], cols[None, :]]
+        divisors = np.asarray(divisors)[:, None]
+    else:
+        from_rates = rates[from_rows, cols]
+    return rates[to_row, cols] / from_rates / divisors * to_divisor
+
+
+def convert(amounts: ArrayLike, from_currency, to_currency: str, dates=None) -> np.ndarray:
+    """Convert amounts (scalar, per-row or rows × dates array) between currencies."""
+    return np.asarray(amounts, dtype=float) * conversion_factors(from_currency, to_currency, dates)
+
+
+def get_rate(from_currency: str, to_currency: str, on_date: Optional[str] = None) -> float:
+    """Units of `to_currency` per one unit of `from_currency` on a date (latest by default)."""
+    return float(conversion_factors(from_currency, to_currency, on_date))
+
+
+def convert_each(amounts: ArrayLike, currencies: list[str], dates: list[str], to_currency: str) -> np.ndarray:
+    """Convert a list of dated amounts (e.g. ledger events), each in its own currency."""
+    amounts = np.asarray(amounts, dtype=float)
+    codes = np.asarray(currencies, dtype=object)
+    days = np.asarray(dates, dtype="datetime64[D]")
+    converted = np.empty_like(amounts)
+    for code in set(currencies):
+        mask = codes == code
+        converted[mask] = amounts[mask] * conversion_factors(code, to_currency, days[mask])
+    return converted
+
+
+def get_ticker_currencies(tickers: list[str], default: Optional[str] = BASE_CURRENCY) -> dict[str, Optional[str]]:
+    """Quote currency of each synced ticker (`default` when not synced or unknown)."""
+    result = {}
+    for ticker in tickers:
+        key = ticker.upper().strip()
+        if key not in _ticker_currencies:
+            data = get_synced_data(key) or {}
+            _ticker_currencies[key] = (data.get("company") or {}).get("currency")
+        result[key] = _ticker_currencies[key] or default
+    return result
+
+
+def convert_price_matrix(
+    dates: list[str],
+    tickers: list[str],
+    values: np.ndarray,
+    to_currency: str,
+) -> np.ndarray:
+    """Convert a (tickers × dates) price matrix into one currency at each date's rate."""
+    currencies = get_ticker_currencies(tickers)
+    return convert(values, [currencies[t.upper().strip()] for t in tickers], to_currency, dates)
+
+
+def _on_sync(ticker: str, record: Optional[dict]):
+    _ticker_currencies.pop(ticker.upper().strip(), None)
+
+
+add_sync_listener(_on_sync)
@@ -1,14 +1,18 @@
 """
 GLM-4 Integration Engine — ZhipuAI prompt pipeline for AI analysis.
+
+The ZhipuAI SDK is synchronous, so every request runs on a dedicated thread
+pool. Streams are pumped from a worker thread into an asyncio queue, so a
+slow completion never blocks the event loop, and many chat streams share one
+worker process. The async entry points are `chat_completion_stream`,
+`chat_completion_async` and `generate_morning_brief_async`.
 """
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, AsyncGenerator
-
-try:
-    from zhipuai import ZhipuAI
-except ImportError:
-    ZhipuAI = None  # type: ignore
+from typing import Callable, Iterator, Optional, AsyncGenerator
 
 
 # System prompt for financial analysis
@@ -36,10 +40,21 @@ When discussing markets:
 """
 
 
+# A streaming completion holds its thread for the whole response, so size for concurrent chats
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="glm")
+_DONE = object()
+
+
 def _get_client() -> Optional[object]:
-    """Initialize ZhipuAI client if API key is available."""
+    """Initialize ZhipuAI client if API key is available (the SDK is imported on first use)."""
     api_key = os.getenv("ZHIPUAI_API_KEY")
-    if not api_key or ZhipuAI is None:
+    if not api_key:
+        return None
+    try:
+        from zhipuai import ZhipuAI
+    except ImportError:
         return None
     return ZhipuAI(api_key=api_key)
 
@@ -108,12 +123,71 @@ def chat_completion(
         return f"⚠️ GLM-4 analysis temporarily unavailable: {str(e)}"
 
 
+async def chat_completion_async(
+    user_message: str,
+    portfolio_context: Optional[dict] = None,
+    market_data: Optional[dict] = None,
+) -> str:
+    """`chat_completion` on the GLM thread pool, without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, chat_completion, user_message, portfolio_context, market_data)
+
+
+def _stream_chunks(client, messages: list[dict]) -> Iterator[str]:
+    """Blocking iterator over the text deltas of a streamed completion."""
+    response = client.chat.completions.create(
+        model="glm-4",
+        messages=messages,
+        temperature=0.7,
+        max_tokens=2048,
+        stream=True,
+    )
+    try:
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            close()
+
+
+def _pump(
+    chunks: Callable[[], Iterator],
+    loop: asyncio.AbstractEventLoop,
+    queue: asyncio.Queue,
+    stop: threading.Event,
+):
+    """Worker thread: push each item (or the raised error), then `_DONE`, onto the loop's queue."""
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:  # event loop already closed
+            stop.set()
+
+    try:
+        for item in chunks():
+            if stop.is_set():
+                break
+            put(item)
+    except Exception as e:
+        put(e)
+    finally:
+        put(_DONE)
+
+
 async def chat_completion_stream(
     user_message: str,
     portfolio_context: Optional[dict] = None,
     market_data: Optional[dict] = None,
 ) -> AsyncGenerator[str, None]:
-    """Stream chat completion from GLM-4."""
+    """
+    Stream chat completion from GLM-4.
+
+    The blocking SDK stream is read on the GLM thread pool and handed over
+    through an asyncio queue. If the consumer stops early (e.g. the client
+    disconnects), the worker stops reading at its next chunk.
+    """
     client = _get_client()
 
     if client is None:
@@ -123,20 +197,23 @@ async def chat_completion_stream(
             yield word + " "
         return
 
+    messages = build_analysis_prompt(user_message, portfolio_context, market_data)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    loop.run_in_executor(_executor, _pump, lambda: _stream_chunks(client, messages), loop, queue, stop)
+
     try:
-        messages = build_analysis_prompt(user_message, portfolio_context, market_data)
-        response = client.chat.completions.create(
-            model="glm-4",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=2048,
-            stream=True,
-        )
-        for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
-    except Exception as e:
-        yield f"⚠️ Streaming error: {str(e)}"
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                yield f"⚠️ Streaming error: {str(item)}"
+                break
+            yield item
+    finally:
+        stop.set()
 
 
 def generate_morning_brief(market_summary: Optional[str] = None) -> dict:
@@ -179,6 +256,12 @@ def generate_morning_brief(market_summary: Optional[str] = None) -> dict:
         return _generate_mock_brief()
 
 
+async def generate_morning_brief_async(market_summary: Optional[str] = None) -> dict:
+    """`generate_morning_brief` on the GLM thread pool, without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, generate_morning_brief, market_summary)
+
+
 def _generate_mock_response(user_message: str) -> str:
     """Generate a mock AI response when no API key is configured."""
     return (
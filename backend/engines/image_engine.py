@@ -0,0 +1,177 @@
+"""
+Image Engine — Static PNG/SVG rendering of viz_engine figures.
+
+Kaleido rendering is CPU-heavy and blocking, so it runs in a warm pool of
+worker processes: each worker loads plotly and kaleido and renders a blank
+figure once at startup, so the first real request does not pay the browser
+start-up cost. Rendered images are kept in a bounded LRU cache keyed on a
+digest of the figure payload plus format and size. A cached image is served
+without touching the pool, and concurrent requests for the same uncached
+image share one render.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "pdf": "application/pdf",
+}
+DEFAULT_WIDTH = 900
+DEFAULT_HEIGHT = 500
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_CACHE_MAX_ENTRIES = 256
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_cache_bytes = 0
+_inflight: dict[tuple, asyncio.Future] = {}
+_stats = {"hits": 0, "misses": 0, "renders": 0}
+
+
+def _warm_worker():
+    """Pool initializer: load plotly/kaleido and render once so the renderer is hot."""
+    try:
+        import plotly.io as pio
+
+        pio.to_image({"data": [], "layout": {}}, format="png", width=10, height=10, validate=False)
+    except Exception as e:  # the real render reports the error to the caller
+        logger.warning(f"Image worker warm-up failed: {e}")
+
+
+def _render(payload: bytes, fmt: str, width: int, height: int, scale: float) -> bytes:
+    """Worker-side render of a serialized figure payload."""
+    import json
+
+    import plotly.io as pio
+
+    return pio.to_image(json.loads(payload), format=fmt, width=width, height=height, scale=scale, validate=False)
+
+
+def start_image_pool(workers: int = IMAGE_WORKERS) -> ProcessPoolExecutor:
+    """Start (or return) the warm renderer pool."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(workers, 1), initializer=_warm_worker)
+        # Submitting no-ops makes the executor spawn (and warm) its workers now
+        for _ in range(max(workers, 1)):
+            _pool.submit(int)
+    return _pool
+
+
+def shutdown_image_pool():
+    """Stop the renderer pool; it restarts lazily on the next render."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _store(key: tuple, image: bytes):
+    global _cache_bytes
+    _cache[key] = image
+    _cache_bytes += len(image)
+    while len(_cache) > IMAGE_CACHE_MAX_ENTRIES or _cache_bytes > IMAGE_CACHE_MAX_BYTES:
+        _, evicted = _cache.popitem(last=False)
+        _cache_bytes -= len(evicted)
+
+
+def image_key(payload: bytes, fmt: str, width: int, height: int, scale: float) -> tuple:
+    """Cache key for a figure payload rendered at a given format and size."""
+    return (hashlib.blake2b(payload, digest_size=16).digest(), fmt, width, height, float(scale))
+
+
+def get_cached_image(key: tuple) -> Optional[bytes]:
+    """Cached image bytes for `key`, or None."""
+    image = _cache.get(key)
+    if image is not None:
+        _cache.move_to_end(key)
+    return image
+
+
+async def render_image(
+    payload: bytes,
+    fmt: str = "png",
+    width: int = DEFAULT_WIDTH,
+    height: int = DEFAULT_HEIGHT,
+    scale: float = 1.0,
+) -> bytes:
+    """
+    Render a serialized figure (as produced by `viz_engine.figure_payload`).
+
+    Served from the cache when possible; otherwise rendered in the warm
+    process pool without blocking the event loop.
+    """
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format '{fmt}'. Available: {list(IMAGE_FORMATS)}")
+
+    key = image_key(payload, fmt, width, height, scale)
+    image = get_cached_image(key)
+    if image is not None:
+        _stats["hits"] += 1
+        return image
+    _stats["misses"] += 1
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(start_image_pool(), _render, payload, fmt, width, height, scale)
+    _inflight[key] = future
+
+    def _done(f: asyncio.Future):
+        _inflight.pop(key, None)
+        if not f.cancelled() and f.exception() is None:
+            _stats["renders"] += 1
+            _store(key, f.result())
+
+    # Cache the result even if every waiting request has gone away
+    future.add_done_callback(_done)
+    return await asyncio.shield(future)
+
+
+def render_image_sync(
+    payload: bytes,
+    fmt: str = "png",
+    width: int = DEFAULT_WIDTH,
+    height: int = DEFAULT_HEIGHT,
+    scale: float = 1.0,
+) -> bytes:
+    """Blocking variant of `render_image` for scripts and background jobs."""
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format '{fmt}'. Available: {list(IMAGE_FORMATS)}")
+
+    key = image_key(payload, fmt, width, height, scale)
+    image = get_cached_image(key)
+    if image is not None:
+        _stats["hits"] += 1
+        return image
+    _stats["misses"] += 1
+    image = start_image_pool().submit(_render, payload, fmt, width, height, scale).result()
+    _stats["renders"] += 1
+    _store(key, image)
+    return image
+
+
+def clear_image_cache():
+    """Drop all cached images and reset the counters."""
+    global _cache_bytes
+    _cache.clear()
+    _cache_bytes = 0
+    _stats.update(hits=0, misses=0, renders=0)
+
+
+def get_image_cache_stats() -> dict:
+    """Image cache size and hit/miss/render counters."""
+    return {"entries": len(_cache), "bytes": _cache_bytes, "pool_running": _pool is not None, **_stats}
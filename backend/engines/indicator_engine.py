@@ -0,0 +1,402 @@
+"""
+Indicator Engine — Technical indicators computed for many tickers at once.
+
+Every indicator works on (tickers × bars) arrays along the last axis, so the
+whole synced universe is one vectorized pass. Windowed indicators (SMA,
+Bollinger Bands, rolling VWAP) use cumulative sums; smoothed ones (EMA, RSI,
+MACD, ATR) run a recursive filter over the bar axis for all rows together.
+Leading NaN is treated as "no history yet", so rows of different lengths can
+share one array.
+
+`compute_indicator` caches each (ticker, indicator, params) series together
+with the filter state and the last input bars it needs. When new bars arrive
+only those bars are computed and appended; if earlier history changed (e.g.
+a re-sync with adjusted prices) the series is rebuilt.
+"""
+import inspect
+import math
+from collections import OrderedDict
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from engines.admin_data_engine import get_synced_data
+
+ArrayLike = Union[list[float], np.ndarray]
+
+MAX_CACHE_ENTRIES = 4096
+
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+
+# ===== Array helpers =====
+
+def _as_2d(values: ArrayLike) -> tuple[np.ndarray, bool]:
+    arr = np.asarray(values, dtype=float)
+    return (arr[np.newaxis, :], True) if arr.ndim == 1 else (arr, False)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums along the last axis (NaN unless the whole window is finite)."""
+    out = np.full(values.shape, np.nan)
+    if window < 1 or values.shape[-1] < window:
+        return out
+    pad = np.zeros(values.shape[:-1] + (1,))
+    csum = np.concatenate((pad, np.cumsum(np.nan_to_num(values), axis=-1)), axis=-1)
+    count = np.concatenate((pad, np.cumsum(np.isfinite(values), axis=-1)), axis=-1)
+    sums = csum[..., window:] - csum[..., :-window]
+    full = (count[..., window:] - count[..., :-window]) == window
+    out[..., window - 1:] = np.where(full, sums, np.nan)
+    return out
+
+
+def _ewm(
+    values: np.ndarray,
+    alpha: float,
+    min_periods: int,
+    state: dict,
+    key: str,
+    skip: int = 0,
+) -> np.ndarray:
+    """
+    Exponential smoothing y_t = y_{t-1} + alpha·(x_t - y_{t-1}) over columns `skip:`.
+
+    Each row starts at its first finite value; NaN bars leave the running
+    value untouched. The running value and observation count are read from
+    and written back to `state[key]` / `state[key + "_n"]`.
+    """
+    rows, n_bars = values.shape
+    prev = state.get(key, np.full(rows, np.nan)).copy()
+    count = state.get(key + "_n", np.zeros(rows)).copy()
+    out = np.full(values.shape, np.nan)
+    for t in range(skip, n_bars):
+        col = values[:, t]
+        valid = np.isfinite(col)
+        if not valid.any():
+            continue
+        stepped = np.where(count > 0, prev + alpha * (col - prev), col)
+        prev = np.where(valid, stepped, prev)
+        count += valid
+        out[:, t] = np.where(valid & (count >= min_periods), prev, np.nan)
+    state[key] = prev
+    state[key + "_n"] = count
+    return out
+
+
+# ===== Indicator kernels =====
+# Each kernel maps input fields to output series. `state` carries recursive
+# filter values between calls; when extending, the first `skip` bars are
+# history that is already folded into `state`.
+
+def _sma_kernel(inputs: dict, state: dict, skip: int, window: int = 20) -> dict:
+    return {"sma": _rolling_sum(inputs["close"], window) / window}
+
+
+def _ema_kernel(inputs: dict, state: dict, skip: int, span: int = 20) -> dict:
+    return {"ema": _ewm(inputs["close"], 2 / (span + 1), span, state, "ema", skip)}
+
+
+def _rsi_kernel(inputs: dict, state: dict, skip: int, period: int = 14) -> dict:
+    close = inputs["close"]
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    finite = np.isfinite(delta)
+    gain = np.where(finite, np.maximum(delta, 0.0), np.nan)
+    loss = np.where(finite, np.maximum(-delta, 0.0), np.nan)
+    # Wilder smoothing is an EMA with alpha = 1 / period
+    avg_gain = _ewm(gain, 1 / period, period, state, "gain", skip)
+    avg_loss = _ewm(loss, 1 / period, period, state, "loss", skip)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, rsi)
+    rsi = np.where((avg_loss == 0) & (avg_gain == 0), 50.0, rsi)
+    return {"rsi": rsi}
+
+
+def _macd_kernel(inputs: dict, state: dict, skip: int, fast: int = 12, slow: int = 26, signal: int = 9) -> dict:
+    if fast >= slow:
+        raise ValueError("MACD fast period must be shorter than slow period")
+    close = inputs["close"]
+    fast_ema = _ewm(close, 2 / (fast + 1), fast, state, "fast", skip)
+    slow_ema = _ewm(close, 2 / (slow + 1), slow, state, "slow", skip)
+    line = fast_ema - slow_ema
+    signal_line = _ewm(line, 2 / (signal + 1), signal, state, "signal", skip)
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def _bollinger_kernel(inputs: dict, state: dict, skip: int, window: int = 20, num_std: float = 2.0) -> dict:
+    close = inputs["close"]
+    # Center each row before summing squares to limit cancellation
+    finite = np.isfinite(close)
+    n_finite = finite.sum(axis=1, keepdims=True)
+    offset = np.where(n_finite > 0, np.nansum(close, axis=1, keepdims=True) / np.maximum(n_finite, 1), 0.0)
+    centered = close - offset
+    s1 = _rolling_sum(centered, window)
+    s2 = _rolling_sum(centered ** 2, window)
+    middle = s1 / window + offset
+    std = np.sqrt(np.maximum(s2 / window - (s1 / window) ** 2, 0.0))
+    return {"middle": middle, "upper": middle + num_std * std, "lower": middle - num_std * std}
+
+
+def _atr_kernel(inputs: dict, state: dict, skip: int, period: int = 14) -> dict:
+    high, low, close = inputs["high"], inputs["low"], inputs["close"]
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[:, 1:] = close[:, :-1]
+    # fmax ignores the missing previous close on a row's first bar
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return {"atr": _ewm(true_range, 1 / period, period, state, "atr", skip)}
+
+
+def _vwap_kernel(inputs: dict, state: dict, skip: int, window: Optional[int] = None) -> dict:
+    typical = (inputs["high"] + inputs["low"] + inputs["close"]) / 3
+    volume = inputs["volume"]
+    pv = typical * volume
+    if window:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {"vwap": _rolling_sum(pv, window) / _rolling_sum(volume, window)}
+
+    # Cumulative VWAP anchored at each row's first bar
+    rows = pv.shape[0]
+    valid = np.isfinite(pv) & np.isfinite(volume)
+    valid[:, :skip] = False
+    cum_pv = np.cumsum(np.where(valid, pv, 0.0), axis=1) + state.get("pv", np.zeros(rows))[:, None]
+    cum_v = np.cumsum(np.where(valid, volume, 0.0), axis=1) + state.get("volume", np.zeros(rows))[:, None]
+    state["pv"] = cum_pv[:, -1].copy()
+    state["volume"] = cum_v[:, -1].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"vwap": np.where(valid & (cum_v > 0), cum_pv / cum_v, np.nan)}
+
+
+# name -> (input fields, kernel, lookback bars needed before the first new bar)
+INDICATORS: dict[str, tuple[tuple[str, ...], Callable, Callable[[dict], int]]] = {
+    "sma": (("close",), _sma_kernel, lambda p: p["window"] - 1),
+    "ema": (("close",), _ema_kernel, lambda p: 0),
+    "rsi": (("close",), _rsi_kernel, lambda p: 1),
+    "macd": (("close",), _macd_kernel, lambda p: 0),
+    "bollinger": (("close",), _bollinger_kernel, lambda p: p["window"] - 1),
+    "atr": (("high", "low", "close"), _atr_kernel, lambda p: 1),
+    "vwap": (("high", "low", "close", "volume"), _vwap_kernel, lambda p: (p["window"] or 1) - 1),
+}
+
+
+def _run(name: str, arrays: dict[str, ArrayLike], **params) -> dict[str, np.ndarray]:
+    fields, kernel, _ = INDICATORS[name]
+    inputs, was_1d = {}, False
+    for field in fields:
+        inputs[field], was_1d = _as_2d(arrays[field])
+    outputs = kernel(inputs, {}, 0, **params)
+    return {k: v[0] if was_1d else v for k, v in outputs.items()}
+
+
+# ===== Array API =====
+
+def sma(close: ArrayLike, window: int = 20) -> np.ndarray:
+    """Simple moving average (NaN until a full window of prices)."""
+    return _run("sma", {"close": close}, window=window)["sma"]
+
+
+def ema(close: ArrayLike, span: int = 20) -> np.ndarray:
+    """Exponential moving average with alpha = 2 / (span + 1), seeded at the first price."""
+    return _run("ema", {"close": close}, span=span)["ema"]
+
+
+def rsi(close: ArrayLike, period: int = 14) -> np.ndarray:
+    """Relative Strength Index (0–100) with Wilder smoothing."""
+    return _run("rsi", {"close": close}, period=period)["rsi"]
+
+
+def macd(close: ArrayLike, fast: int = 12, slow: int = 26, signal: int = 9) -> dict[str, np.ndarray]:
+    """MACD line, signal line and histogram."""
+    return _run("macd", {"close": close}, fast=fast, slow=slow, signal=signal)
+
+
+def bollinger_bands(close: ArrayLike, window: int = 20, num_std: float = 2.0) -> dict[str, np.ndarray]:
+    """Middle (SMA), upper and lower Bollinger Bands."""
+    return _run("bollinger", {"close": close}, window=window, num_std=num_std)
+
+
+def atr(high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing."""
+    return _run("atr", {"high": high, "low": low, "close": close}, period=period)["atr"]
+
+
+def vwap(
+    high: ArrayLike,
+    low: ArrayLike,
+    close: ArrayLike,
+    volume: ArrayLike,
+    window: Optional[int] = None,
+) -> np.ndarray:
+    """Volume-weighted average typical price, cumulative or over a trailing window."""
+    arrays = {"high": high, "low": low, "close": close, "volume": volume}
+    return _run("vwap", arrays, window=window)["vwap"]
+
+
+# ===== Cached series for synced tickers =====
+
+def _load_bars(tickers: list[str], fields: tuple[str, ...]) -> dict[str, tuple[list[str], dict[str, np.ndarray]]]:
+    """Each ticker's own bars (dates, field arrays), skipping bars with missing fields."""
+    bars = {}
+    for ticker in tickers:
+        data = get_synced_data(ticker)
+        if not data or not data.get("ohlcv"):
+            continue
+        rows = [b for b in data["ohlcv"] if all(b.get(f) is not None for f in fields)]
+        if not rows:
+            continue
+        bars[data.get("ticker", ticker.upper().strip())] = (
+            [b["date"] for b in rows],
+            {f: np.array([b[f] for b in rows], dtype=float) for f in fields},
+        )
+    return bars
+
+
+def _stack(segments: list[dict[str, np.ndarray]], fields: tuple[str, ...]) -> dict[str, np.ndarray]:
+    """Left-align ragged per-ticker inputs into (tickers × bars) arrays padded with NaN."""
+    width = max(len(seg[fields[0]]) for seg in segments)
+    stacked = {}
+    for field in fields:
+        arr = np.full((len(segments), width), np.nan)
+        for row, seg in enumerate(segments):
+            arr[row, :len(seg[field])] = seg[field]
+        stacked[field] = arr
+    return stacked
+
+
+def _cached_prefix(entry: Optional[dict], dates: list[str], inputs: dict[str, np.ndarray]) -> int:
+    """Number of leading bars still covered by a cached entry (0 if it is stale)."""
+    if entry is None:
+        return 0
+    n_cached = len(entry["dates"])
+    if n_cached > len(dates) or dates[0] != entry["dates"][0] or dates[n_cached - 1] != entry["dates"][-1]:
+        return 0
+    for field, tail in entry["tail"].items():
+        if not np.array_equal(inputs[field][n_cached - tail.size:n_cached], tail, equal_nan=True):
+            return 0
+    return n_cached
+
+
+def _history(tail: np.ndarray, lookback: int) -> np.ndarray:
+    """The last `lookback` cached input bars, NaN-padded in front for short series."""
+    part = tail[-lookback:] if lookback else tail[:0]
+    return np.concatenate((np.full(lookback - part.size, np.nan), part))
+
+
+def _store(key: tuple, entry: dict):
+    _cache[key] = entry
+    _cache.move_to_end(key)
+    while len(_cache) > MAX_CACHE_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def compute_indicator(
+    tickers: list[str],
+    indicator: str,
+    params: Optional[dict] = None,
+) -> dict[str, dict]:
+    """
+    Indicator series for synced tickers, keyed by ticker.
+
+    Each value holds `dates` and one array per indicator output, aligned with
+    that ticker's own bars. Fresh tickers are computed in one batch, cached
+    tickers with new bars are extended in a second batch from their saved
+    filter state, and up-to-date tickers are served from the cache.
+    """
+    if indicator not in INDICATORS:
+        raise ValueError(f"Unknown indicator '{indicator}'. Available: {list(INDICATORS)}")
+    fields, kernel, lookback_of = INDICATORS[indicator]
+    signature = inspect.signature(kernel).parameters
+    unknown = set(params or {}) - set(list(signature)[3:])
+    if unknown:
+        raise ValueError(f"Unknown parameters for '{indicator}': {sorted(unknown)}")
+    # Fill defaults so equivalent requests share one cache entry
+    params = {name: (params or {}).get(name, p.default) for name, p in list(signature.items())[3:]}
+    # Windows arrive as floats from JSON bodies
+    params = {k: int(v) if isinstance(v, float) and v.is_integer() else v for k, v in params.items()}
+    lookback = lookback_of(params)
+    if lookback < 0 or any(isinstance(v, (int, float)) and v <= 0 for v in params.values()):
+        raise ValueError("Indicator windows and periods must be positive")
+    param_key = tuple(sorted(params.items()))
+
+    bars = _load_bars(tickers, fields)
+    fresh, stale = [], []
+    for ticker, (dates, inputs) in bars.items():
+        key = (ticker, indicator, param_key)
+        n_cached = _cached_prefix(_cache.get(key), dates, inputs)
+        if n_cached == 0:
+            fresh.append(ticker)
+        elif n_cached < len(dates):
+            stale.append((ticker, n_cached))
+        else:
+            _cache.move_to_end(key)
+
+    tail_len = max(lookback, 1)
+
+    def save(ticker: str, outputs: dict[str, np.ndarray], state: dict[str, float]):
+        dates, inputs = bars[ticker]
+        _store((ticker, indicator, param_key), {
+            "dates": dates,
+            "outputs": outputs,
+            "state": state,
+            "tail": {f: inputs[f][-tail_len:].copy() for f in fields},
+        })
+
+    if fresh:
+        state: dict[str, np.ndarray] = {}
+        outputs = kernel(_stack([bars[t][1] for t in fresh], fields), state, 0, **params)
+        for row, ticker in enumerate(fresh):
+            n = len(bars[ticker][0])
+            save(ticker, {k: v[row, :n].copy() for k, v in outputs.items()},
+                 {k: float(v[row]) for k, v in state.items()})
+
+    if stale:
+        # Recompute only the new bars, prefixed by the `lookback` bars their windows need
+        entries = [_cache[(t, indicator, param_key)] for t, _ in stale]
+        segments = [
+            {f: np.concatenate((_history(entry["tail"][f], lookback), bars[t][1][f][n_cached:])) for f in fields}
+            for (t, n_cached), entry in zip(stale, entries)
+        ]
+        state = {k: np.array([entry["state"][k] for entry in entries]) for k in entries[0]["state"]}
+        outputs = kernel(_stack(segments, fields), state, lookback, **params)
+        for row, ((ticker, n_cached), entry) in enumerate(zip(stale, entries)):
+            n_new = len(bars[ticker][0]) - n_cached
+            save(ticker, {
+                k: np.concatenate((entry["outputs"][k], v[row, lookback:lookback + n_new]))
+                for k, v in outputs.items()
+            }, {k: float(v[row]) for k, v in state.items()})
+
+    return {
+        ticker: {"dates": _cache[(ticker, indicator, param_key)]["dates"],
+                 **_cache[(ticker, indicator, param_key)]["outputs"]}
+        for ticker in bars
+    }
+
+
+def get_indicator_series(
+    tickers: list[str],
+    indicator: str,
+    params: Optional[dict] = None,
+    last_n: Optional[int] = None,
+) -> dict[str, dict]:
+    """JSON-ready indicator series (NaN as None), optionally only the last `last_n` bars."""
+    series = compute_indicator(tickers, indicator, params)
+    result = {}
+    for ticker, values in series.items():
+        start = -last_n if last_n else 0
+        result[ticker] = {
+            key: list(vals[start:]) if key == "dates" else [
+                round(float(x), 4) if math.isfinite(x) else None for x in vals[start:]
+            ]
+            for key, vals in values.items()
+        }
+    return result
+
+
+def clear_indicator_cache(ticker: Optional[str] = None):
+    """Drop cached indicator series for one ticker, or for all tickers."""
+    if ticker is None:
+        _cache.clear()
+        return
+    ticker = ticker.upper().strip()
+    for key in [k for k in _cache if k[0] == ticker]:
+        del _cache[key]
@@ -0,0 +1,295 @@
+"""
+Ledger Engine — Rebuild portfolio history by replaying its ledger.
+
+A portfolio's `transactions` (buy / sell / dividend / deposit / withdrawal /
+fee) and `dividends` are replayed against daily closes to produce, for every date,
+the shares held, cash, market value, realized and unrealized P/L and the
+equity curve. Deposits and withdrawals are external flows: they move equity
+but not performance, so the replay also reports daily P/L net of flows and
+time-weighted returns for risk and return metrics.
+
+Daily series are built with scatter-adds and cumulative sums over the
+(symbols × dates) grid, so the cost grows with the number of trades plus the
+size of the grid rather than trades × days. Average-cost bookkeeping is a
+single pass over the trades themselves.
+
+With a `base_currency`, closes are converted row by row and ledger amounts
+event by event through the FX rate matrix at each date's rate, so a
+mixed-currency portfolio is valued in one currency.
+"""
+from datetime import date, datetime
+from typing import Any, Optional
+
+import numpy as np
+
+from engines.fx_engine import convert, convert_each
+
+BUY_TYPES = ("buy",)
+SELL_TYPES = ("sell",)
+DIVIDEND_TYPES = ("dividend",)
+CASH_IN_TYPES = ("deposit",)
+CASH_OUT_TYPES = ("withdrawal", "fee")
+# Cash moved in or out by the owner; fees are a cost of the portfolio itself
+EXTERNAL_FLOW_TYPES = ("deposit", "withdrawal")
+
+
+def _day(value: Any) -> str:
+    """Normalize a date, datetime or ISO string to YYYY-MM-DD."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last finite value forward along the date axis."""
+    finite = np.isfinite(values)
+    idx = np.where(finite, np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    filled = np.take_along_axis(values, idx, axis=-1)
+    # Before a row's first finite value there is nothing to carry
+    return np.where(np.maximum.accumulate(finite, axis=-1), filled, np.nan)
+
+
+def time_weighted_returns(equity: np.ndarray, flows: np.ndarray, start_value: float = 0.0) -> np.ndarray:
+    """
+    Daily returns of an equity curve with external cash flows taken out.
+
+    Flows are booked at the end of their day, so day t returns
+    (equity[t] - flows[t]) / equity[t-1] - 1, with `start_value` as the
+    equity before the first day. A day starting from no equity returns 0.
+    """
+    equity = np.asarray(equity, dtype=float)
+    prev = np.concatenate(([start_value], equity[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prev > 0, (equity - flows) / prev - 1, 0.0)
+
+
+def closes_from_rows(rows: list[dict]) -> tuple[list[str], list[str], np.ndarray]:
+    """Pivot `market_data` rows (symbol, date, close) into (dates, symbols, closes[symbols × dates])."""
+    symbols = sorted({r["symbol"] for r in rows})
+    dates = sorted({_day(r["date"]) for r in rows})
+    sym_index = {s: i for i, s in enumerate(symbols)}
+    date_index = {d: i for i, d in enumerate(dates)}
+    closes = np.full((len(symbols), len(dates)), np.nan)
+    for r in rows:
+        if r["close"] is not None:
+            closes[sym_index[r["symbol"]], date_index[_day(r["date"])]] = float(r["close"])
+    return dates, symbols, closes
+
+
+def _to_base_currency(
+    txns: list[dict],
+    dividends: list[dict],
+    dates: list[str],
+    symbols: list[str],
+    closes: np.ndarray,
+    base_currency: str,
+    price_currencies: dict[str, str],
+) -> tuple[list[dict], list[dict], np.ndarray]:
+    """Restate ledger events and closes in `base_currency` at each date's FX rate."""
+    txn_currency = {t["symbol"]: t.get("currency") for t in txns if t.get("symbol")}
+    if len(dates) and len(symbols):
+        row_currencies = [price_currencies.get(s) or txn_currency.get(s) or base_currency for s in symbols]
+        closes = convert(closes, row_currencies, base_currency, dates)
+
+    if txns:
+        factors = convert_each(
+            np.ones(len(txns)),
+            [t.get("currency") or base_currency for t in txns],
+            [_day(t["executed_at"]) for t in txns],
+            base_currency,
+        )
+        txns = [
+            {
+                **t,
+                **{k: float(t[k] or 0) * f for k in ("price", "total_amount", "commission") if k in t},
+                "currency": base_currency,
+            }
+            for t, f in zip(txns, factors)
+        ]
+    if dividends:
+        received = convert_each(
+            [float(d["total_received"]) for d in dividends],
+            [d.get("currency") or base_currency for d in dividends],
+            [_day(d["payment_date"]) for d in dividends],
+            base_currency,
+        )
+        dividends = [{**d, "total_received": r, "currency": base_currency} for d, r in zip(dividends, received)]
+    return txns, dividends, closes
+
+
+def replay_ledger(
+    transactions: list[dict],
+    dates: list[str],
+    symbols: list[str],
+    closes: np.ndarray,
+    dividends: Optional[list[dict]] = None,
+    initial_capital: float = 0.0,
+    base_currency: Optional[str] = None,
+    price_currencies: Optional[dict[str, str]] = None,
+) -> dict:
+    """
+    Replay a transaction and dividend ledger against daily closes.
+
+    `closes` is (symbols × dates) with NaN where a symbol has no bar; prices
+    are carried forward across gaps, and a trade's own price is used when
+    the symbol has no close yet. Ledger events on non-trading days get their
+    own date. Trades are booked at the end of their day with average-cost
+    accounting; commissions are added to the cost of buys and deducted from
+    the proceeds of sells. Selling more than is held raises ValueError.
+
+    When `base_currency` is given, every amount is valued in it: closes are
+    quoted in `price_currencies[symbol]` (falling back to the currency of
+    the symbol's transactions), and each transaction and dividend in its
+    own `currency` column, converted at that day's FX rate.
+
+    Besides the equity curve, the result carries `external_flows` (deposits
+    minus withdrawals per day), `daily_pnl` net of those flows, and
+    time-weighted daily `returns` with their growth index `performance`
+    (1.0 = the starting value), which risk and return metrics should use.
+
+    A `dividend` transaction is booked as dividend income, unless the
+    `dividends` table already records a payment for that symbol on that
+    day, so the same payment is never counted twice.
+    """
+    dividends = dividends or []
+    txns = sorted(transactions, key=lambda t: (_day(t["executed_at"]), t.get("id") or 0))
+    if base_currency:
+        txns, dividends, closes = _to_base_currency(
+            txns, dividends, dates, symbols, closes, base_currency, price_currencies or {}
+        )
+
+    # Date axis: market dates plus any ledger dates, from the first ledger event on
+    event_days = [_day(t["executed_at"]) for t in txns] + [_day(d["payment_date"]) for d in dividends]
+    if not event_days:
+        empty = np.array([])
+        return {"dates": [], "symbols": [], "equity": empty, "returns": empty, "performance": empty, "positions": []}
+    start = min(event_days)
+    axis = sorted({d for d in dates if d >= start} | set(event_days))
+    day_index = {d: i for i, d in enumerate(axis)}
+    n_days = len(axis)
+
+    names = sorted(set(symbols) | {t["symbol"] for t in txns if t.get("symbol")})
+    sym_index = {s: i for i, s in enumerate(names)}
+    n_syms = len(names)
+
+    prices = np.full((n_syms, n_days), np.nan)
+    if len(dates):
+        src_cols = [i for i, d in enumerate(dates) if d in day_index]
+        dst_cols = [day_index[dates[i]] for i in src_cols]
+        for row, sym in enumerate(symbols):
+            prices[sym_index[sym], dst_cols] = closes[row, src_cols]
+
+    finite = np.isfinite(prices)
+    first_close = np.where(finite.any(axis=1), finite.argmax(axis=1), n_days)
+
+    share_delta = np.zeros((n_syms, n_days))
+    cash_flow = np.zeros(n_days)
+    external_flow = np.zeros(n_days)
+    realized = np.zeros(n_days)
+    basis_events = np.full((n_syms, n_days), np.nan)
+    held = np.zeros(n_syms)
+    cost = np.zeros(n_syms)
+    realized_by_symbol = np.zeros(n_syms)
+
+    dividend_cash = np.zeros(n_days)
+    for d in dividends:
+        dividend_cash[day_index[_day(d["payment_date"])]] += float(d["total_received"])
+    dividend_days = {(str(d["symbol"]).upper(), _day(d["payment_date"])) for d in dividends}
+
+    for t in txns:
+        kind = str(t["transaction_type"]).lower()
+        day = day_index[_day(t["executed_at"])]
+        commission = float(t.get("commission") or 0)
+
+        if kind in DIVIDEND_TYPES:
+            if (str(t.get("symbol") or "").upper(), axis[day]) not in dividend_days:
+                dividend_cash[day] += abs(float(t.get("total_amount") or 0)) - commission
+            continue
+        if kind in CASH_IN_TYPES or kind in CASH_OUT_TYPES:
+            amount = float(t.get("total_amount") or 0)
+            amount = amount if kind in CASH_IN_TYPES else -abs(amount)
+            cash_flow[day] += amount
+            if kind in EXTERNAL_FLOW_TYPES:
+                external_flow[day] += amount
+            continue
+        if kind not in BUY_TYPES and kind not in SELL_TYPES:
+            raise ValueError(f"Unknown transaction type '{t['transaction_type']}'")
+
+        s = sym_index[t["symbol"]]
+        shares = abs(float(t["shares"]))
+        price = float(t["price"])
+        if day < first_close[s]:
+            prices[s, day] = price
+
+        if kind in BUY_TYPES:
+            held[s] += shares
+            cost[s] += shares * price + commission
+            share_delta[s, day] += shares
+            cash_flow[day] -= shares * price + commission
+        else:
+            if shares > held[s] + 1e-9:
+                raise ValueError(f"Sell of {shares} {t['symbol']} exceeds {held[s]} shares held")
+            avg_cost = cost[s] / held[s] if held[s] else 0.0
+            gain = shares * (price - avg_cost) - commission
+            realized[day] += gain
+            realized_by_symbol[s] += gain
+            cost[s] -= avg_cost * shares
+            held[s] -= shares
+            if held[s] < 1e-9:
+                held[s], cost[s] = 0.0, 0.0
+            share_delta[s, day] -= shares
+            cash_flow[day] += shares * price - commission
+        basis_events[s, day] = cost[s]
+
+    shares = np.cumsum(share_delta, axis=1)
+    shares[np.abs(shares) < 1e-9] = 0.0
+    prices = forward_fill(prices)
+    position_values = np.where(shares != 0, shares * np.nan_to_num(prices), 0.0)
+    cost_basis = np.nan_to_num(forward_fill(basis_events))
+
+    market_value = position_values.sum(axis=0)
+    cash = initial_capital + np.cumsum(cash_flow + dividend_cash)
+    equity = cash + market_value
+    returns = time_weighted_returns(equity, external_flow, initial_capital)
+    prev_equity = np.concatenate(([initial_capital], equity[:-1]))
+    unrealized = (position_values - cost_basis).sum(axis=0)
+
+    last_prices = prices[:, -1]
+    positions = []
+    for s, sym in enumerate(names):
+        if held[s] == 0 and realized_by_symbol[s] == 0:
+            continue
+        value = float(position_values[s, -1])
+        pnl = value - cost[s]
+        positions.append({
+            "symbol": sym,
+            "shares": float(held[s]),
+            "average_cost": float(cost[s] / held[s]) if held[s] else 0.0,
+            "current_price": float(last_prices[s]) if np.isfinite(last_prices[s]) else None,
+            "market_value": value,
+            "cost_basis": float(cost[s]),
+            "unrealized_pnl": float(pnl),
+            "unrealized_pnl_percent": float(pnl / cost[s] * 100) if cost[s] else 0.0,
+            "realized_pnl": float(realized_by_symbol[s]),
+            "is_active": bool(held[s] > 0),
+        })
+
+    return {
+        "dates": axis,
+        "symbols": names,
+        "shares": shares,
+        "position_values": position_values,
+        "cash": cash,
+        "market_value": market_value,
+        "equity": equity,
+        "external_flows": external_flow,
+        "net_contributions": initial_capital + np.cumsum(external_flow),
+        "daily_pnl": equity - prev_equity - external_flow,
+        "returns": returns,
+        "performance": np.cumprod(1 + returns),
+        "realized_pnl": np.cumsum(realized),
+        "unrealized_pnl": unrealized,
+        "dividends": np.cumsum(dividend_cash),
+        "positions": positions,
+    }
@@ -0,0 +1,136 @@
+"""
+Memo Engine — Bounded memoization for pure analytics on equity curves.
+
+`memoized(func, *args, **kwargs)` caches the result of a pure `quant_engine`
+style function. The key is the function plus a content fingerprint of every
+argument (a BLAKE2 digest of the raw bytes for arrays and lists), so a curve
+that changes in any bar maps to a new entry and stale results are never
+served. Entries can also carry tags (e.g. a portfolio id or the tickers it
+holds) so everything derived from a portfolio can be dropped when its
+transactions change; tags matching a synced ticker are dropped automatically
+on every sync.
+
+The cache is shared by the event loop and executor threads, so every
+lookup, insert and eviction holds a lock; the wrapped function itself runs
+outside it.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+from engines.admin_data_engine import add_sync_listener
+
+MAX_CACHE_ENTRIES = 1024
+
+_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+_tags: dict[str, set[tuple]] = {}
+_stats = {"hits": 0, "misses": 0}
+_lock = threading.Lock()
+_MISSING = object()
+
+
+def fingerprint(value: Any) -> Any:
+    """Cheap hashable stand-in for an argument; arrays and lists are digested."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        if isinstance(value, np.ndarray) or (value and not isinstance(value[0], str)):
+            try:
+                arr = np.ascontiguousarray(value, dtype=float)
+                return ("array", arr.shape, hashlib.blake2b(arr.tobytes(), digest_size=16).digest())
+            except (TypeError, ValueError):
+                pass
+        joined = "\x1f".join(map(str, value)).encode()
+        return ("seq", len(value), hashlib.blake2b(joined, digest_size=16).digest())
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted((k, fingerprint(v)) for k, v in value.items()))
+    return value
+
+
+def _freeze(result: Any) -> Any:
+    """Make cached arrays read-only so callers cannot corrupt shared results."""
+    if isinstance(result, np.ndarray):
+        result.flags.writeable = False
+    elif isinstance(result, dict):
+        for value in result.values():
+            _freeze(value)
+    return result
+
+
+def _evict(key: tuple):
+    """Remove one entry and its tag references (caller holds `_lock`)."""
+    _cache.pop(key, None)
+    for tag in key[-1]:
+        keys = _tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _tags[tag]
+
+
+def memoized(func: Callable, *args, tags: Iterable[str] = (), **kwargs) -> Any:
+    """
+    Call `func(*args, **kwargs)` through the bounded cache.
+
+    Dict results are returned as shallow copies, so callers may add or
+    round keys without affecting the cached entry.
+    """
+    tag_set = frozenset(tags)
+    key = (
+        func.__module__,
+        func.__qualname__,
+        tuple(fingerprint(a) for a in args),
+        tuple(sorted((k, fingerprint(v)) for k, v in kwargs.items())),
+        tag_set,
+    )
+    with _lock:
+        result = _cache.get(key, _MISSING)
+        if result is not _MISSING:
+            _stats["hits"] += 1
+            _cache.move_to_end(key)
+        else:
+            _stats["misses"] += 1
+
+    if result is _MISSING:
+        # Computed without the lock; concurrent misses on one key just store the same result twice
+        result = _freeze(func(*args, **kwargs))
+        with _lock:
+            _cache[key] = result
+            _cache.move_to_end(key)
+            for tag in tag_set:
+                _tags.setdefault(tag, set()).add(key)
+            while len(_cache) > MAX_CACHE_ENTRIES:
+                _evict(next(iter(_cache)))
+
+    return dict(result) if isinstance(result, dict) else result
+
+
+def invalidate(tag: str) -> int:
+    """Drop every cached result carrying `tag`. Returns the number removed."""
+    with _lock:
+        keys = list(_tags.get(tag, ()))
+        for key in keys:
+            _evict(key)
+    return len(keys)
+
+
+def clear_memo_cache():
+    """Drop all cached results and reset the hit counters."""
+    with _lock:
+        _cache.clear()
+        _tags.clear()
+        _stats.update(hits=0, misses=0)
+
+
+def get_memo_stats() -> dict:
+    """Cache size and hit/miss counters."""
+    with _lock:
+        return {"entries": len(_cache), "tags": len(_tags), **_stats}
+
+
+def _on_sync(ticker: str, record):
+    invalidate(ticker.upper().strip())
+
+
+add_sync_listener(_on_sync)
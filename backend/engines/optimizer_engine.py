@@ -0,0 +1,536 @@
+"""
+Optimizer Engine — Mean-variance portfolio construction under risk limits.
+
+Objectives: minimum variance, maximum Sharpe, target return and risk parity.
+Long-only weights are bounded by `max_position_size` and per-sector sums by
+`max_sector_exposure` (the `risk_limits` system setting).
+
+All quadratic programs go through one ADMM solver (OSQP-style splitting) that
+factorizes the KKT matrix once and iterates on a (assets × problems) block,
+so the whole efficient frontier is a single batched solve instead of a loop
+over target returns.
+"""
+from typing import Optional
+
+import numpy as np
+
+from engines.admin_data_engine import get_synced_data
+from engines.covariance_engine import get_aligned_returns, get_covariance
+
+# Used when the `risk_limits` system setting is missing a key; mirrors the
+# values seeded by db/init_db.py
+DEFAULT_RISK_LIMITS = {
+    "max_position_size": 0.10,
+    "max_sector_exposure": 0.30,
+}
+
+OBJECTIVES = ("min_variance", "max_sharpe", "target_return", "risk_parity")
+PERIODS_PER_YEAR = 252
+# Largest constraint violation or return shortfall accepted from a target-return solve
+TARGET_TOLERANCE = 1e-3
+
+
+# ===== Batched QP solver =====
+
+def _polish(
+    P: np.ndarray,
+    q: np.ndarray,
+    A: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    x_lower: np.ndarray,
+    x_upper: np.ndarray,
+    low_rows: np.ndarray,
+    up_rows: np.ndarray,
+    low_x: np.ndarray,
+    up_x: np.ndarray,
+    delta: float = 1e-10,
+) -> Optional[np.ndarray]:
+    """Solve the equality-constrained QP on a guessed active set (OSQP-style polishing)."""
+    fixed = low_x | up_x
+    x = np.where(low_x, x_lower, np.where(up_x, x_upper, 0.0))
+    free = ~fixed
+    rows = low_rows | up_rows
+    bound = np.where(low_rows, lower, upper)[rows]
+    A_r = A[rows][:, free]
+    n_free, n_rows = int(free.sum()), int(rows.sum())
+
+    kkt = np.zeros((n_free + n_rows, n_free + n_rows))
+    kkt[:n_free, :n_free] = P[np.ix_(free, free)] + delta * np.eye(n_free)
+    kkt[:n_free, n_free:] = A_r.T
+    kkt[n_free:, :n_free] = A_r
+    kkt[n_free:, n_free:] = -delta * np.eye(n_rows)
+    rhs = np.concatenate((-q[free] - P[np.ix_(free, fixed)] @ x[fixed], bound - A[rows][:, fixed] @ x[fixed]))
+    try:
+        solution = np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        return None
+    x[free] = solution[:n_free]
+    return x
+
+
+def _solve_qp(
+    P: np.ndarray,
+    q: np.ndarray,
+    A: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    x_lower: np.ndarray,
+    x_upper: np.ndarray,
+    rho: float = 0.1,
+    sigma: float = 1e-6,
+    alpha: float = 1.6,
+    max_iter: int = 4000,
+    eps_abs: float = 1e-5,
+    eps_rel: float = 1e-5,
+    check_every: int = 25,
+    polish_tol: float = 1e-7,
+) -> np.ndarray:
+    """
+    Solve K problems  min ½xᵀPx + q_kᵀx  s.t.  l_k ≤ Ax ≤ u_k,  x_l ≤ x ≤ x_u  at once.
+
+    `q`, `lower` and `upper` carry one column per problem; `P`, `A` and the
+    variable bounds are shared, so each (re)factorization serves the whole
+    batch. Variable bounds are handled as an implicit diagonal block rather
+    than identity rows of `A`. The problem is Ruiz-equilibrated, ρ adapts to
+    the residual balance, and each column is finally polished on its active
+    set, as in OSQP.
+    """
+    n, m = P.shape[0], A.shape[0]
+    q = q.reshape(n, -1)
+    k = q.shape[1]
+    lower = np.broadcast_to(lower.reshape(m, -1), (m, k))
+    upper = np.broadcast_to(upper.reshape(m, -1), (m, k))
+    original = (P, q, A, lower, upper)
+
+    # Ruiz equilibration: x = D·x̂, general rows scaled by E, bound rows by H
+    D, E, H = np.ones(n), np.ones(m), np.ones(n)
+    for _ in range(15):
+        Ps = D[:, None] * P * D[None, :]
+        As = E[:, None] * A * D[None, :]
+        col_norm = np.maximum(np.abs(Ps).max(axis=0), H * D)
+        if m:
+            col_norm = np.maximum(col_norm, np.abs(As).max(axis=0))
+            row_norm = np.abs(As).max(axis=1)
+            E /= np.sqrt(np.where(row_norm > 1e-8, row_norm, 1.0))
+        H /= np.sqrt(H * D)
+        D /= np.sqrt(np.where(col_norm > 1e-8, col_norm, 1.0))
+    Ps = D[:, None] * P * D[None, :]
+    As = E[:, None] * A * D[None, :]
+    qs = D[:, None] * q
+    cost = 1.0 / max(float(np.abs(Ps).max(axis=0).mean()), float(np.abs(qs).max()), 1e-8)
+    Ps, qs = Ps * cost, qs * cost
+    ls, us = E[:, None] * lower, E[:, None] * upper
+    h = (H * D)[:, None]
+    lxs, uxs = (H * x_lower)[:, None], (H * x_upper)[:, None]
+    # Stiffer penalty on equality rows, as OSQP does
+    equality = np.all(lower == upper, axis=1)[:, None]
+
+    def factorize(rho_value: float):
+        rho_a = np.where(equality, rho_value * 1e3, rho_value)
+        kkt = Ps + sigma * np.eye(n) + np.diag(rho_value * h[:, 0] ** 2) + As.T @ (rho_a * As)
+        # Dense SPD inverse: one O(n³) factorization, then O(n²k) per iteration
+        return rho_a, np.linalg.inv(kkt)
+
+    P0, q0, A0, l0, u0 = original
+
+    def try_polish(col: int, xs: np.ndarray, zc, zxc, yc, yxc) -> Optional[np.ndarray]:
+        """Polish one column from its scaled iterate; None if the active set is not yet right."""
+        low_rows = (zc - ls[:, col] < -yc) | equality[:, 0]
+        up_rows = (us[:, col] - zc < yc) & ~low_rows
+        low_x = zxc - lxs[:, 0] < -yxc
+        up_x = (uxs[:, 0] - zxc < yxc) & ~low_x
+        polished = _polish(P0, q0[:, col], A0, l0[:, col], u0[:, col], x_lower, x_upper,
+                           low_rows, up_rows, low_x, up_x)
+        if polished is None:
+            return None
+        ax = A0 @ polished
+        violation = max(
+            float(np.max(l0[:, col] - ax, initial=0.0)), float(np.max(ax - u0[:, col], initial=0.0)),
+            float(np.max(x_lower - polished)), float(np.max(polished - x_upper)),
+        )
+        if violation > polish_tol:
+            return None
+        # KKT check: the polished point must not be beaten by the unpolished iterate
+        x_admm = D * xs
+        objective = lambda v: 0.5 * v @ P0 @ v + q0[:, col] @ v
+        if np.all(np.isfinite(x_admm)) and objective(polished) > objective(x_admm) + 1e-9 * (1 + abs(objective(x_admm))):
+            return None
+        return polished
+
+    rho_a, kkt_inv = factorize(rho)
+    result = np.zeros((n, k))
+    cols = np.arange(k)  # problems still iterating
+    x = np.zeros((n, k))
+    z = np.clip(np.zeros((m, k)), ls, us)
+    zx = np.clip(np.zeros((n, k)), lxs, uxs)
+    y = np.zeros((m, k))
+    yx = np.zeros((n, k))
+    for it in range(1, max_iter + 1):
+        qc, lc, uc = qs[:, cols], ls[:, cols], us[:, cols]
+        rhs = sigma * x - qc + As.T @ (rho_a * z - y) + h * (rho * zx - yx)
+        x_tilde = kkt_inv @ rhs
+        x = alpha * x_tilde + (1 - alpha) * x
+        z_relaxed = alpha * (As @ x_tilde) + (1 - alpha) * z
+        zx_relaxed = alpha * (h * x_tilde) + (1 - alpha) * zx
+        z = np.clip(z_relaxed + y / rho_a, lc, uc)
+        zx = np.clip(zx_relaxed + yx / rho, lxs, uxs)
+        y = y + rho_a * (z_relaxed - z)
+        yx = yx + rho * (zx_relaxed - zx)
+
+        if it % check_every and it != max_iter:
+            continue
+        ax, hx, px, aty = As @ x, h * x, Ps @ x, As.T @ y + h * yx
+        primal = np.maximum(np.abs(ax - z).max(axis=0, initial=0.0), np.abs(hx - zx).max(axis=0))
+        dual = np.abs(px + qc + aty).max(axis=0)
+        primal_scale = np.maximum.reduce([
+            np.abs(ax).max(axis=0, initial=0.0), np.abs(z).max(axis=0, initial=0.0),
+            np.abs(hx).max(axis=0), np.abs(zx).max(axis=0),
+        ])
+        dual_scale = np.maximum.reduce([np.abs(px).max(axis=0), np.abs(aty).max(axis=0), np.abs(qc).max(axis=0)])
+        converged = (primal <= eps_abs + eps_rel * primal_scale) & (dual <= eps_abs + eps_rel * dual_scale)
+
+        # Retire columns that converged or already polish to an exact solution
+        done = np.zeros(cols.size, dtype=bool)
+        attempt_polish = it % (check_every * 4) == 0 or it == max_iter
+        for j, col in enumerate(cols):
+            polished = None
+            if attempt_polish or converged[j]:
+                polished = try_polish(col, x[:, j], z[:, j], zx[:, j], y[:, j], yx[:, j])
+            if polished is not None:
+                result[:, col] = polished
+                done[j] = True
+            elif converged[j] or it == max_iter:
+                result[:, col] = D * x[:, j]
+                done[j] = True
+        if done.all():
+            break
+        if done.any():
+            keep = ~done
+            cols = cols[keep]
+            x, z, zx, y, yx = x[:, keep], z[:, keep], zx[:, keep], y[:, keep], yx[:, keep]
+            primal, dual = primal[keep], dual[keep]
+            primal_scale, dual_scale = primal_scale[keep], dual_scale[keep]
+
+        # Balance the worst residuals across the remaining batch
+        ratio = (primal / np.maximum(primal_scale, 1e-12)).max() / max(
+            (dual / np.maximum(dual_scale, 1e-12)).max(), 1e-12
+        )
+        if ratio > 5 or ratio < 0.2:
+            rho = float(np.clip(rho * np.sqrt(ratio), 1e-6, 1e6))
+            rho_a, kkt_inv = factorize(rho)
+
+    return result
+
+
+def _constraint_rows(
+    n_assets: int,
+    sectors: list[str],
+    max_sector_exposure: Optional[float],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Budget and sector-cap rows as (A, lower, upper); position bounds stay on x."""
+    rows = [np.ones((1, n_assets))]
+    lower = [np.ones(1)]
+    upper = [np.ones(1)]
+
+    if max_sector_exposure is not None:
+        names = sorted(set(sectors))
+        membership = np.array([[s == name for s in sectors] for name in names], dtype=float)
+        rows.append(membership)
+        lower.append(np.full(len(names), -np.inf))
+        upper.append(np.full(len(names), max_sector_exposure))
+
+    return np.vstack(rows), np.concatenate(lower), np.concatenate(upper)
+
+
+def _check_feasible(sectors: list[str], max_position_size: float, max_sector_exposure: Optional[float]):
+    if max_position_size * len(sectors) < 1 - 1e-9:
+        raise ValueError(
+            f"Infeasible: {len(sectors)} assets × max_position_size {max_position_size} cannot reach 100%"
+        )
+    if max_sector_exposure is not None:
+        capacity = 0.0
+        for name in set(sectors):
+            count = sum(1 for s in sectors if s == name)
+            capacity += min(max_sector_exposure, count * max_position_size)
+        if capacity < 1 - 1e-9:
+            raise ValueError("Infeasible: sector and position limits cannot reach 100% invested")
+
+
+def _clean(weights: np.ndarray, sectors: list[str], max_position_size: float,
+           max_sector_exposure: Optional[float]) -> np.ndarray:
+    """
+    Zero out solver noise, renormalize each column to sum to one, and project
+    it back inside the position and sector caps (renormalizing can push a
+    capped weight over its limit).
+    """
+    w = np.where(weights < 1e-6, 0.0, weights)
+    w = w / w.sum(axis=0, keepdims=True)
+    return np.column_stack([
+        _apply_caps(column, sectors, max_position_size, max_sector_exposure) for column in w.T
+    ])
+
+
+# ===== Objectives =====
+
+def min_variance(cov: np.ndarray, sectors: list[str], max_position_size: float = 1.0,
+                 max_sector_exposure: Optional[float] = None) -> np.ndarray:
+    """Long-only minimum-variance weights."""
+    _check_feasible(sectors, max_position_size, max_sector_exposure)
+    n = cov.shape[0]
+    A, lo, up = _constraint_rows(n, sectors, max_sector_exposure)
+    x = _solve_qp(cov, np.zeros(n), A, lo, up, np.zeros(n), np.full(n, max_position_size))
+    return _clean(x, sectors, max_position_size, max_sector_exposure)[:, 0]
+
+
+def target_return(mean: np.ndarray, cov: np.ndarray, targets: np.ndarray, sectors: list[str],
+                  max_position_size: float = 1.0, max_sector_exposure: Optional[float] = None) -> np.ndarray:
+    """
+    Minimum-variance weights hitting each target return; one column per target.
+
+    Raises ValueError for a target outside the attainable return range, and
+    for a solve whose final iterate still misses its constraints or target.
+    """
+    _check_feasible(sectors, max_position_size, max_sector_exposure)
+    n = cov.shape[0]
+    targets = np.atleast_1d(np.asarray(targets, dtype=float))
+    # Attainable returns form an interval whose ends the greedy max_return finds exactly
+    low = float(mean @ max_return(-mean, sectors, max_position_size, max_sector_exposure))
+    high = float(mean @ max_return(mean, sectors, max_position_size, max_sector_exposure))
+    outside = (targets < low - 1e-9) | (targets > high + 1e-9)
+    if outside.any():
+        raise ValueError(
+            f"Infeasible: target return {targets[outside][0]:.4f} is outside the attainable "
+            f"range [{low:.4f}, {high:.4f}] under the position and sector limits"
+        )
+
+    A, lo, up = _constraint_rows(n, sectors, max_sector_exposure)
+    A = np.vstack((A, mean[None, :]))
+    lo = np.vstack((np.repeat(lo[:, None], targets.size, axis=1), targets[None, :]))
+    up = np.vstack((np.repeat(up[:, None], targets.size, axis=1), targets[None, :]))
+    q = np.zeros((n, targets.size))
+    x = _solve_qp(cov, q, A, lo, up, np.zeros(n), np.full(n, max_position_size))
+
+    # The solver hands back its last iterate when it runs out of iterations.
+    # Judge the raw iterate: the return row is part of A, so its residual is
+    # the target shortfall, and cleaning would add its own rounding on top.
+    ax = A @ x
+    residual = np.maximum(np.maximum(lo - ax, ax - up).max(axis=0),
+                          np.maximum(-x, x - max_position_size).max(axis=0))
+    missed = residual > TARGET_TOLERANCE
+    if missed.any():
+        raise ValueError(
+            f"Target return {targets[missed][0]:.4f} could not be met within tolerance "
+            f"(primal residual {residual[missed][0]:.2e})"
+        )
+    return _clean(x, sectors, max_position_size, max_sector_exposure)
+
+
+def max_return(mean: np.ndarray, sectors: list[str], max_position_size: float = 1.0,
+               max_sector_exposure: Optional[float] = None) -> np.ndarray:
+    """
+    Highest-return weights under the limits.
+
+    Sectors partition the assets, so filling names greedily by expected
+    return up to the position, sector and budget caps is exactly optimal.
+    """
+    _check_feasible(sectors, max_position_size, max_sector_exposure)
+    weights = np.zeros(mean.size)
+    sector_room = {name: (max_sector_exposure if max_sector_exposure is not None else 1.0) for name in sectors}
+    budget = 1.0
+    for i in np.argsort(-mean):
+        take = min(max_position_size, sector_room[sectors[i]], budget)
+        weights[i] = take
+        sector_room[sectors[i]] -= take
+        budget -= take
+        if budget <= 1e-12:
+            break
+    return weights
+
+
+def efficient_frontier(mean: np.ndarray, cov: np.ndarray, sectors: list[str], n_points: int = 25,
+                       max_position_size: float = 1.0, max_sector_exposure: Optional[float] = None,
+                       risk_free_rate: float = 0.05) -> dict:
+    """
+    Efficient frontier between the minimum-variance and maximum-return portfolios.
+
+    The interior target returns are solved together in one batched QP; only
+    the two end points are computed separately.
+    """
+    low = min_variance(cov, sectors, max_position_size, max_sector_exposure)
+    high = max_return(mean, sectors, max_position_size, max_sector_exposure)
+    r_low, r_high = float(mean @ low), float(mean @ high)
+
+    columns = [low[:, None]]
+    if n_points > 2 and r_high > r_low:
+        targets = np.linspace(r_low, r_high, n_points)[1:-1]
+        columns.append(target_return(mean, cov, targets, sectors, max_position_size, max_sector_exposure))
+    columns.append(high[:, None])
+    weights = np.hstack(columns)
+
+    returns = mean @ weights
+    vols = np.sqrt(np.einsum("ik,ij,jk->k", weights, cov, weights))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(vols > 0, (returns - risk_free_rate) / vols, 0.0)
+    return {
+        "weights": weights,
+        "returns": returns,
+        "volatility": vols,
+        "sharpe_ratio": sharpe,
+    }
+
+
+def max_sharpe(mean: np.ndarray, cov: np.ndarray, sectors: list[str], max_position_size: float = 1.0,
+               max_sector_exposure: Optional[float] = None, risk_free_rate: float = 0.05) -> np.ndarray:
+    """
+    Maximum-Sharpe weights via the homogenized convex reformulation.
+
+    Solves  min yᵀΣy  s.t. (μ − r_f)ᵀy = 1, y ≥ 0, y ≤ κ·cap, sector(y) ≤ κ·cap
+    with κ = 1ᵀy, then rescales w = y / κ.
+    """
+    _check_feasible(sectors, max_position_size, max_sector_exposure)
+    excess = mean - risk_free_rate
+    if np.all(excess <= 0):
+        # No asset beats the risk-free rate; fall back to the least-risk portfolio
+        return min_variance(cov, sectors, max_position_size, max_sector_exposure)
+
+    n = cov.shape[0]
+    ones = np.ones((1, n))
+    rows = [excess[None, :], np.eye(n) - max_position_size * ones]
+    lower = [np.ones(1), np.full(n, -np.inf)]
+    upper = [np.ones(1), np.zeros(n)]
+    if max_sector_exposure is not None:
+        names = sorted(set(sectors))
+        membership = np.array([[s == name for s in sectors] for name in names], dtype=float)
+        rows.append(membership - max_sector_exposure * ones)
+        lower.append(np.full(len(names), -np.inf))
+        upper.append(np.zeros(len(names)))
+
+    A = np.vstack(rows)
+    y = _solve_qp(cov, np.zeros(n), A, np.concatenate(lower), np.concatenate(upper),
+                  np.zeros(n), np.full(n, np.inf))
+    return _clean(np.maximum(y, 0.0), sectors, max_position_size, max_sector_exposure)[:, 0]
+
+
+def risk_parity(cov: np.ndarray, budgets: Optional[np.ndarray] = None, max_iter: int = 50,
+                tol: float = 1e-10) -> np.ndarray:
+    """
+    Equal (or budgeted) risk-contribution weights.
+
+    Damped Newton on the convex program  min ½yᵀΣy − Σ bᵢ log yᵢ,
+    whose solution normalized to sum to one equalizes risk contributions.
+    """
+    n = cov.shape[0]
+    b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+    y = 1.0 / np.sqrt(np.diag(cov))
+    y *= np.sqrt(1.0 / (y @ cov @ y))
+
+    for _ in range(max_iter):
+        grad = cov @ y - b / y
+        hess = cov + np.diag(b / y ** 2)
+        step = np.linalg.solve(hess, grad)
+        decrement = float(grad @ step)
+        # Backtrack so y stays strictly positive
+        t = 1.0
+        while np.any(y - t * step <= 0):
+            t *= 0.5
+        y = y - t * step
+        if decrement / 2 < tol:
+            break
+
+    return y / y.sum()
+
+
+def _apply_caps(weights: np.ndarray, sectors: list[str], max_position_size: float,
+                max_sector_exposure: Optional[float], rounds: int = 50) -> np.ndarray:
+    """Clip weights to position/sector caps, redistributing the excess pro rata to uncapped names."""
+    w = weights.copy()
+    sector_arr = np.array(sectors)
+    for _ in range(rounds):
+        capped = w >= max_position_size - 1e-12
+        w = np.minimum(w, max_position_size)
+        if max_sector_exposure is not None:
+            for name in np.unique(sector_arr):
+                members = sector_arr == name
+                total = w[members].sum()
+                if total > max_sector_exposure:
+                    w[members] *= max_sector_exposure / total
+                    capped |= members
+        excess = 1.0 - w.sum()
+        free = ~capped
+        if excess <= 1e-12 or not free.any():
+            break
+        w[free] += excess * w[free] / w[free].sum()
+    return w
+
+
+# ===== Universe wrapper =====
+
+def optimize_portfolio(
+    tickers: list[str],
+    objective: str = "max_sharpe",
+    target: Optional[float] = None,
+    window: int = 252,
+    max_position_size: Optional[float] = None,
+    max_sector_exposure: Optional[float] = None,
+    risk_free_rate: float = 0.05,
+    frontier_points: int = 0,
+) -> dict:
+    """
+    Optimize weights for synced tickers using Ledoit-Wolf covariance and
+    historical mean returns (both annualized).
+
+    Limits left as None fall back to `DEFAULT_RISK_LIMITS`; the API passes
+    the current `risk_limits` system setting.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'. Available: {list(OBJECTIVES)}")
+
+    cap = DEFAULT_RISK_LIMITS["max_position_size"] if max_position_size is None else max_position_size
+    sector_cap = DEFAULT_RISK_LIMITS["max_sector_exposure"] if max_sector_exposure is None else max_sector_exposure
+
+    cov_result = get_covariance(tickers, window=window, method="ledoit_wolf")
+    names = cov_result["tickers"]
+    if len(names) < 2:
+        raise ValueError("At least two synced tickers with overlapping history are required")
+
+    dates, aligned, returns = get_aligned_returns(names, cov_result["as_of"])
+    mean = returns[-window:].mean(axis=0) * PERIODS_PER_YEAR
+    cov = cov_result["covariance"] * PERIODS_PER_YEAR
+    sectors = [
+        ((get_synced_data(t) or {}).get("company", {}) or {}).get("sector", "Unknown") for t in names
+    ]
+
+    if objective == "min_variance":
+        weights = min_variance(cov, sectors, cap, sector_cap)
+    elif objective == "max_sharpe":
+        weights = max_sharpe(mean, cov, sectors, cap, sector_cap, risk_free_rate)
+    elif objective == "target_return":
+        if target is None:
+            raise ValueError("target_return objective requires a target annual return")
+        weights = target_return(mean, cov, np.array([target]), sectors, cap, sector_cap)[:, 0]
+    else:
+        _check_feasible(sectors, cap, sector_cap)
+        weights = _apply_caps(risk_parity(cov), sectors, cap, sector_cap)
+
+    port_return = float(mean @ weights)
+    port_vol = float(np.sqrt(weights @ cov @ weights))
+    result = {
+        "objective": objective,
+        "as_of": cov_result["as_of"],
+        "weights": {t: round(float(w), 6) for t, w in zip(names, weights) if w > 1e-6},
+        "expected_return": round(port_return * 100, 2),
+        "volatility": round(port_vol * 100, 2),
+        "sharpe_ratio": round((port_return - risk_free_rate) / port_vol, 2) if port_vol > 0 else 0.0,
+        "risk_limits": {"max_position_size": cap, "max_sector_exposure": sector_cap},
+    }
+
+    if frontier_points > 1:
+        frontier = efficient_frontier(mean, cov, sectors, frontier_points, cap, sector_cap, risk_free_rate)
+        result["frontier"] = [
+            {"expected_return": round(float(r) * 100, 2), "volatility": round(float(v) * 100, 2),
+             "sharpe_ratio": round(float(s), 2)}
+            for r, v, s in zip(frontier["returns"], frontier["volatility"], frontier["sharpe_ratio"])
+        ]
+
+    return result
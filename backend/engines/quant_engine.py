@@ -1,20 +1,23 @@
 """
 Quant Engine — Portfolio risk metrics and performance calculations.
 """
+import math
 import numpy as np
-from typing import Optional
+from typing import Optional, Union
+
+ArrayLike = Union[list[float], np.ndarray]
 
 
 def calculate_sharpe_ratio(
-    returns: list[float],
+    returns: ArrayLike,
     risk_free_rate: float = 0.05,
     periods_per_year: int = 252,
 ) -> float:
     """Calculate annualized Sharpe Ratio."""
-    if not returns or len(returns) < 2:
+    arr = np.asarray(returns, dtype=float)
+    if arr.size < 2:
         return 0.0
 
-    arr = np.array(returns)
     excess_returns = arr - (risk_free_rate / periods_per_year)
     std = np.std(excess_returns, ddof=1)
 
@@ -25,15 +28,15 @@ def calculate_sharpe_ratio(
 
 
 def calculate_sortino_ratio(
-    returns: list[float],
+    returns: ArrayLike,
     risk_free_rate: float = 0.05,
     periods_per_year: int = 252,
 ) -> float:
     """Calculate annualized Sortino Ratio (only penalizes downside volatility)."""
-    if not returns or len(returns) < 2:
+    arr = np.asarray(returns, dtype=float)
+    if arr.size < 2:
         return 0.0
 
-    arr = np.array(returns)
     excess_returns = arr - (risk_free_rate / periods_per_year)
     downside = arr[arr < 0]
     downside_std = np.std(downside, ddof=1) if len(downside) > 1 else 0.0
@@ -44,44 +47,116 @@ def calculate_sortino_ratio(
     return float(np.mean(excess_returns) / downside_std * np.sqrt(periods_per_year))
 
 
-def calculate_max_drawdown(equity_curve: list[float]) -> float:
+def calculate_max_drawdown(equity_curve: ArrayLike) -> float:
     """Calculate maximum drawdown as a percentage."""
-    if not equity_curve or len(equity_curve) < 2:
+    arr = np.asarray(equity_curve, dtype=float)
+    if arr.size < 2:
         return 0.0
 
-    arr = np.array(equity_curve)
     peak = np.maximum.accumulate(arr)
     drawdown = (arr - peak) / peak
     return float(np.min(drawdown) * 100)
 
 
+def curve_intermediates(equity_curve: ArrayLike) -> dict[str, np.ndarray]:
+    """Simple returns and running peak of an equity curve, for sharing across metrics."""
+    arr = np.asarray(equity_curve, dtype=float)
+    return {"returns": np.diff(arr) / arr[:-1], "peak": np.maximum.accumulate(arr)}
+
+
+def calculate_drawdown_analysis(
+    equity_curve: ArrayLike,
+    dates: Optional[list[str]] = None,
+    top_n: Optional[int] = 5,
+    peak: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    Underwater curve and drawdown episodes in one linear pass.
+
+    An episode runs from the last high before the curve goes underwater
+    (peak) through its lowest point (trough) to the first bar back at or above
+    that high (recovery, None while still underwater). Returns the underwater
+    series (%), the max drawdown (%) and the `top_n` deepest episodes with
+    depth, length, decline and recovery durations in bars. A precomputed
+    running `peak` (see `curve_intermediates`) is reused when given.
+    """
+    arr = np.asarray(equity_curve, dtype=float)
+    if arr.size < 2:
+        return {"drawdown": np.zeros(arr.size), "max_drawdown": 0.0, "episodes": []}
+
+    if peak is None:
+        peak = np.maximum.accumulate(arr)
+    drawdown = (arr - peak) / peak * 100
+
+    underwater = drawdown < 0
+    edges = np.diff(np.concatenate(([False], underwater, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    episodes = []
+    if starts.size:
+        # Depth and first trough index of every episode via segment reductions
+        depth = np.minimum.reduceat(drawdown, starts)
+        episode_of = np.cumsum(edges[:-1] == 1) - 1
+        at_trough = underwater & (drawdown == depth[np.maximum(episode_of, 0)])
+        trough_hits = np.flatnonzero(at_trough)
+        _, first = np.unique(episode_of[trough_hits], return_index=True)
+        troughs = trough_hits[first]
+
+        order = np.argsort(depth, kind="stable")
+        if top_n is not None:
+            order = order[:top_n]
+
+        last = arr.size - 1
+        for i in order:
+            peak_idx = int(starts[i] - 1)
+            trough_idx = int(troughs[i])
+            recovered = ends[i] <= last
+            recovery_idx = int(ends[i]) if recovered else None
+            episode = {
+                "peak": peak_idx,
+                "trough": trough_idx,
+                "recovery": recovery_idx,
+                "depth": float(depth[i]),
+                "length": (recovery_idx if recovered else last) - peak_idx,
+                "decline_duration": trough_idx - peak_idx,
+                "recovery_duration": recovery_idx - trough_idx if recovered else None,
+            }
+            if dates is not None:
+                episode["peak_date"] = dates[peak_idx]
+                episode["trough_date"] = dates[trough_idx]
+                episode["recovery_date"] = dates[recovery_idx] if recovered else None
+            episodes.append(episode)
+
+    return {
+        "drawdown": drawdown,
+        "max_drawdown": float(drawdown.min()),
+        "episodes": episodes,
+    }
+
+
 def calculate_volatility(
-    returns: list[float],
+    returns: ArrayLike,
     periods_per_year: int = 252,
 ) -> float:
     """Calculate annualized volatility."""
-    if not returns or len(returns) < 2:
+    arr = np.asarray(returns, dtype=float)
+    if arr.size < 2:
         return 0.0
 
-    return float(np.std(returns, ddof=1) * np.sqrt(periods_per_year) * 100)
+    return float(np.std(arr, ddof=1) * np.sqrt(periods_per_year) * 100)
 
 
 def calculate_beta(
-    portfolio_returns: list[float],
-    benchmark_returns: list[float],
+    portfolio_returns: ArrayLike,
+    benchmark_returns: ArrayLike,
 ) -> float:
     """Calculate portfolio beta relative to a benchmark."""
-    if (
-        not portfolio_returns
-        or not benchmark_returns
-        or len(portfolio_returns) != len(benchmark_returns)
-        or len(portfolio_returns) < 2
-    ):
+    port = np.asarray(portfolio_returns, dtype=float)
+    bench = np.asarray(benchmark_returns, dtype=float)
+    if port.size != bench.size or port.size < 2:
         return 1.0
 
-    port = np.array(portfolio_returns)
-    bench = np.array(benchmark_returns)
-
     covariance = np.cov(port, bench)[0][1]
     variance = np.var(bench, ddof=1)
 
@@ -91,12 +166,104 @@ def calculate_beta(
     return float(covariance / variance)
 
 
+def calculate_batch_metrics(
+    equity_curves: ArrayLike,
+    benchmark_curve: Optional[ArrayLike] = None,
+    risk_free_rate: float = 0.05,
+    periods_per_year: int = 252,
+    returns: Optional[np.ndarray] = None,
+    peak: Optional[np.ndarray] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Calculate portfolio metrics for many equity curves in one vectorized pass.
+
+    `equity_curves` is a (portfolios × periods) matrix, one curve per row.
+    `benchmark_curve` is either a single curve shared by every row or a matrix
+    of the same shape. Returns a dict of 1D arrays (one value per portfolio)
+    using the same definitions as the scalar `calculate_*` helpers.
+    Precomputed `returns` and running `peak` of the curves are reused when given.
+    """
+    curves = np.asarray(equity_curves, dtype=float)
+    if curves.ndim == 1:
+        curves = curves[np.newaxis, :]
+    n_portfolios, n_periods = curves.shape
+
+    if n_periods < 2:
+        zeros = np.zeros(n_portfolios)
+        return {
+            "sharpe_ratio": zeros,
+            "sortino_ratio": zeros.copy(),
+            "max_drawdown": zeros.copy(),
+            "volatility": zeros.copy(),
+            "beta": np.ones(n_portfolios),
+            "total_return": zeros.copy(),
+            "total_return_percent": zeros.copy(),
+        }
+
+    returns = np.diff(curves, axis=1) / curves[:, :-1] if returns is None else np.atleast_2d(returns)
+    n_returns = n_periods - 1
+    annualize = np.sqrt(periods_per_year)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Sharpe / volatility
+        excess = returns - risk_free_rate / periods_per_year
+        excess_mean = excess.mean(axis=1)
+        excess_std = excess.std(axis=1, ddof=1)
+        sharpe = np.where(excess_std > 0, excess_mean / excess_std * annualize, 0.0)
+        volatility = returns.std(axis=1, ddof=1) * annualize * 100
+
+        # Sortino — sample std of the negative returns only, per row
+        downside_mask = returns < 0
+        downside_count = downside_mask.sum(axis=1)
+        downside = np.where(downside_mask, returns, 0.0)
+        downside_mean = downside.sum(axis=1) / np.maximum(downside_count, 1)
+        downside_sq = np.where(downside_mask, (returns - downside_mean[:, None]) ** 2, 0.0)
+        downside_std = np.sqrt(downside_sq.sum(axis=1) / np.maximum(downside_count - 1, 1))
+        downside_std = np.where(downside_count > 1, downside_std, 0.0)
+        sortino = np.where(downside_std > 0, excess_mean / downside_std * annualize, 0.0)
+
+        # Max drawdown
+        peak = np.maximum.accumulate(curves, axis=1) if peak is None else np.atleast_2d(peak)
+        max_drawdown = ((curves - peak) / peak).min(axis=1) * 100
+
+        # Total return
+        total_return = curves[:, -1] - curves[:, 0]
+        total_return_percent = total_return / curves[:, 0] * 100
+
+        # Beta
+        beta = np.ones(n_portfolios)
+        if benchmark_curve is not None:
+            bench = np.asarray(benchmark_curve, dtype=float)
+            if bench.shape[-1] == n_periods:
+                bench_returns = np.diff(bench, axis=-1) / bench[..., :-1]
+                bench_demeaned = bench_returns - bench_returns.mean(axis=-1, keepdims=True)
+                port_demeaned = returns - returns.mean(axis=1, keepdims=True)
+                covariance = (port_demeaned * bench_demeaned).sum(axis=1) / (n_returns - 1)
+                variance = np.broadcast_to(
+                    (bench_demeaned ** 2).sum(axis=-1) / (n_returns - 1), (n_portfolios,)
+                )
+                beta = np.where(variance > 0, covariance / variance, 1.0)
+
+    return {
+        "sharpe_ratio": np.nan_to_num(sharpe),
+        "sortino_ratio": np.nan_to_num(sortino),
+        "max_drawdown": max_drawdown,
+        "volatility": np.nan_to_num(volatility),
+        "beta": beta,
+        "total_return": total_return,
+        "total_return_percent": total_return_percent,
+    }
+
+
 def calculate_portfolio_metrics(
-    equity_curve: list[float],
-    benchmark_curve: Optional[list[float]] = None,
+    equity_curve: ArrayLike,
+    benchmark_curve: Optional[ArrayLike] = None,
+    returns: Optional[np.ndarray] = None,
+    peak: Optional[np.ndarray] = None,
 ) -> dict:
-    """Calculate all portfolio metrics from an equity curve."""
-    if not equity_curve or len(equity_curve) < 2:
+    """Calculate all portfolio metrics from an equity curve (reusing precomputed returns / peak if given)."""
+    arr = np.asarray(equity_curve, dtype=float)
+    if arr.size < 2:
         return {
             "sharpe_ratio": 0,
             "sortino_ratio": 0,
@@ -107,24 +274,145 @@ def calculate_portfolio_metrics(
             "total_return_percent": 0,
         }
 
-    # Calculate daily returns
-    arr = np.array(equity_curve)
-    returns = list(np.diff(arr) / arr[:-1])
-
-    metrics = {
-        "sharpe_ratio": round(calculate_sharpe_ratio(returns), 2),
-        "sortino_ratio": round(calculate_sortino_ratio(returns), 2),
-        "max_drawdown": round(calculate_max_drawdown(equity_curve), 2),
-        "volatility": round(calculate_volatility(returns), 2),
-        "total_return": round(float(arr[-1] - arr[0]), 2),
-        "total_return_percent": round(float((arr[-1] - arr[0]) / arr[0] * 100), 2),
-    }
+    bench = None
+    if benchmark_curve is not None and len(benchmark_curve) == arr.size:
+        bench = benchmark_curve
 
-    if benchmark_curve and len(benchmark_curve) == len(equity_curve):
-        bench_arr = np.array(benchmark_curve)
-        bench_returns = list(np.diff(bench_arr) / bench_arr[:-1])
-        metrics["beta"] = round(calculate_beta(returns, bench_returns), 2)
-    else:
+    batch = calculate_batch_metrics(arr, bench, returns=returns, peak=peak)
+    metrics = {key: round(float(values[0]), 2) for key, values in batch.items()}
+    if bench is None:
         metrics["beta"] = 1.0
 
     return metrics
+
+
+class StreamingMetrics:
+    """
+    Online portfolio metrics fed one equity tick at a time.
+
+    Uses Welford updates for the return moments so every `update` is O(1) and
+    numerically stable over long sessions. Results follow the same definitions
+    as `calculate_batch_metrics`. The state is plain floats, so `to_dict` /
+    `from_dict` round-trip through JSON for checkpointing.
+    """
+
+    _FIELDS = (
+        "risk_free_rate", "periods_per_year",
+        "first_equity", "last_equity", "last_benchmark", "peak", "max_drawdown",
+        "n", "mean", "m2",
+        "n_down", "mean_down", "m2_down",
+        "n_bench", "mean_port", "mean_bench", "c_xy", "m2_bench",
+    )
+
+    def __init__(self, risk_free_rate: float = 0.05, periods_per_year: int = 252):
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year
+        self.first_equity: Optional[float] = None
+        self.last_equity: Optional[float] = None
+        self.last_benchmark: Optional[float] = None
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        # Return moments
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Downside (negative return) moments
+        self.n_down = 0
+        self.mean_down = 0.0
+        self.m2_down = 0.0
+        # Portfolio/benchmark co-moments for beta
+        self.n_bench = 0
+        self.mean_port = 0.0
+        self.mean_bench = 0.0
+        self.c_xy = 0.0
+        self.m2_bench = 0.0
+
+    def update(self, equity: float, benchmark: Optional[float] = None) -> "StreamingMetrics":
+        """Feed the next equity value (and optionally the benchmark level)."""
+        equity = float(equity)
+        prev_equity, prev_bench = self.last_equity, self.last_benchmark
+        self.last_equity = equity
+        self.last_benchmark = float(benchmark) if benchmark is not None else None
+
+        if self.first_equity is None:
+            self.first_equity = equity
+        if equity > self.peak:
+            self.peak = equity
+        if self.peak > 0:
+            self.max_drawdown = min(self.max_drawdown, (equity - self.peak) / self.peak * 100)
+
+        if not prev_equity:
+            return self
+
+        r = equity / prev_equity - 1
+        self.n += 1
+        delta = r - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (r - self.mean)
+
+        if r < 0:
+            self.n_down += 1
+            delta = r - self.mean_down
+            self.mean_down += delta / self.n_down
+            self.m2_down += delta * (r - self.mean_down)
+
+        if prev_bench and self.last_benchmark is not None:
+            b = self.last_benchmark / prev_bench - 1
+            self.n_bench += 1
+            dx = r - self.mean_port
+            dy = b - self.mean_bench
+            self.mean_port += dx / self.n_bench
+            self.mean_bench += dy / self.n_bench
+            self.c_xy += dx * (b - self.mean_bench)
+            self.m2_bench += dy * (b - self.mean_bench)
+
+        return self
+
+    def metrics(self) -> dict:
+        """Current metrics, unrounded, plus the running peak and drawdown."""
+        annualize = math.sqrt(self.periods_per_year)
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        down_std = math.sqrt(self.m2_down / (self.n_down - 1)) if self.n_down > 1 else 0.0
+        excess_mean = self.mean - self.risk_free_rate / self.periods_per_year
+
+        if self.n < 2:
+            sharpe = sortino = 0.0
+        else:
+            sharpe = excess_mean / std * annualize if std > 0 else 0.0
+            sortino = excess_mean / down_std * annualize if down_std > 0 else 0.0
+
+        beta = 1.0
+        if self.n_bench > 1 and self.m2_bench > 0:
+            beta = self.c_xy / self.m2_bench
+
+        first = self.first_equity or 0.0
+        last = self.last_equity or 0.0
+        total_return = last - first if self.n else 0.0
+        return {
+            "sharpe_ratio": sharpe,
+            "sortino_ratio": sortino,
+            "max_drawdown": self.max_drawdown,
+            "volatility": std * annualize * 100,
+            "beta": beta,
+            "total_return": total_return,
+            "total_return_percent": total_return / first * 100 if first else 0.0,
+            "peak": self.peak,
+            "current_drawdown": (last - self.peak) / self.peak * 100 if self.peak else 0.0,
+            "observations": self.n + 1 if self.first_equity is not None else 0,
+        }
+
+    def to_dict(self) -> dict:
+        """Serialize the accumulator state for checkpointing."""
+        return {field: getattr(self, field) for field in self._FIELDS}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "StreamingMetrics":
+        """Restore an accumulator from `to_dict` output."""
+        acc = cls(
+            risk_free_rate=state.get("risk_free_rate", 0.05),
+            periods_per_year=state.get("periods_per_year", 252),
+        )
+        for field in cls._FIELDS:
+            if field in state:
+                setattr(acc, field, state[field])
+        return acc
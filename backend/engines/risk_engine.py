@@ -0,0 +1,256 @@
+"""
+Risk Engine — Value-at-Risk and Expected Shortfall (CVaR).
+
+Three estimation modes:
+- historical: empirical quantile of (overlapping) horizon returns
+- parametric: Gaussian closed form scaled by the horizon
+- monte_carlo: correlated asset paths simulated in fixed-size chunks, spread
+  across a shared process pool (started with the app) with per-chunk seeds
+  so results do not depend on the number of workers
+
+VaR and CVaR are reported as positive loss percentages, like the other
+percentage metrics in `quant_engine`.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Optional, Union
+
+import numpy as np
+
+ArrayLike = Union[list[float], np.ndarray]
+
+VAR_METHODS = ("historical", "parametric", "monte_carlo")
+
+# Default ceiling on simulation working memory across all workers
+DEFAULT_MEMORY_BUDGET_MB = 256
+# Upper bound on paths simulated per chunk
+MC_CHUNK_PATHS = 20_000
+VAR_WORKERS = int(os.getenv("VAR_WORKERS", str(min(os.cpu_count() or 1, 8))))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_var_pool(workers: int = VAR_WORKERS) -> ProcessPoolExecutor:
+    """Start (or return) the Monte Carlo simulation pool."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(workers, 1))
+    return _pool
+
+
+def shutdown_var_pool():
+    """Stop the simulation pool; it restarts lazily on the next simulation."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _horizon_returns(returns: np.ndarray, horizon: int) -> np.ndarray:
+    """Compound per-period returns into overlapping `horizon`-period returns along the last axis."""
+    if horizon <= 1:
+        return returns
+    log_growth = np.cumsum(np.log1p(returns), axis=-1)
+    pad = np.zeros(returns.shape[:-1] + (1,))
+    log_growth = np.concatenate((pad, log_growth), axis=-1)
+    return np.expm1(log_growth[..., horizon:] - log_growth[..., :-horizon])
+
+
+def _tail_stats(horizon_returns: np.ndarray, confidence: float) -> tuple[np.ndarray, np.ndarray]:
+    """Empirical VaR and CVaR (positive loss %) along the last axis."""
+    cutoff = np.quantile(horizon_returns, 1 - confidence, axis=-1, keepdims=True)
+    tail = horizon_returns <= cutoff
+    tail_mean = np.where(tail, horizon_returns, 0.0).sum(axis=-1) / np.maximum(tail.sum(axis=-1), 1)
+    return -cutoff[..., 0] * 100, -tail_mean * 100
+
+
+def _parametric_stats(
+    mean: np.ndarray,
+    std: np.ndarray,
+    confidence: float,
+    horizon: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Gaussian VaR and CVaR (positive loss %) from per-period mean and std."""
+    normal = NormalDist()
+    z = normal.inv_cdf(1 - confidence)
+    mu_h = mean * horizon
+    sigma_h = std * np.sqrt(horizon)
+    var = -(mu_h + z * sigma_h)
+    cvar = -(mu_h - sigma_h * normal.pdf(z) / (1 - confidence))
+    return var * 100, cvar * 100
+
+
+def historical_var(
+    returns: ArrayLike,
+    confidence: float = 0.95,
+    horizon: int = 1,
+) -> dict:
+    """Historical VaR/CVaR from a series of per-period returns."""
+    arr = np.asarray(returns, dtype=float)
+    if arr.size < max(horizon, 2):
+        return {"var": 0.0, "cvar": 0.0}
+    var, cvar = _tail_stats(_horizon_returns(arr, horizon), confidence)
+    return {"var": float(var), "cvar": float(cvar)}
+
+
+def parametric_var(
+    returns: ArrayLike,
+    confidence: float = 0.95,
+    horizon: int = 1,
+) -> dict:
+    """Gaussian (variance-covariance) VaR/CVaR from per-period returns."""
+    arr = np.asarray(returns, dtype=float)
+    if arr.size < 2:
+        return {"var": 0.0, "cvar": 0.0}
+    var, cvar = _parametric_stats(arr.mean(), arr.std(ddof=1), confidence, horizon)
+    return {"var": float(var), "cvar": float(cvar)}
+
+
+def _simulate_chunk(
+    mean: np.ndarray,
+    chol: np.ndarray,
+    weights: np.ndarray,
+    horizon: int,
+    n_paths: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """Simulate `n_paths` buy-and-hold portfolio returns over `horizon` periods."""
+    rng = np.random.default_rng(seed)
+    growth = np.ones((n_paths, mean.size))
+    for _ in range(horizon):
+        shocks = rng.standard_normal((n_paths, mean.size)) @ chol.T
+        shocks += mean
+        growth *= 1.0 + shocks
+    return growth @ weights - 1.0
+
+
+def monte_carlo_var(
+    asset_returns: ArrayLike,
+    weights: Optional[ArrayLike] = None,
+    confidence: float = 0.95,
+    horizon: int = 1,
+    n_paths: int = 100_000,
+    seed: int = 42,
+    max_workers: Optional[int] = None,
+    memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+) -> dict:
+    """
+    Monte Carlo VaR/CVaR for a weighted basket of assets.
+
+    `asset_returns` is a (periods × assets) matrix of aligned per-period
+    returns; a 1D series is treated as a single asset. Paths are drawn from a
+    multivariate normal fitted to the sample mean and covariance, compounded
+    per asset, and valued with fixed `weights` (equal weights by default).
+    For a given seed and memory budget the result is identical whatever the
+    number of workers.
+    """
+    arr = np.asarray(asset_returns, dtype=float)
+    if arr.ndim == 1:
+        arr = arr[:, np.newaxis]
+    n_obs, n_assets = arr.shape
+    if n_obs < 2 or n_paths < 1:
+        return {"var": 0.0, "cvar": 0.0, "paths": 0}
+
+    w = np.full(n_assets, 1.0 / n_assets) if weights is None else np.asarray(weights, dtype=float)
+    if w.size != n_assets:
+        raise ValueError(f"Expected {n_assets} weights, got {w.size}")
+
+    mean = arr.mean(axis=0)
+    cov = np.atleast_2d(np.cov(arr, rowvar=False))
+    # Jitter the diagonal so near-singular covariances still factorize
+    jitter = 1e-12 * max(float(np.trace(cov)) / n_assets, 1e-12)
+    chol = np.linalg.cholesky(cov + jitter * np.eye(n_assets))
+
+    # Each path holds a growth row, a shock row and the matmul temporary.
+    # Chunk size depends only on the budget (never on the worker count), so
+    # the per-chunk seeds and therefore the result are reproducible.
+    bytes_per_path = n_assets * 8 * 3
+    budget = memory_budget_mb * 1024 * 1024
+    chunk_size = int(max(1, min(n_paths, MC_CHUNK_PATHS, budget // bytes_per_path)))
+    workers = max_workers or VAR_WORKERS
+    workers = int(max(1, min(workers, budget // (chunk_size * bytes_per_path))))
+
+    sizes = [chunk_size] * (n_paths // chunk_size)
+    if n_paths % chunk_size:
+        sizes.append(n_paths % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(mean, chol, w, horizon, size, s) for size, s in zip(sizes, seeds)]
+
+    if workers == 1 or len(jobs) == 1:
+        results = [_simulate_chunk(*job) for job in jobs]
+    else:
+        # Submit at most `workers` chunks at a time to stay within the memory budget
+        pool = start_var_pool()
+        results = []
+        for i in range(0, len(jobs), workers):
+            results.extend(pool.map(_simulate_chunk, *zip(*jobs[i:i + workers])))
+
+    simulated = np.concatenate(results)
+    var, cvar = _tail_stats(simulated, confidence)
+    return {"var": float(var), "cvar": float(cvar), "paths": int(simulated.size)}
+
+
+def calculate_var(
+    equity_curve: ArrayLike,
+    confidence: float = 0.95,
+    horizon: int = 1,
+    method: str = "historical",
+    **kwargs,
+) -> dict:
+    """VaR/CVaR for a single portfolio equity curve."""
+    if method not in VAR_METHODS:
+        raise ValueError(f"Unknown VaR method '{method}'. Available: {list(VAR_METHODS)}")
+
+    arr = np.asarray(equity_curve, dtype=float)
+    returns = np.diff(arr) / arr[:-1] if arr.size >= 2 else np.array([])
+
+    if method == "historical":
+        result = historical_var(returns, confidence, horizon)
+    elif method == "parametric":
+        result = parametric_var(returns, confidence, horizon)
+    else:
+        result = monte_carlo_var(returns, confidence=confidence, horizon=horizon, **kwargs)
+
+    return {**result, "method": method, "confidence": confidence, "horizon": horizon}
+
+
+def calculate_batch_var(
+    equity_curves: ArrayLike,
+    confidence_levels: tuple[float, ...] = (0.95, 0.99),
+    horizon: int = 1,
+    method: str = "historical",
+) -> dict[str, np.ndarray]:
+    """
+    VaR/CVaR for many equity curves (portfolios × periods) at once.
+
+    Returns `var` and `cvar` arrays of shape (portfolios, confidence levels).
+    Only the closed-form modes are batched; Monte Carlo needs per-portfolio
+    asset weights and goes through `monte_carlo_var`.
+    """
+    if method not in ("historical", "parametric"):
+        raise ValueError("Batch VaR supports 'historical' and 'parametric' methods")
+
+    curves = np.asarray(equity_curves, dtype=float)
+    if curves.ndim == 1:
+        curves = curves[np.newaxis, :]
+    n_portfolios, n_periods = curves.shape
+    shape = (n_portfolios, len(confidence_levels))
+    if n_periods < max(horizon, 2) + 1:
+        return {"var": np.zeros(shape), "cvar": np.zeros(shape)}
+
+    returns = np.diff(curves, axis=1) / curves[:, :-1]
+    var = np.empty(shape)
+    cvar = np.empty(shape)
+
+    if method == "historical":
+        horizon_returns = _horizon_returns(returns, horizon)
+        for j, confidence in enumerate(confidence_levels):
+            var[:, j], cvar[:, j] = _tail_stats(horizon_returns, confidence)
+    else:
+        mean = returns.mean(axis=1)
+        std = returns.std(axis=1, ddof=1)
+        for j, confidence in enumerate(confidence_levels):
+            var[:, j], cvar[:, j] = _parametric_stats(mean, std, confidence, horizon)
+
+    return {"var": var, "cvar": cvar}
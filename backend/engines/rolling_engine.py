@@ -0,0 +1,326 @@
+"""
+Rolling Engine — Rolling-window risk metrics with O(1) incremental updates.
+
+Two entry points share the same metric definitions as `quant_engine`:
+- `rolling_metrics` / `rolling_volatility` compute full rolling series in one
+  vectorized pass (used by the chart endpoints).
+- `RollingMetricsEngine` keeps per-window running state so appending a new bar
+  updates every window in constant time (used by live portfolio views).
+"""
+import math
+from collections import deque
+from typing import Optional, Union
+
+import numpy as np
+
+ArrayLike = Union[list[float], np.ndarray]
+
+
+# ===== Vectorized rolling series =====
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each trailing window (length n - window + 1) via cumulative sums."""
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    return csum[window:] - csum[:-window]
+
+
+def _pad(values: np.ndarray, n: int) -> np.ndarray:
+    """Left-pad a rolling series with NaN so it aligns with the input."""
+    out = np.full(n, np.nan)
+    if values.size:
+        out[n - values.size:] = values
+    return out
+
+
+def rolling_volatility(
+    returns: ArrayLike,
+    window: int = 20,
+    periods_per_year: int = 252,
+) -> np.ndarray:
+    """Annualized rolling volatility (%), NaN until the first full window."""
+    arr = np.asarray(returns, dtype=float)
+    n = arr.size
+    if window < 2 or n < window:
+        return np.full(n, np.nan)
+
+    # Center on the global mean before summing squares to limit cancellation
+    centered = arr - arr.mean()
+    s1 = _window_sums(centered, window)
+    s2 = _window_sums(centered ** 2, window)
+    var = np.maximum((s2 - s1 ** 2 / window) / (window - 1), 0.0)
+    return _pad(np.sqrt(var) * np.sqrt(periods_per_year) * 100, n)
+
+
+def rolling_metrics(
+    equity_curve: ArrayLike,
+    window: int = 20,
+    benchmark_curve: Optional[ArrayLike] = None,
+    risk_free_rate: float = 0.05,
+    periods_per_year: int = 252,
+) -> dict[str, np.ndarray]:
+    """
+    Rolling volatility, Sharpe, Sortino, beta and drawdown for an equity curve.
+
+    Every series is aligned with the daily returns (length n - 1) and is NaN
+    until the first full window.
+    """
+    equity = np.asarray(equity_curve, dtype=float)
+    if equity.size < 2:
+        empty = np.array([])
+        return {k: empty for k in ("volatility", "sharpe_ratio", "sortino_ratio", "beta", "drawdown")}
+
+    returns = np.diff(equity) / equity[:-1]
+    n = returns.size
+    nan_series = np.full(n, np.nan)
+    if window < 2 or n < window:
+        return {
+            "volatility": nan_series,
+            "sharpe_ratio": nan_series.copy(),
+            "sortino_ratio": nan_series.copy(),
+            "beta": nan_series.copy(),
+            "drawdown": nan_series.copy(),
+        }
+
+    annualize = np.sqrt(periods_per_year)
+    offset = returns.mean()
+    centered = returns - offset
+    s1 = _window_sums(centered, window)
+    s2 = _window_sums(centered ** 2, window)
+    mean = s1 / window + offset
+    std = np.sqrt(np.maximum((s2 - s1 ** 2 / window) / (window - 1), 0.0))
+    excess_mean = mean - risk_free_rate / periods_per_year
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, excess_mean / std * annualize, 0.0)
+
+        neg_mask = returns < 0
+        neg = np.where(neg_mask, returns, 0.0)
+        k = _window_sums(neg_mask.astype(float), window)
+        d1 = _window_sums(neg, window)
+        d2 = _window_sums(neg ** 2, window)
+        down_var = (d2 - d1 ** 2 / np.maximum(k, 1)) / np.maximum(k - 1, 1)
+        down_std = np.where(k > 1, np.sqrt(np.maximum(down_var, 0.0)), 0.0)
+        sortino = np.where(down_std > 0, excess_mean / down_std * annualize, 0.0)
+
+        beta = np.ones_like(mean)
+        if benchmark_curve is not None and len(benchmark_curve) == equity.size:
+            bench = np.asarray(benchmark_curve, dtype=float)
+            bench_returns = np.diff(bench) / bench[:-1]
+            b_centered = bench_returns - bench_returns.mean()
+            b1 = _window_sums(b_centered, window)
+            b2 = _window_sums(b_centered ** 2, window)
+            cross = _window_sums(centered * b_centered, window)
+            cov = cross - s1 * b1 / window
+            var = b2 - b1 ** 2 / window
+            beta = np.where(var > 0, cov / var, 1.0)
+
+    # Drawdown from the trailing window peak (window + 1 equity points span `window` returns)
+    windows = np.lib.stride_tricks.sliding_window_view(equity, window + 1)
+    drawdown = (windows[:, -1] / windows.max(axis=1) - 1) * 100
+
+    return {
+        "volatility": _pad(std * annualize * 100, n),
+        "sharpe_ratio": _pad(sharpe, n),
+        "sortino_ratio": _pad(sortino, n),
+        "beta": _pad(beta, n),
+        "drawdown": _pad(drawdown, n),
+    }
+
+
+# ===== Incremental engine =====
+
+class _SlidingMoments:
+    """Sliding-window mean/variance with Welford add/remove updates."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = self.mean
+        self.count -= 1
+        self.mean = (old_mean * (self.count + 1) - x) / self.count
+        self.m2 = max(self.m2 - (x - old_mean) * (x - self.mean), 0.0)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class _SlidingComoment:
+    """Sliding-window covariance between portfolio and benchmark returns."""
+
+    __slots__ = ("count", "mean_x", "mean_y", "c_xy", "m2_y")
+
+    def __init__(self):
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.c_xy = 0.0
+        self.m2_y = 0.0
+
+    def add(self, x: float, y: float):
+        self.count += 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.count
+        self.mean_y += dy / self.count
+        self.c_xy += dx * (y - self.mean_y)
+        self.m2_y += dy * (y - self.mean_y)
+
+    def remove(self, x: float, y: float):
+        if self.count <= 1:
+            self.count, self.mean_x, self.mean_y, self.c_xy, self.m2_y = 0, 0.0, 0.0, 0.0, 0.0
+            return
+        old_mx, old_my = self.mean_x, self.mean_y
+        self.count -= 1
+        self.mean_x = (old_mx * (self.count + 1) - x) / self.count
+        self.mean_y = (old_my * (self.count + 1) - y) / self.count
+        self.c_xy -= (x - old_mx) * (y - self.mean_y)
+        self.m2_y = max(self.m2_y - (y - old_my) * (y - self.mean_y), 0.0)
+
+    @property
+    def beta(self) -> float:
+        return self.c_xy / self.m2_y if self.count > 1 and self.m2_y > 0 else 1.0
+
+
+class _WindowState:
+    """Running statistics for one window length."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.returns = _SlidingMoments()
+        self.downside = _SlidingMoments()
+        self.comoment = _SlidingComoment()
+        # Monotonic deque of (bar index, equity) for the trailing window peak
+        self.peaks: deque = deque()
+
+
+class RollingMetricsEngine:
+    """
+    Incremental rolling metrics over one or more window lengths.
+
+    Call `update(equity, benchmark)` once per bar; each call touches only the
+    values entering and leaving every window, so the cost is independent of
+    how much history has been seen.
+    """
+
+    def __init__(
+        self,
+        windows: tuple[int, ...] = (20, 60),
+        risk_free_rate: float = 0.05,
+        periods_per_year: int = 252,
+    ):
+        if not windows or min(windows) < 2:
+            raise ValueError("Rolling windows must be at least 2 bars")
+        self.windows = tuple(sorted(set(windows)))
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year
+        self._states = {w: _WindowState(w) for w in self.windows}
+
+        # Ring buffers holding the last max(window) returns
+        size = self.windows[-1] + 1
+        self._ret_buf = np.zeros(size)
+        self._ret_set = np.zeros(size, dtype=bool)
+        self._bench_buf = np.zeros(size)
+        self._bench_set = np.zeros(size, dtype=bool)
+        self._n_bars = 0
+        self._last_equity: Optional[float] = None
+        self._last_benchmark: Optional[float] = None
+
+    @property
+    def bars(self) -> int:
+        return self._n_bars
+
+    def update(self, equity: float, benchmark: Optional[float] = None) -> dict[int, dict]:
+        """Append one bar and return the current metrics for every window."""
+        equity = float(equity)
+        bar = self._n_bars
+        self._n_bars += 1
+
+        for state in self._states.values():
+            peaks = state.peaks
+            while peaks and peaks[-1][1] <= equity:
+                peaks.pop()
+            peaks.append((bar, equity))
+            # A window of `w` returns spans `w + 1` equity points
+            while peaks[0][0] <= bar - state.window - 1:
+                peaks.popleft()
+
+        prev_equity, self._last_equity = self._last_equity, equity
+        prev_bench = self._last_benchmark
+        self._last_benchmark = float(benchmark) if benchmark is not None else None
+
+        if prev_equity is None:
+            return self.snapshot()
+
+        # A bar after zero equity has no defined return; its slot still ages
+        # out of every window, but is masked out of the statistics
+        valid = prev_equity != 0
+        r = equity / prev_equity - 1 if valid else 0.0
+        has_bench = valid and prev_bench is not None and self._last_benchmark is not None and prev_bench != 0
+        b = self._last_benchmark / prev_bench - 1 if has_bench else 0.0
+
+        size = self._ret_buf.size
+        idx = (self._n_bars - 2) % size
+        self._ret_buf[idx] = r
+        self._ret_set[idx] = valid
+        self._bench_buf[idx] = b
+        self._bench_set[idx] = has_bench
+        n_returns = self._n_bars - 1
+
+        for state in self._states.values():
+            if valid:
+                state.returns.add(r)
+                if r < 0:
+                    state.downside.add(r)
+            if has_bench:
+                state.comoment.add(r, b)
+
+            if n_returns > state.window:
+                old_idx = (idx - state.window) % size
+                old_r = float(self._ret_buf[old_idx])
+                if self._ret_set[old_idx]:
+                    state.returns.remove(old_r)
+                    if old_r < 0:
+                        state.downside.remove(old_r)
+                if self._bench_set[old_idx]:
+                    state.comoment.remove(old_r, float(self._bench_buf[old_idx]))
+
+        return self.snapshot()
+
+    def snapshot(self) -> dict[int, dict]:
+        """Current metrics keyed by window length (None until the window is full)."""
+        annualize = math.sqrt(self.periods_per_year)
+        rf = self.risk_free_rate / self.periods_per_year
+        result = {}
+        for w, state in self._states.items():
+            # Full once `w` return slots have been seen, even if some are masked
+            if self._n_bars - 1 < w:
+                result[w] = None
+                continue
+
+            std = state.returns.std
+            excess_mean = state.returns.mean - rf
+            down_std = state.downside.std
+            peak = state.peaks[0][1]
+            result[w] = {
+                "volatility": std * annualize * 100,
+                "sharpe_ratio": excess_mean / std * annualize if std > 0 else 0.0,
+                "sortino_ratio": excess_mean / down_std * annualize if down_std > 0 else 0.0,
+                "beta": state.comoment.beta,
+                "drawdown": (self._last_equity / peak - 1) * 100 if peak else 0.0,
+            }
+        return result
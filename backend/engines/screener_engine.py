@@ -0,0 +1,306 @@
+"""
+Screener Engine — Cross-sectional stock screening over the synced universe.
+
+All synced tickers are held in a columnar in-memory table: one numpy array
+per field (company info, key stats and latest price data), one row per
+ticker. Filters become vectorized boolean masks and sorting is a single
+argsort, so a screen over thousands of tickers touches no JSON at all.
+
+The table is loaded from the JSON database on first use and then kept
+current through `admin_data_engine` sync listeners: each sync or delete
+updates only that ticker's row.
+"""
+import math
+from typing import Any, Optional
+
+import numpy as np
+
+from engines.admin_data_engine import add_sync_listener, get_all_synced_tickers, get_synced_data
+
+STRING_FIELDS = ("ticker", "name", "sector", "industry", "country", "exchange", "currency")
+# Price fields plus the `stats` keys written by `admin_data_engine.sync_ticker`
+NUMERIC_FIELDS = (
+    "price", "change_percent", "volume", "data_points",
+    "market_cap", "enterprise_value", "pe_ratio", "forward_pe", "peg_ratio", "pb_ratio", "ps_ratio",
+    "dividend_yield", "dividend_rate", "beta", "fifty_two_week_high", "fifty_two_week_low",
+    "fifty_day_average", "two_hundred_day_average", "avg_volume", "avg_volume_10d",
+    "shares_outstanding", "float_shares", "roe", "roa", "revenue", "gross_profit", "ebitda",
+    "net_income", "total_debt", "total_cash", "operating_cashflow", "free_cashflow",
+    "profit_margin", "operating_margin", "revenue_growth", "earnings_growth",
+)
+FILTER_OPS = ("gt", "gte", "lt", "lte", "eq", "ne", "between", "in", "contains")
+DEFAULT_COLUMNS = ("ticker", "name", "sector", "price", "change_percent", "market_cap", "pe_ratio")
+MAX_PAGE_SIZE = 500
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _flatten(ticker: str, record: dict) -> dict[str, Any]:
+    """One synced record as a flat row of screener fields."""
+    company = record.get("company") or {}
+    bars = record.get("ohlcv") or []
+    last_close = bars[-1]["close"] if bars else None
+    prev_close = bars[-2]["close"] if len(bars) > 1 else None
+    price = record.get("current_price") or last_close
+
+    row: dict[str, Any] = {"ticker": record.get("ticker", ticker)}
+    for field in STRING_FIELDS[1:]:
+        row[field] = str(company.get(field) or "")
+    row["price"] = _to_float(price)
+    row["change_percent"] = (
+        (last_close / prev_close - 1) * 100 if last_close and prev_close else math.nan
+    )
+    row["volume"] = _to_float(bars[-1].get("volume") if bars else None)
+    row["data_points"] = float(len(bars))
+    for field, value in (record.get("stats") or {}).items():
+        if field not in row:
+            row[field] = _to_float(value)
+    return row
+
+
+class _ScreenerTable:
+    """Columnar table with O(1) row upsert and delete (swap with the last row)."""
+
+    def __init__(self):
+        self.columns: dict[str, np.ndarray] = {}
+        self.index: dict[str, int] = {}
+        self.size = 0
+        self.capacity = 0
+        self.loaded = False
+
+    def _new_column(self, field: str) -> np.ndarray:
+        if field in STRING_FIELDS:
+            return np.full(self.capacity, "", dtype=object)
+        return np.full(self.capacity, np.nan)
+
+    def _grow(self, needed: int):
+        if needed <= self.capacity:
+            return
+        old = self.capacity
+        self.capacity = max(needed, old * 2, 64)
+        for field, column in self.columns.items():
+            grown = self._new_column(field)
+            grown[:old] = column
+            self.columns[field] = grown
+
+    def upsert(self, row: dict[str, Any]):
+        ticker = row["ticker"]
+        position = self.index.get(ticker)
+        if position is None:
+            self._grow(self.size + 1)
+            position = self.size
+            self.index[ticker] = position
+            self.size += 1
+        for field in row:
+            if field not in self.columns:
+                self.columns[field] = self._new_column(field)
+        for field, column in self.columns.items():
+            column[position] = row.get(field, "" if field in STRING_FIELDS else np.nan)
+
+    def delete(self, ticker: str):
+        position = self.index.pop(ticker, None)
+        if position is None:
+            return
+        last = self.size - 1
+        if position != last:
+            moved = self.columns["ticker"][last]
+            for column in self.columns.values():
+                column[position] = column[last]
+            self.index[moved] = position
+        for field, column in self.columns.items():
+            column[last] = "" if field in STRING_FIELDS else np.nan
+        self.size -= 1
+
+    def view(self, field: str) -> np.ndarray:
+        """Live rows of a column; a known field no synced ticker has yet reads as all missing."""
+        if field not in self.columns:
+            if field in STRING_FIELDS:
+                return np.full(self.size, "", dtype=object)
+            return np.full(self.size, np.nan)
+        return self.columns[field][:self.size]
+
+
+_table = _ScreenerTable()
+
+
+def _on_sync(ticker: str, record: Optional[dict]):
+    """Keep the loaded table current as tickers are synced or deleted."""
+    if not _table.loaded:
+        return
+    if record is None:
+        _table.delete(ticker)
+    else:
+        _table.upsert(_flatten(ticker, record))
+
+
+add_sync_listener(_on_sync)
+
+
+def refresh_screener(tickers: Optional[list[str]] = None):
+    """Reload rows from the JSON database (all synced tickers when `tickers` is None)."""
+    if tickers is None:
+        _table.__init__()
+        tickers = get_all_synced_tickers()
+    for ticker in tickers:
+        record = get_synced_data(ticker)
+        if record is None:
+            _table.delete(ticker.upper().strip())
+        else:
+            _table.upsert(_flatten(ticker, record))
+    _table.loaded = True
+
+
+def _ensure_loaded():
+    if not _table.loaded:
+        refresh_screener()
+
+
+def _numeric_fields() -> list[str]:
+    """Known numeric fields plus any extra stats found in synced records."""
+    return list(NUMERIC_FIELDS) + [f for f in _table.columns if f not in STRING_FIELDS and f not in NUMERIC_FIELDS]
+
+
+def _check_field(field: str, kind: str = "field"):
+    if field not in STRING_FIELDS and field not in _numeric_fields():
+        raise ValueError(f"Unknown screener {kind} '{field}'")
+
+
+def get_screener_fields() -> dict[str, list[str]]:
+    """Filterable fields grouped by type."""
+    _ensure_loaded()
+    return {"string": list(STRING_FIELDS), "numeric": _numeric_fields(), "operators": list(FILTER_OPS)}
+
+
+def lookup(tickers: list[str], fields: list[str]) -> dict[str, np.ndarray]:
+    """
+    Screener fields for `tickers`, aligned with their order.
+
+    Reads the in-memory table, so callers needing company info or stats
+    for many tickers avoid parsing each JSON record again. Tickers that are
+    not synced read as missing ("" or NaN).
+    """
+    _ensure_loaded()
+    for field in fields:
+        _check_field(field)
+    positions = np.array([_table.index.get(t.upper().strip(), -1) for t in tickers], dtype=int)
+    found = positions >= 0
+    result = {}
+    for field in fields:
+        if field in STRING_FIELDS:
+            values = np.full(len(tickers), "", dtype=object)
+        else:
+            values = np.full(len(tickers), np.nan)
+        values[found] = _table.view(field)[positions[found]]
+        result[field] = values
+    return result
+
+
+def _mask(field: str, op: str, value: Any) -> np.ndarray:
+    """Boolean mask for one filter; missing values never match."""
+    _check_field(field)
+    if op not in FILTER_OPS:
+        raise ValueError(f"Unknown filter operator '{op}'. Available: {list(FILTER_OPS)}")
+    if op == "in" and not isinstance(value, (list, tuple)):
+        raise ValueError(f"Operator 'in' on '{field}' needs a list of values")
+    if op == "between" and (not isinstance(value, (list, tuple)) or len(value) != 2):
+        raise ValueError(f"Operator 'between' on '{field}' needs a [low, high] pair")
+    column = _table.view(field)
+
+    if field in STRING_FIELDS:
+        lowered = np.char.lower(column.astype(str))
+        if op == "eq":
+            return lowered == str(value).lower()
+        if op == "ne":
+            return lowered != str(value).lower()
+        if op == "in":
+            return np.isin(lowered, [str(v).lower() for v in value])
+        if op == "contains":
+            return np.char.find(lowered, str(value).lower()) >= 0
+        raise ValueError(f"Operator '{op}' is not supported for text field '{field}'")
+
+    with np.errstate(invalid="ignore"):
+        if op == "between":
+            low, high = value
+            return (column >= float(low)) & (column <= float(high))
+        if op == "in":
+            return np.isin(column, [float(v) for v in value])
+        if op == "contains":
+            raise ValueError(f"Operator 'contains' is not supported for numeric field '{field}'")
+        target = float(value)
+        return {
+            "gt": column > target,
+            "gte": column >= target,
+            "lt": column < target,
+            "lte": column <= target,
+            "eq": column == target,
+            "ne": np.isfinite(column) & (column != target),
+        }[op]
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 4) if math.isfinite(value) else None
+    return value
+
+
+def screen(
+    filters: Optional[list[dict]] = None,
+    sort_by: Optional[str] = "market_cap",
+    descending: bool = True,
+    page: int = 1,
+    page_size: int = 50,
+    columns: Optional[list[str]] = None,
+) -> dict:
+    """
+    Filter, sort and page the synced universe.
+
+    `filters` is a list of {"field", "op", "value"} conditions combined with
+    AND. Rows with a missing sort value are placed last in either direction.
+    """
+    _ensure_loaded()
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+
+    fields = list(columns or DEFAULT_COLUMNS)
+    for field in fields:
+        _check_field(field, "column")
+    if sort_by:
+        _check_field(sort_by, "sort field")
+
+    mask = np.ones(_table.size, dtype=bool)
+    for condition in filters or []:
+        mask &= _mask(condition["field"], condition.get("op", "eq"), condition.get("value"))
+    rows = np.flatnonzero(mask)
+
+    if sort_by:
+        values = _table.view(sort_by)[rows]
+        if sort_by in STRING_FIELDS:
+            order = np.argsort(values.astype(str), kind="stable")
+            if descending:
+                order = order[::-1]
+        else:
+            missing = ~np.isfinite(values)
+            keys = np.where(missing, 0.0, -values if descending else values)
+            order = np.lexsort((keys, missing))
+        rows = rows[order]
+
+    start = (page - 1) * page_size
+    page_rows = rows[start:start + page_size]
+    data = {field: _table.view(field)[page_rows] for field in fields}
+    results = [
+        {field: _json_value(data[field][i]) for field in fields}
+        for i in range(page_rows.size)
+    ]
+
+    return {
+        "total": int(rows.size),
+        "page": page,
+        "page_size": page_size,
+        "pages": math.ceil(rows.size / page_size) if rows.size else 0,
+        "results": results,
+    }
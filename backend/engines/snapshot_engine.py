@@ -0,0 +1,152 @@
+"""
+Snapshot Engine — Daily `portfolio_snapshots` rows from a replayed ledger.
+
+`build_snapshots` turns the output of `ledger_engine.replay_ledger` into one
+row per date: value, cash, daily and total P/L, benchmark performance, and
+trailing-window Sharpe, Sortino, volatility and beta from
+`rolling_engine.rolling_metrics`, plus max drawdown to date. Every column is
+computed for the whole date range with array operations. P/L is net of
+deposits and withdrawals, and percentages and ratios come from the ledger's
+time-weighted return index, so external cash flows are not performance.
+
+`build_upsert` renders any number of rows as multi-row
+INSERT ... ON CONFLICT (portfolio_id, date) DO UPDATE statements, so a
+nightly run writes thousands of snapshots in a handful of round trips.
+"""
+import math
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from engines.ledger_engine import forward_fill
+from engines.rolling_engine import rolling_metrics
+
+SNAPSHOT_COLUMNS = (
+    "portfolio_id", "date", "total_value", "cash_balance", "positions_value",
+    "daily_pnl", "daily_pnl_percent", "total_return", "total_return_percent",
+    "benchmark_value", "benchmark_return", "sharpe_ratio", "sortino_ratio",
+    "max_drawdown", "volatility", "beta",
+)
+DEFAULT_WINDOW = 63
+# NUMERIC(8, 4) columns hold at most ±9999.9999
+_RATIO_LIMIT = 9999.9999
+_RATIO_COLUMNS = (
+    "daily_pnl_percent", "total_return_percent", "benchmark_return", "sharpe_ratio",
+    "sortino_ratio", "max_drawdown", "volatility", "beta",
+)
+# Rows per INSERT, keeping bind parameters well under PostgreSQL's 65535 limit
+UPSERT_CHUNK_ROWS = 1000
+
+
+def _column(values: np.ndarray, digits: int, limit: Optional[float] = None) -> list[Optional[float]]:
+    if limit is not None:
+        values = np.clip(values, -limit, limit)
+    return [round(float(v), digits) if math.isfinite(v) else None for v in values]
+
+
+def build_snapshots(
+    portfolio_id: int,
+    ledger: dict,
+    benchmark: Optional[tuple[list[str], np.ndarray]] = None,
+    window: int = DEFAULT_WINDOW,
+    dates: Optional[set[str]] = None,
+) -> list[dict]:
+    """
+    Snapshot rows for every date of a replayed ledger.
+
+    `benchmark` is (dates, closes) for the portfolio's benchmark symbol.
+    Rolling ratios are None until `window` returns are available. Pass
+    `dates` to keep only those days (e.g. the ones missing from the table);
+    the metrics are still computed over the full history.
+    """
+    axis = ledger["dates"]
+    equity = np.asarray(ledger["equity"], dtype=float)
+    n = equity.size
+    if n == 0:
+        return []
+
+    performance = np.asarray(ledger["performance"], dtype=float)
+    daily_pnl = np.asarray(ledger["daily_pnl"], dtype=float)
+    daily_pnl_percent = np.asarray(ledger["returns"], dtype=float) * 100
+    total_return = equity - np.asarray(ledger["net_contributions"], dtype=float)
+    total_return_percent = (performance - 1) * 100
+
+    bench_value = np.full(n, np.nan)
+    if benchmark is not None and len(benchmark[0]):
+        position = {d: i for i, d in enumerate(axis)}
+        for d, close in zip(*benchmark):
+            if d in position:
+                bench_value[position[d]] = close
+        bench_value = forward_fill(bench_value)
+    finite_bench = np.isfinite(bench_value)
+    first_bench = bench_value[finite_bench.argmax()] if finite_bench.any() else np.nan
+    bench_return = (bench_value / first_bench - 1) * 100
+
+    # Rolling ratios are aligned with returns; the first date has none
+    rolling = rolling_metrics(performance, window=window)
+    pad = np.array([np.nan])
+    sharpe, sortino, vol = (
+        np.concatenate((pad, rolling[k])) if n > 1 else np.full(n, np.nan)
+        for k in ("sharpe_ratio", "sortino_ratio", "volatility")
+    )
+    # Beta only over the span where the benchmark has prices
+    beta = np.full(n, np.nan)
+    if finite_bench.any():
+        b0 = int(finite_bench.argmax())
+        if n - b0 > 1:
+            beta[b0 + 1:] = rolling_metrics(
+                performance[b0:], window=window, benchmark_curve=bench_value[b0:],
+            )["beta"]
+
+    peak = np.maximum.accumulate(performance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_drawdown = np.minimum.accumulate(np.where(peak > 0, (performance - peak) / peak * 100, 0.0))
+
+    columns = {
+        "total_value": _column(equity, 2),
+        "cash_balance": _column(np.asarray(ledger["cash"], dtype=float), 2),
+        "positions_value": _column(np.asarray(ledger["market_value"], dtype=float), 2),
+        "daily_pnl": _column(daily_pnl, 2),
+        "daily_pnl_percent": daily_pnl_percent,
+        "total_return": _column(total_return, 2),
+        "total_return_percent": total_return_percent,
+        "benchmark_value": _column(bench_value, 2),
+        "benchmark_return": bench_return,
+        "sharpe_ratio": sharpe,
+        "sortino_ratio": sortino,
+        "max_drawdown": max_drawdown,
+        "volatility": vol,
+        "beta": beta,
+    }
+    for key in _RATIO_COLUMNS:
+        columns[key] = _column(columns[key], 4, _RATIO_LIMIT)
+
+    keep = range(n) if dates is None else [i for i, d in enumerate(axis) if d in dates]
+    return [
+        {
+            "portfolio_id": portfolio_id,
+            "date": date.fromisoformat(axis[i]),
+            **{key: values[i] for key, values in columns.items()},
+        }
+        for i in keep
+    ]
+
+
+def build_upsert(rows: list[dict]) -> list[tuple[str, dict]]:
+    """Multi-row upsert statements (SQL, values) for snapshot rows, chunked."""
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in SNAPSHOT_COLUMNS[2:])
+    statements = []
+    for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        chunk = rows[start:start + UPSERT_CHUNK_ROWS]
+        tuples, values = [], {}
+        for i, row in enumerate(chunk):
+            tuples.append("(" + ", ".join(f":{c}_{i}" for c in SNAPSHOT_COLUMNS) + ")")
+            values.update({f"{c}_{i}": row.get(c) for c in SNAPSHOT_COLUMNS})
+        sql = (
+            f"INSERT INTO portfolio_snapshots ({', '.join(SNAPSHOT_COLUMNS)}) "
+            f"VALUES {', '.join(tuples)} "
+            f"ON CONFLICT (portfolio_id, date) DO UPDATE SET {updates}"
+        )
+        statements.append((sql, values))
+    return statements
@@ -0,0 +1,101 @@
+"""
+Stream Engine — Incremental chart updates for live WebSocket subscribers.
+
+A subscriber first receives the whole figure, then only the rows appended
+since its last message, shaped for Plotly's
+`extendTraces(gd, update, indices, maxPoints)`. Each `ChartSubscription`
+remembers the index and the contents of the last row it sent. A poll
+therefore only looks at the tail of the series, and a still-forming bar
+(e.g. today's candle) is resent as a one-point `replace` instead of a full
+figure. If the last sent row is no longer in the series (history
+rewritten), a fresh figure is sent.
+"""
+import json
+import os
+from typing import Callable, Optional
+
+from engines.viz_engine import create_candlestick_chart, create_equity_curve_chart, encode_json, figure_to_json
+
+STREAM_INTERVAL = float(os.getenv("CHART_STREAM_INTERVAL", "5"))
+
+# Chart type -> (figure builder, one {trace attribute: row key} map per trace, in trace order)
+STREAM_CHARTS: dict[str, tuple[Callable, list[dict[str, str]]]] = {
+    "candlestick": (
+        create_candlestick_chart,
+        [{"x": "date", "open": "open", "high": "high", "low": "low", "close": "close"}],
+    ),
+    "equity_curve": (
+        create_equity_curve_chart,
+        [{"x": "date", "y": "portfolio"}, {"x": "date", "y": "benchmark"}],
+    ),
+}
+
+
+def trace_update(chart: str, rows: list[dict]) -> tuple[dict[str, list[list]], list[int]]:
+    """`extendTraces` update dict and trace indices for new rows of a stream chart."""
+    _, traces = STREAM_CHARTS[chart]
+    indices = [i for i, columns in enumerate(traces) if not rows or all(c in rows[0] for c in columns.values())]
+    update: dict[str, list[list]] = {}
+    for i in indices:
+        for attr, column in traces[i].items():
+            update.setdefault(attr, []).append([row[column] for row in rows])
+    return update, indices
+
+
+class ChartSubscription:
+    """One subscriber's position in a live chart: the rows sent so far and the last one."""
+
+    def __init__(self, chart: str, max_points: Optional[int] = None, lean: bool = False, **chart_kwargs):
+        if chart not in STREAM_CHARTS:
+            raise ValueError(f"Chart '{chart}' does not support streaming. Available: {list(STREAM_CHARTS)}")
+        self.chart = chart
+        self.max_points = max_points
+        self.lean = lean
+        self.chart_kwargs = chart_kwargs
+        self.last_index = 0
+        self._last_row: Optional[dict] = None
+
+    def figure(self, rows: list[dict]) -> str:
+        """Full-figure message; restarts the subscription from the end of `rows`."""
+        window = rows[-self.max_points:] if self.max_points else rows
+        builder, _ = STREAM_CHARTS[self.chart]
+        figure = encode_json(figure_to_json(builder(window, **self.chart_kwargs), self.lean))
+        self.last_index = len(rows)
+        self._last_row = rows[-1] if rows else None
+        header = encode_json({"type": "figure", "chart": self.chart, "last_index": self.last_index})
+        # Splice the serialized figure in rather than decoding and re-encoding it
+        return (header[:-1] + b',"figure":' + figure + b"}").decode("utf-8")
+
+    def delta(self, rows: list[dict]) -> Optional[str]:
+        """
+        Message bringing this subscriber up to date with `rows`, or None if nothing changed.
+
+        The last sent row is looked up by date from the end of `rows`, so only
+        the new tail is inspected, and a rolling window (oldest rows dropping
+        off) still yields a delta.
+        """
+        if self._last_row is None:
+            return self.figure(rows) if rows else None
+
+        last_date = self._last_row["date"]
+        position = next((i for i in range(len(rows) - 1, -1, -1) if rows[i]["date"] <= last_date), None)
+        if position is None or rows[position]["date"] != last_date:
+            return self.figure(rows)
+
+        replace = int(rows[position] != self._last_row)
+        start = position + 1 - replace
+        if start == len(rows):
+            return None
+
+        update, indices = trace_update(self.chart, rows[start:])
+        self.last_index = len(rows)
+        self._last_row = rows[-1]
+        return json.dumps({
+            "type": "extend",
+            "chart": self.chart,
+            "update": update,
+            "indices": indices,
+            "replace": replace,
+            "last_index": self.last_index,
+            "max_points": self.max_points,
+        })
@@ -1,26 +1,98 @@
 """
 Visualization Engine — Interactive Plotly charts for financial data.
+
+`figure_payload` serves serialized charts from a bounded LRU cache keyed on
+the chart type and a fingerprint of the builder's inputs, so an unchanged
+chart skips both figure construction and JSON serialization. Entries expire
+after `FIGURE_CACHE_TTL` seconds. `figure_payloads` builds a batch of
+charts in parallel in a process pool, for multi-chart views like the dashboard.
+
+Payloads are the figure dict encoded once with orjson, with numeric arrays
+as base64 typed arrays that plotly.js decodes directly, instead of a JSON
+string wrapped in another JSON string. Lean payloads leave out the
+`plotly_dark` template (most of a small chart's bytes) and name it in
+`template_id`; the template itself is served once by `template_payload`.
 """
-import plotly.graph_objects as go
-import plotly.io as pio
-from typing import Optional
-import pandas as pd
+from __future__ import annotations
+
+import asyncio
+import base64
+import importlib.util
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Callable, Optional
 import numpy as np
 
-# Set default template
-pio.templates.default = "plotly_dark"
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+from engines.quant_engine import calculate_drawdown_analysis
+from engines.rolling_engine import rolling_volatility
+from engines.memo_engine import fingerprint
+from engines.downsample_engine import downsample_ohlc, lttb_union
+from engines.covariance_engine import cluster_order
+
+VALIDATE_FIGURES = os.getenv("VALIDATE_FIGURES", "false").lower() == "true"
+FIGURE_CACHE_MAX_ENTRIES = 256
+# numpy dtype -> plotly.js typed array code
+_TYPED_ARRAY_CODES = {
+    "f8": "f8", "f4": "f4", "i1": "i1", "u1": "u1", "i2": "i2", "u2": "u2", "i4": "i4", "u4": "u4",
+}
+FIGURE_CACHE_TTL = 300.0
+# Template shared by every chart; lean payloads reference it by name instead of embedding it
+CHART_TEMPLATE = "plotly_dark"
+# Largest heatmaps that still print cell values / axis tick labels
+CORRELATION_TEXT_LIMIT = 25
+CORRELATION_LABEL_LIMIT = 80
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_figure_cache: "OrderedDict[tuple, tuple[float, bytes]]" = OrderedDict()
+_figure_stats = {"hits": 0, "misses": 0}
+_chart_pool: Optional[ProcessPoolExecutor] = None
+_template_payloads: dict[str, bytes] = {}
+
+
+
+def _lazy_module(name: str):
+    """Import `name` on first attribute access rather than now (importlib's LazyLoader)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# pandas and plotly only load when the first chart is built
+pd = _lazy_module("pandas")
+go = _lazy_module("plotly.graph_objects")
+pio = _lazy_module("plotly.io")
+
+
+def _empty_figure() -> go.Figure:
+    return go.Figure(layout={"template": CHART_TEMPLATE})
 
 
 def create_candlestick_chart(
     ohlcv_data: list[dict],
     title: str = "Price Chart",
     height: int = 500,
+    max_points: Optional[int] = None,
 ) -> go.Figure:
-    """Create an interactive candlestick chart."""
+    """Create an interactive candlestick chart, aggregated to at most `max_points` candles."""
     if not ohlcv_data:
-        return go.Figure()
+        return _empty_figure()
 
-    df = pd.DataFrame(ohlcv_data)
+    df = pd.DataFrame(downsample_ohlc(ohlcv_data, max_points))
     df["date"] = pd.to_datetime(df["date"])
 
     fig = go.Figure(
@@ -43,7 +115,7 @@ def create_candlestick_chart(
         height=height,
         xaxis_title="Date",
         yaxis_title="Price ($)",
-        template="plotly_dark",
+        template=CHART_TEMPLATE,
         xaxis_rangeslider_visible=False,
         showlegend=False,
         margin=dict(l=60, r=20, t=50, b=20),
@@ -59,12 +131,16 @@ def create_line_chart(
     x_column: str = "date",
     colors: Optional[list[str]] = None,
     height: int = 400,
+    max_points: Optional[int] = None,
 ) -> go.Figure:
-    """Create a multi-line chart for time series data."""
+    """Create a multi-line chart for time series data, LTTB-downsampled to `max_points` per line."""
     if not data:
-        return go.Figure()
+        return _empty_figure()
 
     df = pd.DataFrame(data)
+    keep = lttb_union([df[c].to_numpy(dtype=float) for c in y_columns if c in df.columns], max_points)
+    if keep is not None:
+        df = df.iloc[keep]
     if x_column in df.columns:
         df[x_column] = pd.to_datetime(df[x_column])
 
@@ -90,7 +166,7 @@ def create_line_chart(
         height=height,
         xaxis_title="Date",
         yaxis_title="Value",
-        template="plotly_dark",
+        template=CHART_TEMPLATE,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
         margin=dict(l=60, r=20, t=50, b=20),
         hovermode="x unified",
@@ -103,6 +179,7 @@ def create_equity_curve_chart(
     equity_data: list[dict],
     title: str = "Portfolio Performance",
     height: int = 400,
+    max_points: Optional[int] = None,
 ) -> go.Figure:
     """Create an equity curve comparison chart."""
     return create_line_chart(
@@ -112,6 +189,7 @@ def create_equity_curve_chart(
         x_column="date",
         colors=["#2979FF", "#FF4081"],
         height=height,
+        max_points=max_points,
     )
 
 
@@ -119,22 +197,37 @@ def create_drawdown_chart(
     equity_curve: list[float],
     title: str = "Drawdown Analysis",
     height: int = 350,
+    analysis: Optional[dict] = None,
+    max_points: Optional[int] = None,
 ) -> go.Figure:
-    """Create a drawdown chart showing underwater periods."""
+    """
+    Create a drawdown chart showing underwater periods.
+
+    Pass the result of `calculate_drawdown_analysis` as `analysis` to reuse
+    it; the deepest episodes' troughs are marked on the chart. With
+    `max_points` the line is LTTB-downsampled, always keeping the troughs.
+    """
     if not equity_curve or len(equity_curve) < 2:
-        return go.Figure()
+        return _empty_figure()
 
-    arr = np.array(equity_curve)
-    peak = np.maximum.accumulate(arr)
-    drawdown = (arr - peak) / peak * 100
+    if analysis is None:
+        analysis = calculate_drawdown_analysis(equity_curve)
+    drawdown = analysis["drawdown"]
     dates = pd.date_range(start="2024-01-01", periods=len(equity_curve), freq="D")
+    episodes = analysis.get("episodes") or []
+    keep = lttb_union([drawdown], max_points)
+    if keep is None:
+        line_x, line_y = dates, drawdown
+    else:
+        keep = np.union1d(keep, [e["trough"] for e in episodes]).astype(int)
+        line_x, line_y = dates[keep], np.asarray(drawdown)[keep]
 
     fig = go.Figure()
 
     fig.add_trace(
         go.Scatter(
-            x=dates,
-            y=drawdown,
+            x=line_x,
+            y=line_y,
             name="Drawdown %",
             line=dict(color="#FF5252", width=1.5),
             fill="tozeroy",
@@ -142,12 +235,29 @@ def create_drawdown_chart(
         )
     )
 
+    if episodes:
+        fig.add_trace(
+            go.Scatter(
+                x=[dates[e["trough"]] for e in episodes],
+                y=[e["depth"] for e in episodes],
+                name="Deepest Troughs",
+                mode="markers",
+                marker=dict(color="#FFD740", size=8, symbol="triangle-down"),
+                customdata=[
+                    [e["length"], e["recovery_duration"] if e["recovery_duration"] is not None else "ongoing"]
+                    for e in episodes
+                ],
+                hovertemplate="%{y:.2f}%<br>Length: %{customdata[0]} bars"
+                              "<br>Recovery: %{customdata[1]} bars<extra></extra>",
+            )
+        )
+
     fig.update_layout(
         title=title,
         height=height,
         xaxis_title="Date",
         yaxis_title="Drawdown (%)",
-        template="plotly_dark",
+        template=CHART_TEMPLATE,
         margin=dict(l=60, r=20, t=50, b=20),
     )
 
@@ -161,7 +271,7 @@ def create_returns_distribution_chart(
 ) -> go.Figure:
     """Create a histogram of returns distribution."""
     if not returns or len(returns) < 2:
-        return go.Figure()
+        return _empty_figure()
 
     fig = go.Figure()
 
@@ -189,7 +299,7 @@ def create_returns_distribution_chart(
         height=height,
         xaxis_title="Return",
         yaxis_title="Frequency",
-        template="plotly_dark",
+        template=CHART_TEMPLATE,
         margin=dict(l=60, r=20, t=50, b=20),
         showlegend=False,
     )
@@ -204,7 +314,7 @@ def create_sector_allocation_chart(
 ) -> go.Figure:
     """Create a pie chart showing sector allocation."""
     if not positions:
-        return go.Figure()
+        return _empty_figure()
 
     # Calculate sector weights
     sector_values = {}
@@ -234,7 +344,7 @@ def create_sector_allocation_chart(
     fig.update_layout(
         title=title,
         height=height,
-        template="plotly_dark",
+        template=CHART_TEMPLATE,
         margin=dict(l=20, r=20, t=50, b=20),
     )
 
@@ -246,14 +356,17 @@ def create_volatility_chart(
     window: int = 20,
     title: str = "Rolling Volatility",
     height: int = 350,
+    max_points: Optional[int] = None,
 ) -> go.Figure:
-    """Create a rolling volatility chart."""
+    """Create a rolling volatility chart, LTTB-downsampled to `max_points`."""
     if not returns or len(returns) < window:
-        return go.Figure()
+        return _empty_figure()
 
-    arr = np.array(returns)
     dates = pd.date_range(start="2024-01-01", periods=len(returns), freq="D")
-    rolling_vol = pd.Series(arr).rolling(window=window).std() * np.sqrt(252) * 100
+    rolling_vol = rolling_volatility(returns, window=window)
+    keep = lttb_union([rolling_vol], max_points)
+    if keep is not None:
+        dates, rolling_vol = dates[keep], np.asarray(rolling_vol)[keep]
 
     fig = go.Figure()
 
@@ -273,7 +386,7 @@ def create_volatility_chart(
         height=height,
         xaxis_title="Date",
         yaxis_title="Volatility (%)",
-        template="plotly_dark",
+        template=CHART_TEMPLATE,
         margin=dict(l=60, r=20, t=50, b=20),
     )
 
@@ -285,39 +398,275 @@ def create_correlation_heatmap(
     title: str = "Correlation Matrix",
     height: int = 400,
 ) -> go.Figure:
-    """Create a correlation heatmap for multiple assets."""
+    """Create a clustered correlation heatmap from per-asset return series."""
     if not returns_dict or len(returns_dict) < 2:
-        return go.Figure()
+        return _empty_figure()
+
+    corr = pd.DataFrame(returns_dict).corr().to_numpy()
+    order = cluster_order(corr)
+    labels = list(returns_dict)
+    return create_correlation_matrix_chart(
+        corr[np.ix_(order, order)], [labels[i] for i in order], title=title, height=height,
+    )
 
-    # Create DataFrame from returns
-    df = pd.DataFrame(returns_dict)
-    corr_matrix = df.corr()
 
+def create_correlation_matrix_chart(
+    correlation: np.ndarray,
+    labels: list[str],
+    title: str = "Correlation Matrix",
+    height: Optional[int] = None,
+) -> go.Figure:
+    """
+    Heatmap of a precomputed (already ordered) correlation matrix.
+
+    Cell values are only printed up to `CORRELATION_TEXT_LIMIT` assets and
+    tick labels up to `CORRELATION_LABEL_LIMIT`; beyond that the hover
+    carries them. z is sent as float32.
+    """
+    n = len(labels)
+    if n < 2:
+        return _empty_figure()
+
+    z = np.asarray(correlation, dtype=np.float32)
+    heatmap = dict(
+        z=z,
+        x=labels,
+        y=labels,
+        colorscale="RdBu",
+        zmin=-1,
+        zmax=1,
+        zmid=0,
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>",
+    )
+    if n <= CORRELATION_TEXT_LIMIT:
+        heatmap.update(text=np.round(z, 2), texttemplate="%{text}", textfont={"size": 10})
+
+    fig = go.Figure(data=go.Heatmap(**heatmap))
+    show_labels = n <= CORRELATION_LABEL_LIMIT
+    fig.update_layout(
+        title=title,
+        height=height or int(min(max(400, 12 * n + 150), 1200)),
+        xaxis=dict(title="Asset", showticklabels=show_labels),
+        yaxis=dict(title="Asset", showticklabels=show_labels, autorange="reversed"),
+        template=CHART_TEMPLATE,
+        margin=dict(l=80, r=20, t=50, b=80),
+    )
+
+    return fig
+
+
+def create_correlation_pairs_chart(
+    pairs: list[dict],
+    title: str = "Most Correlated Pairs",
+    height: Optional[int] = None,
+) -> go.Figure:
+    """Horizontal bar chart of the top correlated pairs from `covariance_engine.top_correlated_pairs`."""
+    if not pairs:
+        return _empty_figure()
+
+    values = [p["correlation"] for p in pairs]
     fig = go.Figure(
-        data=go.Heatmap(
-            z=corr_matrix.values,
-            x=corr_matrix.columns,
-            y=corr_matrix.index,
-            colorscale="RdBu",
-            zmid=0,
-            text=corr_matrix.round(2),
-            texttemplate="%{text}",
-            textfont={"size": 10},
+        data=go.Bar(
+            x=values,
+            y=[f"{p['a']} / {p['b']}" for p in pairs],
+            orientation="h",
+            marker_color=["#00E676" if v >= 0 else "#FF1744" for v in values],
+            hovertemplate="%{y}: %{x:.2f}<extra></extra>",
         )
     )
 
     fig.update_layout(
         title=title,
-        height=height,
-        xaxis_title="Asset",
-        yaxis_title="Asset",
-        template="plotly_dark",
-        margin=dict(l=80, r=20, t=50, b=80),
+        height=height or max(300, 24 * len(pairs) + 120),
+        xaxis=dict(title="Correlation", range=[-1, 1]),
+        yaxis=dict(autorange="reversed"),
+        template=CHART_TEMPLATE,
+        margin=dict(l=140, r=20, t=50, b=50),
     )
 
     return fig
 
 
-def figure_to_json(fig: go.Figure) -> dict:
-    """Convert Plotly figure to JSON for API response."""
-    return pio.to_json(fig, validate=True)
+def figure_to_json(fig: go.Figure, lean: bool = False) -> dict:
+    """
+    Convert a Plotly figure to a JSON-ready dict for API responses.
+
+    Properties are already validated as the figure is built, so the full
+    re-validation pass only runs when VALIDATE_FIGURES=true (development).
+    Otherwise traces and layout are taken as-is, skipping the whole-figure
+    copy and base64 packing of `fig.to_dict()`; arrays stay numpy arrays
+    for `encode_json`.
+
+    With `lean`, the layout's template is dropped and named in `template_id`
+    instead; clients fetch it once from `template_payload`.
+    """
+    if VALIDATE_FIGURES:
+        spec = json.loads(pio.to_json(fig, validate=True))
+    else:
+        spec = {"data": [trace.to_plotly_json() for trace in fig.data], "layout": fig.layout.to_plotly_json()}
+    if lean:
+        spec["layout"].pop("template", None)
+        spec["template_id"] = CHART_TEMPLATE
+    return spec
+
+
+def template_payload(name: str = CHART_TEMPLATE) -> bytes:
+    """Serialized Plotly template for lean chart payloads (raises KeyError if unknown)."""
+    if name not in _template_payloads:
+        if name not in pio.templates:
+            raise KeyError(name)
+        _template_payloads[name] = encode_json(pio.templates[name].to_plotly_json())
+    return _template_payloads[name]
+
+
+def _typed_array(arr: np.ndarray):
+    """Numeric arrays as plotly.js typed-array specs (base64 bytes); others as lists."""
+    if arr.dtype.kind in "iu" and arr.dtype.itemsize == 8:
+        fits = arr.size == 0 or (arr.min() >= np.iinfo(np.int32).min and arr.max() <= np.iinfo(np.int32).max)
+        arr = arr.astype(np.int32 if fits else np.float64)
+    code = _TYPED_ARRAY_CODES.get(arr.dtype.str.lstrip("<|="))
+    if code is None:
+        if arr.dtype.kind == "M":
+            return np.datetime_as_string(arr, unit="auto").tolist()
+        return arr.tolist()
+    spec = {"dtype": code, "bdata": base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode("ascii")}
+    if arr.ndim > 1:
+        spec["shape"] = ",".join(map(str, arr.shape))
+    return spec
+
+
+def _json_default(obj):
+    """Fallback for values orjson does not encode itself (numpy, pandas, Decimal)."""
+    if isinstance(obj, np.ndarray):
+        return _typed_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return _typed_array(obj.to_numpy())
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def encode_json(obj) -> bytes:
+    """Encode a figure dict to UTF-8 JSON bytes; numeric arrays become base64 typed arrays."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_payload(fig: go.Figure, lean: bool = False) -> bytes:
+    """Response body for a figure, as sent by the chart endpoints."""
+    return encode_json(figure_to_json(fig, lean))
+
+
+def _figure_key(chart_type: str, args: tuple, kwargs: dict, lean: bool = False) -> tuple:
+    return (
+        chart_type,
+        lean,
+        tuple(fingerprint(a) for a in args),
+        tuple(sorted((k, fingerprint(v)) for k, v in kwargs.items())),
+    )
+
+
+def _cached_payload(key: tuple) -> Optional[bytes]:
+    entry = _figure_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < FIGURE_CACHE_TTL:
+        _figure_stats["hits"] += 1
+        _figure_cache.move_to_end(key)
+        return entry[1]
+    _figure_stats["misses"] += 1
+    return None
+
+
+def _store_payload(key: tuple, payload: bytes):
+    _figure_cache[key] = (time.monotonic(), payload)
+    _figure_cache.move_to_end(key)
+    while len(_figure_cache) > FIGURE_CACHE_MAX_ENTRIES:
+        _figure_cache.popitem(last=False)
+
+
+def _build_payload(builder: Callable[..., go.Figure], args: tuple, kwargs: dict, lean: bool = False) -> bytes:
+    """Build and serialize one figure (runs in a chart worker process)."""
+    return _encode_payload(builder(*args, **kwargs), lean)
+
+
+def figure_payload(
+    chart_type: str, builder: Callable[..., go.Figure], *args, lean: bool = False, **kwargs,
+) -> bytes:
+    """
+    Serialized payload of `builder(*args, **kwargs)`, served from the figure cache.
+
+    The key is the chart type plus a fingerprint of every argument, so any
+    change in the data or layout parameters builds a fresh entry. `lean`
+    payloads reference the template by name (see `figure_to_json`).
+    """
+    key = _figure_key(chart_type, args, kwargs, lean)
+    payload = _cached_payload(key)
+    if payload is None:
+        payload = _build_payload(builder, args, kwargs, lean)
+        _store_payload(key, payload)
+    return payload
+
+
+def _warm_chart_worker():
+    """Pool initializer: load pandas and plotly up front, since workers exist only to build charts."""
+    _encode_payload(_empty_figure())
+    pd.DataFrame()
+
+
+def start_chart_pool(workers: int = CHART_WORKERS) -> ProcessPoolExecutor:
+    """Start (or return) the chart builder pool."""
+    global _chart_pool
+    if _chart_pool is None:
+        _chart_pool = ProcessPoolExecutor(max_workers=max(workers, 1), initializer=_warm_chart_worker)
+        # Submitting no-ops makes the executor spawn (and warm) its workers now
+        for _ in range(max(workers, 1)):
+            _chart_pool.submit(int)
+    return _chart_pool
+
+
+def shutdown_chart_pool():
+    """Stop the chart builder pool; it restarts lazily on the next build."""
+    global _chart_pool
+    if _chart_pool is not None:
+        _chart_pool.shutdown(wait=False, cancel_futures=True)
+        _chart_pool = None
+
+
+async def figure_payloads(specs: list[tuple], lean: bool = False) -> list[bytes]:
+    """
+    Payloads for several `(chart_type, builder, args, kwargs)` specs at once.
+
+    Cache hits are served directly; misses are built concurrently in the
+    chart process pool (figure construction is pure Python and holds the GIL),
+    so a cold batch takes about as long as its slowest chart.
+    """
+    loop = asyncio.get_running_loop()
+    payloads: list[Optional[bytes]] = [None] * len(specs)
+    pending = {}
+    for i, (chart_type, builder, args, kwargs) in enumerate(specs):
+        key = _figure_key(chart_type, args, kwargs, lean)
+        payloads[i] = _cached_payload(key)
+        if payloads[i] is None:
+            pending[i] = (key, loop.run_in_executor(start_chart_pool(), _build_payload, builder, args, kwargs, lean))
+
+    if pending:
+        built = await asyncio.gather(*(future for _, future in pending.values()))
+        for (i, (key, _)), payload in zip(pending.items(), built):
+            _store_payload(key, payload)
+            payloads[i] = payload
+    return payloads
+
+
+def clear_figure_cache():
+    """Drop all cached figure payloads and reset the hit counters."""
+    _figure_cache.clear()
+    _figure_stats.update(hits=0, misses=0)
+
+
+def get_figure_cache_stats() -> dict:
+    """Figure cache size and hit/miss counters."""
+    return {"entries": len(_figure_cache), **_figure_stats}
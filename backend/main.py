@@ -6,18 +6,35 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from routers import data, portfolio, chat, brief, admin, charts
+from routers import data, portfolio, chat, brief, admin, charts, backtest, screener
 from db.connection import init_db, close_db
+from engines.image_engine import start_image_pool, shutdown_image_pool
+from engines.viz_engine import start_chart_pool, shutdown_chart_pool
+from engines.risk_engine import start_var_pool, shutdown_var_pool
+from engines.backtest_engine import start_sweep_pool, shutdown_sweep_pool
+from engines.admin_data_engine import init_data_store
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle manager."""
     print("🚀 Cube Trade Backend starting...")
-    # Initialize database
+    # Initialize database and the JSON data store
     await init_db()
+    init_data_store()
+    # Warm the static chart renderer so the first image request is fast
+    start_image_pool()
+    # Start the chart builders so the first dashboard is built in parallel
+    start_chart_pool()
+    # Start the Monte Carlo VaR and parameter sweep workers once instead of per request
+    start_var_pool()
+    start_sweep_pool()
     yield
     # Cleanup on shutdown
+    shutdown_sweep_pool()
+    shutdown_var_pool()
+    shutdown_chart_pool()
+    shutdown_image_pool()
     await close_db()
     print("👋 Cube Trade Backend shutting down...")
 
@@ -45,6 +62,8 @@ app.include_router(chat.router, prefix="/api/chat", tags=["AI Chat"])
 app.include_router(brief.router, prefix="/api/brief", tags=["Market Brief"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(charts.router, prefix="/api/charts", tags=["Charts & Visualization"])
+app.include_router(backtest.router, prefix="/api/backtest", tags=["Backtest Engine"])
+app.include_router(screener.router, prefix="/api/screener", tags=["Screener"])
 
 
 @app.get("/")
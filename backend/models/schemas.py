@@ -2,7 +2,7 @@
 Pydantic schemas for Cube Trade API request/response models.
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Union
 
 
 # ===== Data Engine Schemas =====
@@ -13,6 +13,28 @@ class OHLCVResponse(BaseModel):
     count: int
 
 
+class IndicatorRequest(BaseModel):
+    tickers: list[str] = Field(..., min_length=1, max_length=1000)
+    indicator: str = Field(..., pattern="^(sma|ema|rsi|macd|bollinger|atr|vwap)$")
+    params: dict[str, Optional[float]] = Field(default_factory=dict)
+    last_n: Optional[int] = Field(default=None, ge=1)
+
+
+class ScreenerFilter(BaseModel):
+    field: str
+    op: str = Field(default="eq", pattern="^(gt|gte|lt|lte|eq|ne|between|in|contains)$")
+    value: Union[float, str, list[Union[float, str]]]
+
+
+class ScreenerRequest(BaseModel):
+    filters: list[ScreenerFilter] = Field(default_factory=list)
+    sort_by: Optional[str] = "market_cap"
+    descending: bool = True
+    page: int = Field(default=1, ge=1)
+    page_size: int = Field(default=50, ge=1, le=500)
+    columns: Optional[list[str]] = None
+
+
 # ===== Portfolio Schemas =====
 class PositionInput(BaseModel):
     symbol: str
@@ -33,6 +55,26 @@ class PortfolioMetricsResponse(BaseModel):
     total_return_percent: float
 
 
+class OptimizeRequest(BaseModel):
+    tickers: list[str] = Field(..., min_length=2, max_length=1000)
+    objective: str = Field(default="max_sharpe", pattern="^(min_variance|max_sharpe|target_return|risk_parity)$")
+    target_return: Optional[float] = None
+    window: int = Field(default=252, ge=20, le=2520)
+    max_position_size: Optional[float] = Field(default=None, gt=0, le=1)
+    max_sector_exposure: Optional[float] = Field(default=None, gt=0, le=1)
+    risk_free_rate: float = Field(default=0.05, ge=0, le=0.5)
+    frontier_points: int = Field(default=0, ge=0, le=200)
+
+
+class AttributionRequest(BaseModel):
+    holdings: dict[str, float] = Field(..., min_length=1)
+    benchmark: Optional[list[str]] = Field(default=None, max_length=2000)
+    benchmark_symbol: Optional[str] = "VOO"
+    period: str = Field(default="monthly", pattern="^(weekly|monthly|quarterly|yearly)$")
+    start: Optional[str] = None
+    factor_window: int = Field(default=63, ge=20, le=504)
+
+
 class PositionResponse(BaseModel):
     symbol: str
     name: str
@@ -80,3 +122,26 @@ class BriefResponse(BaseModel):
 # ===== Admin Schemas =====
 class BulkSyncRequest(BaseModel):
     tickers: list[str] = Field(..., min_length=1, max_length=50)
+
+
+# ===== Backtest Schemas =====
+class BacktestRequest(BaseModel):
+    tickers: list[str] = Field(..., min_length=1, max_length=500)
+    strategy: str = "sma_crossover"
+    params: dict = Field(default_factory=dict)
+    initial_capital: float = Field(default=100000.0, gt=0)
+    commission: float = Field(default=0.001, ge=0, le=0.05)
+    sizing: str = Field(default="equal", pattern="^(equal|fixed)$")
+    position_size: Optional[float] = Field(default=None, gt=0, le=1)
+    max_position_size: Optional[float] = Field(default=None, gt=0, le=1)
+    execution_lag: int = Field(default=1, ge=0, le=5)
+    benchmark_symbol: Optional[str] = None
+
+
+class BacktestSweepRequest(BaseModel):
+    tickers: list[str] = Field(..., min_length=1, max_length=500)
+    strategy: str = "sma_crossover"
+    param_grid: dict[str, list] = Field(..., min_length=1)
+    initial_capital: float = Field(default=100000.0, gt=0)
+    commission: float = Field(default=0.001, ge=0, le=0.05)
+    sizing: str = Field(default="equal", pattern="^(equal|fixed)$")
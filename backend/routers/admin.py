@@ -1,6 +1,9 @@
 """
 Admin Router — Admin-only endpoints for data management, sync, and monitoring.
 """
+from datetime import date
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException, Query
 from engines.admin_data_engine import (
     sync_ticker,
@@ -14,6 +17,7 @@ from engines.admin_data_engine import (
     get_logs,
     PRESET_TICKERS,
 )
+from engines.fx_engine import sync_fx_rates, get_ticker_currencies, DEFAULT_CURRENCIES
 from models.schemas import BulkSyncRequest
 
 router = APIRouter()
@@ -55,6 +59,30 @@ async def api_sync_preset(preset_name: str):
     return result
 
 
+@router.post("/snapshots/materialize")
+async def api_materialize_snapshots(
+    start: Optional[date] = Query(default=None, description="First date to write (YYYY-MM-DD)"),
+    end: Optional[date] = Query(default=None, description="Last date to write (YYYY-MM-DD)"),
+    overwrite: bool = Query(default=False),
+):
+    """Value all active portfolios and upsert missing daily snapshots."""
+    from db.snapshots import materialize_snapshots
+
+    return await materialize_snapshots(start=start, end=end, overwrite=overwrite)
+
+
+@router.post("/fx/sync")
+async def api_sync_fx(
+    currencies: Optional[list[str]] = Query(default=None, description="Currencies to sync against USD"),
+    period: str = Query(default="5y"),
+):
+    """Sync daily USD FX crosses (default: common currencies plus those of all synced tickers)."""
+    if not currencies:
+        quoted = get_ticker_currencies(get_all_synced_tickers()).values()
+        currencies = sorted(set(DEFAULT_CURRENCIES) | set(quoted))
+    return sync_fx_rates(currencies, period=period)
+
+
 @router.get("/status")
 async def api_sync_status():
     """Get sync status for all tickers in the database."""
@@ -0,0 +1,73 @@
+"""
+Backtest Router — Strategy backtests and parameter sweeps over synced data.
+"""
+from fastapi import APIRouter, HTTPException
+from engines.backtest_engine import run_strategy, run_parameter_sweep, STRATEGIES
+from models.schemas import BacktestRequest, BacktestSweepRequest
+
+router = APIRouter()
+
+MAX_SWEEP_COMBINATIONS = 500
+
+
+@router.get("/strategies")
+async def api_strategies():
+    """List available signal rules."""
+    return {"strategies": list(STRATEGIES.keys())}
+
+
+# Plain `def` endpoints: FastAPI runs these CPU-bound calls in its threadpool, off the event loop
+@router.post("/run")
+def api_run_backtest(request: BacktestRequest):
+    """Backtest a named strategy over synced tickers."""
+    if request.strategy not in STRATEGIES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Strategy '{request.strategy}' not found. Available: {list(STRATEGIES.keys())}",
+        )
+
+    try:
+        return run_strategy(
+            request.tickers,
+            strategy=request.strategy,
+            params=request.params,
+            benchmark_symbol=request.benchmark_symbol,
+            initial_capital=request.initial_capital,
+            commission=request.commission,
+            sizing=request.sizing,
+            position_size=request.position_size,
+            max_position_size=request.max_position_size,
+            execution_lag=request.execution_lag,
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/sweep")
+def api_parameter_sweep(request: BacktestSweepRequest):
+    """Backtest every parameter combination in parallel and rank by Sharpe ratio."""
+    if request.strategy not in STRATEGIES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Strategy '{request.strategy}' not found. Available: {list(STRATEGIES.keys())}",
+        )
+
+    combinations = 1
+    for values in request.param_grid.values():
+        combinations *= max(len(values), 1)
+    if combinations > MAX_SWEEP_COMBINATIONS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_SWEEP_COMBINATIONS} parameter combinations per sweep")
+
+    try:
+        results = run_parameter_sweep(
+            request.tickers,
+            request.strategy,
+            request.param_grid,
+            initial_capital=request.initial_capital,
+            commission=request.commission,
+            sizing=request.sizing,
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"strategy": request.strategy, "results": results, "total": len(results)}
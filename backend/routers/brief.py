@@ -3,7 +3,7 @@ Brief Router — Today's Market Brief generation and retrieval.
 """
 from fastapi import APIRouter
 from models.schemas import BriefResponse, BriefSection
-from engines.glm_engine import generate_morning_brief
+from engines.glm_engine import generate_morning_brief_async
 from datetime import datetime
 
 router = APIRouter()
@@ -12,7 +12,7 @@ router = APIRouter()
 @router.get("/today", response_model=BriefResponse)
 async def get_today_brief():
     """Get today's market brief."""
-    brief_data = generate_morning_brief()
+    brief_data = await generate_morning_brief_async()
     today = datetime.now()
 
     # Parse content into sections or use defaults
@@ -1,8 +1,12 @@
 """
 Charts Router — API endpoints for interactive Plotly charts.
 """
-from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
 from engines.viz_engine import (
     create_candlestick_chart,
     create_equity_curve_chart,
@@ -11,16 +15,38 @@ from engines.viz_engine import (
     create_sector_allocation_chart,
     create_volatility_chart,
     create_correlation_heatmap,
-    figure_to_json,
+    create_correlation_matrix_chart,
+    create_correlation_pairs_chart,
+    figure_payload,
+    figure_payloads,
+    encode_json,
+    template_payload,
 )
 from engines.data_engine import get_ohlcv
-from engines.quant_engine import calculate_portfolio_metrics
+from engines.quant_engine import calculate_portfolio_metrics, calculate_drawdown_analysis, curve_intermediates
+from engines.memo_engine import memoized
+from engines.covariance_engine import (
+    COVARIANCE_METHODS,
+    DEFAULT_WINDOW,
+    get_correlation_view,
+    top_correlated_pairs,
+)
+from engines.admin_data_engine import PRESET_TICKERS
+from engines.downsample_engine import points_for_width
+from engines.stream_engine import ChartSubscription, STREAM_INTERVAL
+from engines.image_engine import render_image, IMAGE_FORMATS, DEFAULT_WIDTH, DEFAULT_HEIGHT
 
 router = APIRouter()
 
+DASHBOARD_CHARTS = ("equity_curve", "drawdown", "sector_allocation", "returns_distribution")
+DASHBOARD_SECTIONS = DASHBOARD_CHARTS + ("metrics",)
+TEMPLATE_MAX_AGE = 86400
+LEAN_QUERY = Query(False, description="Omit the layout template and reference it by `template_id`")
+
 # Mock data for demo
 _mock_equity = [194000 + i * 148 + (i % 7 - 3) * 520 for i in range(365)]
 _mock_benchmark = [194000 + i * 90 + (i % 5 - 2) * 310 for i in range(365)]
+_mock_tags = ("portfolio:demo",)
 _mock_returns = [0.001 * (i % 10 - 4.5) + 0.0005 * (i % 7) for i in range(365)]
 _mock_positions = [
     {"symbol": "AAPL", "name": "Apple Inc.", "shares": 150, "cost_basis": 142.5, "sector": "Technology"},
@@ -32,24 +58,24 @@ _mock_positions = [
 ]
 
 
-@router.get("/candlestick")
-async def get_candlestick_chart(
-    ticker: str = Query("AAPL", description="Stock ticker symbol"),
-    period: str = Query("1y", description="Time period"),
-):
-    """Get interactive candlestick chart for a stock."""
+def _chart_response(payload: bytes) -> Response:
+    """Serve a chart's cached payload bytes as-is."""
+    return Response(content=payload, media_type="application/json")
+
+
+def _candlestick_payload(
+    ticker: str, period: str, max_points: Optional[int] = None, lean: bool = False,
+) -> Optional[bytes]:
     ohlcv_data = get_ohlcv(ticker, period=period)
-    
     if not ohlcv_data:
-        return {"error": f"No data found for {ticker}"}
-    
-    fig = create_candlestick_chart(ohlcv_data, title=f"{ticker} Price Chart")
-    return JSONResponse(content=figure_to_json(fig))
+        return None
+    return figure_payload(
+        "candlestick", create_candlestick_chart, ohlcv_data, title=f"{ticker} Price Chart",
+        max_points=max_points, lean=lean,
+    )
 
 
-@router.get("/equity-curve")
-async def get_equity_curve_chart():
-    """Get interactive portfolio equity curve chart."""
+def _mock_equity_rows() -> list[dict]:
     from datetime import datetime, timedelta
 
     start = datetime(2024, 1, 1)
@@ -61,63 +87,352 @@ async def get_equity_curve_chart():
             "portfolio": round(port, 2),
             "benchmark": round(bench, 2),
         })
+    return data
+
+
+def _equity_curve_payload(max_points: Optional[int] = None, lean: bool = False) -> bytes:
+    return figure_payload(
+        "equity_curve", create_equity_curve_chart, _mock_equity_rows(),
+        title="Portfolio vs Benchmark Performance", max_points=max_points, lean=lean,
+    )
+
+
+def _drawdown_payload(max_points: Optional[int] = None, lean: bool = False) -> bytes:
+    drawdowns = memoized(calculate_drawdown_analysis, _mock_equity, tags=_mock_tags)
+    return figure_payload(
+        "drawdown", create_drawdown_chart, _mock_equity,
+        title="Portfolio Drawdown Analysis", analysis=drawdowns, max_points=max_points, lean=lean,
+    )
+
+
+def _returns_distribution_payload(lean: bool = False) -> bytes:
+    return figure_payload(
+        "returns_distribution", create_returns_distribution_chart, _mock_returns,
+        title="Daily Returns Distribution", lean=lean,
+    )
+
+
+def _sector_allocation_payload(lean: bool = False) -> bytes:
+    return figure_payload(
+        "sector_allocation", create_sector_allocation_chart, _mock_positions,
+        title="Portfolio Sector Allocation", lean=lean,
+    )
+
+
+def _volatility_payload(window: int = 20, max_points: Optional[int] = None, lean: bool = False) -> bytes:
+    return figure_payload(
+        "volatility", create_volatility_chart, _mock_returns,
+        window=window, title=f"{window}-Day Rolling Volatility", max_points=max_points, lean=lean,
+    )
+
+
+async def _correlation_universe(
+    preset: Optional[str],
+    tickers: Optional[str],
+    watchlist_id: Optional[int],
+    portfolio_id: Optional[int],
+) -> Optional[list[str]]:
+    """Tickers from a preset, list, watchlist or portfolio; None when none was given."""
+    if preset:
+        if preset not in PRESET_TICKERS:
+            raise HTTPException(
+                status_code=404, detail=f"Preset '{preset}' not found. Available: {list(PRESET_TICKERS)}",
+            )
+        symbols = PRESET_TICKERS[preset]
+    elif tickers:
+        symbols = tickers.split(",")
+    elif watchlist_id is not None:
+        from db.connection import get_watchlist_symbols
+
+        symbols = [r._mapping["symbol"] for r in await get_watchlist_symbols(watchlist_id)]
+        if not symbols:
+            raise HTTPException(status_code=404, detail=f"Watchlist {watchlist_id} not found or empty")
+    elif portfolio_id is not None:
+        from db.connection import get_active_positions
+
+        symbols = [r._mapping["symbol"] for r in await get_active_positions(portfolio_id)]
+        if not symbols:
+            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found or has no positions")
+    else:
+        return None
+    return sorted({s.upper().strip() for s in symbols if s.strip()})
+
+
+def _correlation_payload(lean: bool = False) -> bytes:
+    # Mock correlation data for demo
+    returns_dict = {
+        "AAPL": _mock_returns,
+        "MSFT": [r * 0.9 for r in _mock_returns],
+        "NVDA": [r * 1.3 for r in _mock_returns],
+        "GOOGL": [r * 0.85 for r in _mock_returns],
+        "AMZN": [r * 0.95 for r in _mock_returns],
+    }
+    return figure_payload(
+        "correlation", create_correlation_heatmap, returns_dict, title="Asset Correlation Matrix", lean=lean,
+    )
+
+
+@router.get("/candlestick")
+async def get_candlestick_chart(
+    ticker: str = Query("AAPL", description="Stock ticker symbol"),
+    period: str = Query("1y", description="Time period"),
+    max_points: Optional[int] = Query(None, ge=3, le=20000, description="Maximum candles to send"),
+    width: Optional[int] = Query(None, ge=50, le=10000, description="Target chart width in pixels"),
+    lean: bool = LEAN_QUERY,
+):
+    """Get interactive candlestick chart for a stock."""
+    payload = _candlestick_payload(ticker, period, points_for_width(width, max_points, candles=True), lean)
+    if payload is None:
+        return {"error": f"No data found for {ticker}"}
+    return _chart_response(payload)
 
-    fig = create_equity_curve_chart(data, title="Portfolio vs Benchmark Performance")
-    return JSONResponse(content=figure_to_json(fig))
+
+@router.get("/equity-curve")
+async def get_equity_curve_chart(
+    max_points: Optional[int] = Query(None, ge=3, le=20000, description="Maximum points per line"),
+    width: Optional[int] = Query(None, ge=50, le=10000, description="Target chart width in pixels"),
+    lean: bool = LEAN_QUERY,
+):
+    """Get interactive portfolio equity curve chart."""
+    return _chart_response(_equity_curve_payload(points_for_width(width, max_points), lean))
 
 
 @router.get("/drawdown")
-async def get_drawdown_chart():
+async def get_drawdown_chart(
+    max_points: Optional[int] = Query(None, ge=3, le=20000, description="Maximum points to send"),
+    width: Optional[int] = Query(None, ge=50, le=10000, description="Target chart width in pixels"),
+    lean: bool = LEAN_QUERY,
+):
     """Get interactive drawdown analysis chart."""
-    fig = create_drawdown_chart(_mock_equity, title="Portfolio Drawdown Analysis")
-    return JSONResponse(content=figure_to_json(fig))
+    return _chart_response(_drawdown_payload(points_for_width(width, max_points), lean))
 
 
 @router.get("/returns-distribution")
-async def get_returns_distribution_chart():
+async def get_returns_distribution_chart(lean: bool = LEAN_QUERY):
     """Get returns distribution histogram."""
-    fig = create_returns_distribution_chart(_mock_returns, title="Daily Returns Distribution")
-    return JSONResponse(content=figure_to_json(fig))
+    return _chart_response(_returns_distribution_payload(lean))
 
 
 @router.get("/sector-allocation")
-async def get_sector_allocation_chart():
+async def get_sector_allocation_chart(lean: bool = LEAN_QUERY):
     """Get sector allocation pie chart."""
-    fig = create_sector_allocation_chart(_mock_positions, title="Portfolio Sector Allocation")
-    return JSONResponse(content=figure_to_json(fig))
+    return _chart_response(_sector_allocation_payload(lean))
 
 
 @router.get("/volatility")
 async def get_volatility_chart(
     window: int = Query(20, description="Rolling window in days"),
+    max_points: Optional[int] = Query(None, ge=3, le=20000, description="Maximum points to send"),
+    width: Optional[int] = Query(None, ge=50, le=10000, description="Target chart width in pixels"),
+    lean: bool = LEAN_QUERY,
 ):
     """Get rolling volatility chart."""
-    fig = create_volatility_chart(_mock_returns, window=window, title=f"{window}-Day Rolling Volatility")
-    return JSONResponse(content=figure_to_json(fig))
+    return _chart_response(_volatility_payload(window, points_for_width(width, max_points), lean))
 
 
 @router.get("/correlation")
-async def get_correlation_heatmap():
-    """Get correlation heatmap for portfolio assets."""
-    # Mock correlation data for demo
-    returns_dict = {
-        "AAPL": _mock_returns,
-        "MSFT": [r * 0.9 for r in _mock_returns],
-        "NVDA": [r * 1.3 for r in _mock_returns],
-        "GOOGL": [r * 0.85 for r in _mock_returns],
-        "AMZN": [r * 0.95 for r in _mock_returns],
+async def get_correlation_heatmap(
+    preset: Optional[str] = Query(None, description=f"Preset universe: {', '.join(PRESET_TICKERS)}"),
+    tickers: Optional[str] = Query(None, description="Comma-separated tickers"),
+    watchlist_id: Optional[int] = Query(None, description="Watchlist to use as the universe"),
+    portfolio_id: Optional[int] = Query(None, description="Portfolio whose open positions form the universe"),
+    window: int = Query(DEFAULT_WINDOW, ge=2, le=2520, description="Trailing window in trading days"),
+    method: str = Query("sample", description=f"One of {list(COVARIANCE_METHODS)}"),
+    cluster: bool = Query(True, description="Order assets by hierarchical clustering"),
+    view: str = Query("matrix", pattern="^(matrix|pairs)$", description="Full matrix or top-K pairs"),
+    top_k: int = Query(20, ge=1, le=500, description="Pairs shown in the pairs view"),
+    lean: bool = LEAN_QUERY,
+):
+    """Get a clustered correlation heatmap (or top correlated pairs) for a universe of synced tickers."""
+    universe = await _correlation_universe(preset, tickers, watchlist_id, portfolio_id)
+    if universe is None:
+        return _chart_response(_correlation_payload(lean))
+    if len(universe) < 2:
+        raise HTTPException(status_code=400, detail="A correlation chart needs at least two tickers")
+
+    try:
+        corr = memoized(get_correlation_view, universe, window=window, method=method, cluster=cluster, tags=universe)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(corr["tickers"]) < 2:
+        raise HTTPException(status_code=404, detail="Not enough overlapping price history for these tickers")
+
+    if view == "pairs":
+        pairs = memoized(top_correlated_pairs, corr["correlation"], corr["tickers"], k=top_k, tags=universe)
+        payload = figure_payload(
+            "correlation_pairs", create_correlation_pairs_chart, pairs,
+            title=f"Top {len(pairs)} Correlated Pairs", lean=lean,
+        )
+    else:
+        payload = figure_payload(
+            "correlation_matrix", create_correlation_matrix_chart, corr["correlation"], corr["tickers"],
+            title=f"Correlation Matrix ({len(corr['tickers'])} assets, {corr['observations']}d)", lean=lean,
+        )
+    return _chart_response(payload)
+
+
+@router.get("/templates/{template_id}")
+async def get_chart_template(template_id: str):
+    """Get a Plotly layout template referenced by lean chart payloads (cacheable)."""
+    try:
+        payload = template_payload(template_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Template '{template_id}' not found")
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={TEMPLATE_MAX_AGE}"},
+    )
+
+
+@router.get("/image/{chart}")
+async def get_chart_image(
+    chart: str,
+    format: str = Query("png", pattern=f"^({'|'.join(IMAGE_FORMATS)})$"),
+    width: int = Query(DEFAULT_WIDTH, ge=50, le=4000, description="Image width in pixels"),
+    height: int = Query(DEFAULT_HEIGHT, ge=50, le=4000, description="Image height in pixels"),
+    scale: float = Query(1.0, gt=0, le=4),
+    ticker: str = Query("AAPL", description="Ticker for the candlestick chart"),
+    period: str = Query("1y", description="Period for the candlestick chart"),
+    window: int = Query(20, description="Window for the volatility chart"),
+):
+    """Render any chart as a static PNG/SVG/JPEG/WebP/PDF image (cached)."""
+    builders = {
+        "candlestick": lambda: _candlestick_payload(ticker, period, points_for_width(width, candles=True)),
+        "equity-curve": lambda: _equity_curve_payload(points_for_width(width)),
+        "drawdown": lambda: _drawdown_payload(points_for_width(width)),
+        "returns-distribution": _returns_distribution_payload,
+        "sector-allocation": _sector_allocation_payload,
+        "volatility": lambda: _volatility_payload(window, points_for_width(width)),
+        "correlation": _correlation_payload,
     }
-    fig = create_correlation_heatmap(returns_dict, title="Asset Correlation Matrix")
-    return JSONResponse(content=figure_to_json(fig))
+    if chart not in builders:
+        raise HTTPException(status_code=404, detail=f"Chart '{chart}' not found. Available: {list(builders)}")
+    payload = builders[chart]()
+    if payload is None:
+        raise HTTPException(status_code=404, detail=f"No data found for {ticker}")
+
+    try:
+        image = await render_image(payload, format, width, height, scale)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Image rendering unavailable: {e}")
+    return Response(content=image, media_type=IMAGE_FORMATS[format])
 
 
 @router.get("/dashboard")
-async def get_dashboard_charts():
-    """Get all charts for the main dashboard."""
-    charts = {
-        "equity_curve": figure_to_json(create_equity_curve_chart(_mock_equity)),
-        "drawdown": figure_to_json(create_drawdown_chart(_mock_equity)),
-        "sector_allocation": figure_to_json(create_sector_allocation_chart(_mock_positions)),
-        "returns_distribution": figure_to_json(create_returns_distribution_chart(_mock_returns)),
-    }
-    return JSONResponse(content=charts)
+async def get_dashboard_charts(
+    charts: Optional[str] = Query(
+        None, description=f"Comma-separated subset of: {', '.join(DASHBOARD_SECTIONS)} (default: all charts)",
+    ),
+    lean: bool = LEAN_QUERY,
+):
+    """Get all charts for the main dashboard, built in parallel."""
+    names = [c.strip() for c in charts.split(",") if c.strip()] if charts else list(DASHBOARD_CHARTS)
+    # Repeated names would otherwise produce duplicate keys in the spliced body
+    names = list(dict.fromkeys(names))
+    unknown = [n for n in names if n not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown dashboard charts: {unknown}. Available: {list(DASHBOARD_SECTIONS)}",
+        )
+
+    # Returns and running peak are computed once and shared by drawdown and metrics
+    shared = None
+    if {"drawdown", "metrics"} & set(names):
+        shared = memoized(curve_intermediates, _mock_equity, tags=_mock_tags)
+
+    specs = {}
+    for name in names:
+        if name == "equity_curve":
+            specs[name] = ("equity_curve", create_equity_curve_chart, (_mock_equity_rows(),), {})
+        elif name == "drawdown":
+            drawdowns = memoized(calculate_drawdown_analysis, _mock_equity, peak=shared["peak"], tags=_mock_tags)
+            specs[name] = ("drawdown", create_drawdown_chart, (_mock_equity,), {"analysis": drawdowns})
+        elif name == "sector_allocation":
+            specs[name] = ("sector_allocation", create_sector_allocation_chart, (_mock_positions,), {})
+        elif name == "returns_distribution":
+            specs[name] = ("returns_distribution", create_returns_distribution_chart, (_mock_returns,), {})
+
+    sections = dict(zip(specs, await figure_payloads(list(specs.values()), lean)))
+    if "metrics" in names:
+        metrics = memoized(
+            calculate_portfolio_metrics, _mock_equity, _mock_benchmark,
+            returns=shared["returns"], peak=shared["peak"], tags=_mock_tags,
+        )
+        sections["metrics"] = encode_json(metrics)
+
+    # Splice the cached payloads into one object without re-encoding them
+    body = b"{" + b",".join(json.dumps(n).encode() + b":" + sections[n] for n in names) + b"}"
+    return Response(content=body, media_type="application/json")
+
+
+async def _stream_rows(chart: str, request: dict) -> list[dict]:
+    """Current rows of a streamed chart."""
+    if chart == "candlestick":
+        return await asyncio.to_thread(get_ohlcv, request.get("ticker", "AAPL"), request.get("period", "1y"))
+    return _mock_equity_rows()
+
+
+def _subscribe(request) -> ChartSubscription:
+    """Validate a subscription request from the client and start the subscription."""
+    if not isinstance(request, dict):
+        raise ValueError("Subscription request must be a JSON object")
+    for field in ("chart", "ticker", "period"):
+        if not isinstance(request.get(field, ""), str):
+            raise ValueError(f"'{field}' must be a string")
+    max_points = request.get("max_points")
+    if max_points is not None and (isinstance(max_points, bool) or not isinstance(max_points, int) or max_points < 1):
+        raise ValueError("'max_points' must be a positive integer or null")
+
+    chart = request.get("chart", "candlestick").replace("-", "_")
+    kwargs = {"title": f"{request.get('ticker', 'AAPL')} Price Chart"} if chart == "candlestick" else {}
+    return ChartSubscription(chart, max_points=max_points, lean=bool(request.get("lean")), **kwargs)
+
+
+@router.websocket("/stream")
+async def chart_stream(websocket: WebSocket):
+    """
+    Live chart subscription.
+
+    The client sends `{"chart": "candlestick", "ticker": "AAPL", "period": "1y",
+    "max_points": 500}` (or `"chart": "equity-curve"`) and receives the full
+    figure once, then `extend` messages with only the new or updated points
+    (for `Plotly.extendTraces`, after dropping `replace` trailing points).
+    Sending another request switches the subscription; a malformed one is
+    answered with `{"type": "error"}` and the current subscription continues.
+    """
+    await websocket.accept()
+    request, subscription = None, None
+
+    try:
+        while True:
+            try:
+                incoming = await asyncio.wait_for(
+                    websocket.receive_text(), timeout=STREAM_INTERVAL if subscription else None,
+                )
+            except asyncio.TimeoutError:
+                incoming = None
+
+            if incoming is not None:
+                try:
+                    parsed = json.loads(incoming)
+                except json.JSONDecodeError as e:
+                    await websocket.send_json({"type": "error", "content": f"Invalid JSON: {e}"})
+                    continue
+                try:
+                    subscription = _subscribe(parsed)
+                    request = parsed
+                except ValueError as e:
+                    await websocket.send_json({"type": "error", "content": str(e)})
+                    continue
+
+            if subscription is None:
+                continue
+            message = subscription.delta(await _stream_rows(subscription.chart, request))
+            if message is not None:
+                await websocket.send_text(message)
+
+    except WebSocketDisconnect:
+        pass
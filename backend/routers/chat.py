@@ -3,7 +3,7 @@ Chat Router — GLM-4 AI chat with WebSocket streaming support.
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from models.schemas import ChatRequest, ChatResponse
-from engines.glm_engine import chat_completion, chat_completion_stream
+from engines.glm_engine import chat_completion_async, chat_completion_stream
 from datetime import datetime
 import uuid
 import asyncio
@@ -14,7 +14,7 @@ router = APIRouter()
 @router.post("/message", response_model=ChatResponse)
 async def send_message(request: ChatRequest):
     """Send a message to GLM-4 and get a response."""
-    response_text = chat_completion(
+    response_text = await chat_completion_async(
         user_message=request.message,
         portfolio_context=None,  # TODO: inject real portfolio data
         market_data=None,
@@ -1,8 +1,13 @@
 """
 Data Router — Market data endpoints for OHLCV and company info.
 """
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException, Query
 from engines.data_engine import get_ohlcv, get_current_price, get_company_info
+from engines.indicator_engine import get_indicator_series
+from engines.fx_engine import get_fx_matrix, get_rate, BASE_CURRENCY
+from models.schemas import IndicatorRequest
 
 router = APIRouter()
 
@@ -37,3 +42,45 @@ async def fetch_company_info(ticker: str, provider: str = Query(default="yfinanc
     """Get company information for a ticker."""
     info = get_company_info(ticker, provider=provider)
     return {"ticker": ticker, **info, "provider": provider}
+
+
+@router.post("/indicators")
+async def fetch_indicators(request: IndicatorRequest):
+    """Compute a technical indicator for many synced tickers at once."""
+    try:
+        series = get_indicator_series(request.tickers, request.indicator, request.params, request.last_n)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not series:
+        raise HTTPException(status_code=404, detail="No synced data found for the requested tickers")
+
+    return {"indicator": request.indicator, "params": request.params, "data": series, "count": len(series)}
+
+
+@router.get("/fx")
+async def fetch_fx_rates():
+    """Synced currencies, date range and the latest rate of each per 1 USD."""
+    matrix = get_fx_matrix()
+    if not matrix["dates"]:
+        raise HTTPException(status_code=404, detail="No FX rates synced. Run /api/admin/fx/sync first")
+
+    return {
+        "base": BASE_CURRENCY,
+        "start": matrix["dates"][0],
+        "end": matrix["dates"][-1],
+        "rates": {c: float(matrix["rates"][i, -1]) for c, i in matrix["currencies"].items()},
+    }
+
+
+@router.get("/fx/rate")
+async def fetch_fx_rate(
+    from_currency: str = Query(...),
+    to_currency: str = Query(...),
+    on_date: Optional[str] = Query(default=None, description="YYYY-MM-DD, default latest"),
+):
+    """Units of `to_currency` per one unit of `from_currency`."""
+    try:
+        rate = get_rate(from_currency, to_currency, on_date)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"from": from_currency, "to": to_currency, "date": on_date, "rate": rate}
@@ -1,21 +1,36 @@
 """
 Portfolio Router — Portfolio metrics and position management.
 """
-from fastapi import APIRouter
-from engines.quant_engine import calculate_portfolio_metrics
-from models.schemas import PortfolioMetricsResponse
+import asyncio
+import json
+from datetime import date
+from functools import partial
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from engines.quant_engine import calculate_portfolio_metrics, calculate_drawdown_analysis
+from engines.risk_engine import calculate_var, VAR_METHODS
+from engines.optimizer_engine import optimize_portfolio, DEFAULT_RISK_LIMITS
+from engines.memo_engine import memoized
+from engines.ledger_engine import replay_ledger, closes_from_rows
+from engines.fx_engine import get_ticker_currencies
+from engines.attribution_engine import attribute_performance, PERIODS
+from engines.admin_data_engine import get_all_synced_tickers
+from models.schemas import PortfolioMetricsResponse, OptimizeRequest, AttributionRequest
 
 router = APIRouter()
 
 # Mock portfolio equity curve for demo
 _mock_equity = [194000 + i * 148 + (i % 7 - 3) * 520 for i in range(365)]
 _mock_benchmark = [194000 + i * 90 + (i % 5 - 2) * 310 for i in range(365)]
+_mock_tags = ("portfolio:demo",)
 
 
 @router.get("/metrics", response_model=PortfolioMetricsResponse)
 async def get_portfolio_metrics():
     """Calculate portfolio performance metrics."""
-    metrics = calculate_portfolio_metrics(_mock_equity, _mock_benchmark)
+    metrics = memoized(calculate_portfolio_metrics, _mock_equity, _mock_benchmark, tags=_mock_tags)
 
     net_liquidity = _mock_equity[-1]
     daily_pnl = _mock_equity[-1] - _mock_equity[-2]
@@ -35,6 +50,237 @@ async def get_portfolio_metrics():
     )
 
 
+@router.get("/drawdowns")
+async def get_portfolio_drawdowns(
+    top_n: int = Query(default=5, ge=1, le=100),
+):
+    """Get the deepest drawdown episodes with peak, trough and recovery dates."""
+    from datetime import datetime, timedelta
+
+    start = datetime(2024, 1, 1)
+    dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(len(_mock_equity))]
+    analysis = memoized(calculate_drawdown_analysis, _mock_equity, dates=dates, top_n=top_n, tags=_mock_tags)
+    return {
+        "max_drawdown": round(analysis["max_drawdown"], 2),
+        "current_drawdown": round(float(analysis["drawdown"][-1]), 2),
+        "episodes": [{**e, "depth": round(e["depth"], 2)} for e in analysis["episodes"]],
+    }
+
+
+@router.get("/{portfolio_id}/ledger")
+async def get_portfolio_ledger(portfolio_id: int):
+    """Rebuild positions, cash, P/L and the equity curve from the transaction ledger, in the portfolio's currency."""
+    from db.connection import (
+        get_portfolio_by_id,
+        get_portfolio_transactions,
+        get_portfolio_dividends,
+        get_market_closes,
+    )
+
+    portfolio = await get_portfolio_by_id(portfolio_id)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+
+    transactions = [dict(r._mapping) for r in await get_portfolio_transactions(portfolio_id)]
+    dividends = [dict(r._mapping) for r in await get_portfolio_dividends(portfolio_id)]
+    if not transactions:
+        return {"portfolio_id": portfolio_id, "currency": portfolio["currency"], "equity_data": [], "positions": [], "metrics": None}
+
+    symbols = sorted({t["symbol"] for t in transactions if t.get("symbol")})
+    start = min(t["executed_at"] for t in transactions).date()
+    dates, names, closes = closes_from_rows(
+        [dict(r._mapping) for r in await get_market_closes(symbols, start)]
+    )
+
+    currency = portfolio["currency"] or "USD"
+    quoted = {s: c for s, c in get_ticker_currencies(names, default=None).items() if c}
+    try:
+        ledger = replay_ledger(
+            transactions, dates, names, closes,
+            dividends=dividends,
+            initial_capital=float(portfolio["initial_capital"] or 0),
+            base_currency=currency,
+            price_currencies=quoted,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    tags = (f"portfolio:{portfolio_id}", *symbols)
+    # Risk and return from the time-weighted index, so deposits and withdrawals are not performance
+    metrics = {
+        **memoized(calculate_portfolio_metrics, ledger["performance"], tags=tags),
+        "total_return": round(float(ledger["equity"][-1] - ledger["net_contributions"][-1]), 2),
+        "total_return_percent": round(float(ledger["performance"][-1] - 1) * 100, 2),
+    }
+    equity_data = [
+        {
+            "date": d,
+            "equity": round(float(e), 2),
+            "cash": round(float(c), 2),
+            "market_value": round(float(m), 2),
+            "realized_pnl": round(float(r), 2),
+            "unrealized_pnl": round(float(u), 2),
+            "external_flow": round(float(f), 2),
+            "daily_pnl": round(float(p), 2),
+        }
+        for d, e, c, m, r, u, f, p in zip(
+            ledger["dates"], ledger["equity"], ledger["cash"], ledger["market_value"],
+            ledger["realized_pnl"], ledger["unrealized_pnl"], ledger["external_flows"], ledger["daily_pnl"],
+        )
+    ]
+    positions = [
+        {k: round(v, 4) if isinstance(v, float) else v for k, v in p.items()}
+        for p in ledger["positions"]
+    ]
+    return {
+        "portfolio_id": portfolio_id,
+        "currency": currency,
+        "equity_data": equity_data,
+        "positions": positions,
+        "metrics": metrics,
+    }
+
+
+@router.get("/{portfolio_id}/attribution")
+async def get_portfolio_attribution(
+    portfolio_id: int,
+    period: str = Query(default="monthly", description=f"One of {list(PERIODS)}"),
+    start: Optional[str] = Query(default=None, description="First date (YYYY-MM-DD)"),
+):
+    """Sector (Brinson) and factor attribution of the portfolio's current holdings vs its benchmark."""
+    from db.connection import get_portfolio_by_id, get_portfolio_transactions
+
+    portfolio = await get_portfolio_by_id(portfolio_id)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+
+    holdings: dict[str, float] = {}
+    for t in (dict(r._mapping) for r in await get_portfolio_transactions(portfolio_id)):
+        kind = str(t["transaction_type"]).lower()
+        if kind in ("buy", "sell"):
+            sign = 1 if kind == "buy" else -1
+            holdings[t["symbol"]] = holdings.get(t["symbol"], 0.0) + sign * float(t["shares"])
+    holdings = {s: n for s, n in holdings.items() if n > 1e-9}
+    if not holdings:
+        raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} has no open positions")
+
+    universe = get_all_synced_tickers()
+    compute = partial(
+        memoized, attribute_performance, holdings,
+        benchmark=universe, benchmark_symbol=portfolio["benchmark_symbol"], period=period, start=start,
+        tags=(f"portfolio:{portfolio_id}", *holdings, *universe),
+    )
+    try:
+        # Loads prices for the whole universe; keep that off the event loop
+        result = await asyncio.get_running_loop().run_in_executor(None, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"portfolio_id": portfolio_id, **result}
+
+
+@router.post("/attribution")
+async def api_attribution(request: AttributionRequest):
+    """Sector (Brinson) and factor attribution for holdings of synced tickers."""
+    universe = request.benchmark or get_all_synced_tickers()
+    compute = partial(
+        memoized, attribute_performance, request.holdings,
+        benchmark=universe, benchmark_symbol=request.benchmark_symbol, period=request.period,
+        start=request.start, factor_window=request.factor_window,
+        tags=(*(t.upper() for t in request.holdings), *universe),
+    )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{portfolio_id}/snapshots")
+async def get_portfolio_snapshots_history(
+    portfolio_id: int,
+    start: Optional[date] = Query(default=None, description="First date (YYYY-MM-DD)"),
+    end: Optional[date] = Query(default=None, description="Last date (YYYY-MM-DD)"),
+):
+    """Get precomputed daily value and risk metrics from portfolio_snapshots."""
+    from db.connection import get_portfolio_snapshots
+
+    rows = [dict(r._mapping) for r in await get_portfolio_snapshots(portfolio_id, start, end)]
+    snapshots = [
+        {k: float(v) if isinstance(v, Decimal) else v for k, v in row.items() if k not in ("id", "created_at")}
+        for row in rows
+    ]
+    return {
+        "portfolio_id": portfolio_id,
+        "latest": snapshots[-1] if snapshots else None,
+        "snapshots": snapshots,
+        "count": len(snapshots),
+    }
+
+
+@router.get("/var")
+async def get_portfolio_var(
+    confidence: float = Query(default=0.95, gt=0.5, lt=1.0),
+    horizon: int = Query(default=1, ge=1, le=252),
+    method: str = Query(default="historical", description="historical, parametric or monte_carlo"),
+):
+    """Get portfolio Value-at-Risk and Expected Shortfall."""
+    if method not in VAR_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{method}'. Available: {list(VAR_METHODS)}")
+
+    compute = partial(
+        memoized, calculate_var, _mock_equity, confidence=confidence, horizon=horizon, method=method, tags=_mock_tags
+    )
+    if method == "monte_carlo":
+        # Simulation waits on the shared process pool; keep that wait off the event loop
+        result = await asyncio.get_running_loop().run_in_executor(None, compute)
+    else:
+        result = compute()
+    net_liquidity = _mock_equity[-1]
+    return {
+        **result,
+        "var": round(result["var"], 2),
+        "cvar": round(result["cvar"], 2),
+        "var_amount": round(net_liquidity * result["var"] / 100, 2),
+        "cvar_amount": round(net_liquidity * result["cvar"] / 100, 2),
+    }
+
+
+async def _risk_limits() -> dict:
+    """The `risk_limits` system setting, with seeded defaults for missing keys."""
+    from db.connection import get_system_setting
+
+    row = await get_system_setting("risk_limits")
+    value = (row["value"] if row else None) or {}
+    if isinstance(value, str):
+        value = json.loads(value)
+    return {key: value.get(key, default) for key, default in DEFAULT_RISK_LIMITS.items()}
+
+
+@router.post("/optimize")
+async def api_optimize_portfolio(request: OptimizeRequest):
+    """Suggest portfolio weights for synced tickers under the risk limits."""
+    limits = await _risk_limits()
+    compute = partial(
+        optimize_portfolio,
+        request.tickers,
+        objective=request.objective,
+        target=request.target_return,
+        window=request.window,
+        max_position_size=(
+            limits["max_position_size"] if request.max_position_size is None else request.max_position_size
+        ),
+        max_sector_exposure=(
+            limits["max_sector_exposure"] if request.max_sector_exposure is None else request.max_sector_exposure
+        ),
+        risk_free_rate=request.risk_free_rate,
+        frontier_points=request.frontier_points,
+    )
+    try:
+        # Large universes take seconds to solve; keep the solve off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/equity-curve")
 async def get_equity_curve():
     """Get portfolio equity curve data for charting."""
@@ -0,0 +1,37 @@
+"""
+Screener Router — Cross-sectional filtering of the synced universe.
+"""
+from fastapi import APIRouter, HTTPException
+from engines.screener_engine import screen, get_screener_fields, refresh_screener
+from models.schemas import ScreenerRequest
+
+router = APIRouter()
+
+
+@router.post("")
+async def api_screen(request: ScreenerRequest):
+    """Filter, sort and page synced tickers by stats and latest prices."""
+    try:
+        return screen(
+            filters=[f.model_dump() for f in request.filters],
+            sort_by=request.sort_by,
+            descending=request.descending,
+            page=request.page,
+            page_size=request.page_size,
+            columns=request.columns,
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/fields")
+async def api_screener_fields():
+    """List filterable fields and operators."""
+    return get_screener_fields()
+
+
+@router.post("/refresh")
+async def api_refresh_screener():
+    """Reload the screener table from the JSON database."""
+    refresh_screener()
+    return {"status": "refreshed", "fields": len(get_screener_fields()["numeric"])}
@@ -5,6 +5,7 @@
 
 import { useEffect, useState } from 'react';
 import dynamic from 'next/dynamic';
+import { fetchChartSpec } from './chartSpec';
 
 const Plot = dynamic(() => import('react-plotly.js'), { ssr: false });
 
@@ -29,11 +30,7 @@ export default function CandlestickChart({
     const fetchChartData = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`/api/charts/candlestick?ticker=${ticker}&period=${period}`);
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        const data = await response.json();
+        const data = await fetchChartSpec(`/api/charts/candlestick?ticker=${ticker}&period=${period}`);
         setChartData(data);
         setError(null);
       } catch (err) {
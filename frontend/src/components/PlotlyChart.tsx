@@ -5,6 +5,7 @@
 
 import dynamic from 'next/dynamic';
 import { useEffect, useState } from 'react';
+import { fetchChartSpec } from './chartSpec';
 
 // Dynamically import Plot to avoid SSR issues
 const Plot = dynamic(() => import('react-plotly.js'), { ssr: false });
@@ -30,11 +31,7 @@ export default function PlotlyChart({
     const fetchChartData = async () => {
       try {
         setLoading(true);
-        const response = await fetch(dataUrl);
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        const data = await response.json();
+        const data = await fetchChartSpec(dataUrl);
         setChartData(data);
         setError(null);
       } catch (err) {
@@ -0,0 +1,35 @@
+/**
+ * Chart Spec - Fetch lean chart payloads and attach their shared layout template
+ */
+
+const API_BASE = '/api/charts';
+
+// One request per template for the lifetime of the page
+const templateCache = new Map<string, Promise<any>>();
+
+export function fetchTemplate(templateId: string): Promise<any> {
+  let template = templateCache.get(templateId);
+  if (!template) {
+    template = fetch(`${API_BASE}/templates/${encodeURIComponent(templateId)}`).then((response) => {
+      if (!response.ok) {
+        templateCache.delete(templateId);
+        throw new Error(`Template ${templateId} unavailable: ${response.status}`);
+      }
+      return response.json();
+    });
+    templateCache.set(templateId, template);
+  }
+  return template;
+}
+
+export async function fetchChartSpec(url: string): Promise<any> {
+  const response = await fetch(`${url}${url.includes('?') ? '&' : '?'}lean=true`);
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  const spec = await response.json();
+  if (spec.template_id) {
+    spec.layout = { ...spec.layout, template: await fetchTemplate(spec.template_id) };
+  }
+  return spec;
+}